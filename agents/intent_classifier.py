@@ -0,0 +1,330 @@
+# ==========================================
+# FILE: agents/intent_classifier.py
+# ==========================================
+"""
+Zero-LLM fast path in front of the router.
+Keyword/regex rules plus a small multinomial logistic model (numpy, hashed
+word and character n-grams) trained on seed examples and on the turns the
+LLM router has already labelled. Confident predictions skip the gpt-4o
+call; everything else is deferred to the LLM.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import threading
+from pathlib import Path
+from collections import deque
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from schema import InventorySearchRequest
+from data.features import FEATURE_PATTERNS, normalize_feature
+
+INTENTS = ["LOCAL", "WEB", "CHAT", "COMPARE"]
+
+MEMORY_DIR = Path(__file__).parent.parent / "memory"
+TURN_LOG = MEMORY_DIR / "router_turns.jsonl"
+# Logging LLM-routed turns is opt-in; only the most recent MAX_LOGGED_TURNS are kept
+LOG_ROUTER_TURNS = os.getenv("CARASTRA_LOG_ROUTER_TURNS", "0") == "1"
+MAX_LOGGED_TURNS = int(os.getenv("CARASTRA_MAX_LOGGED_TURNS", 5000))
+
+# Minimum confidence for answering without the LLM
+DEFAULT_THRESHOLD = float(os.getenv("CARASTRA_INTENT_THRESHOLD", 0.85))
+RULE_CONFIDENCE = 0.95
+FEATURE_DIM = 1 << 13
+
+# (intent, pattern) checked in order; the first hit wins
+RULES: List[Tuple[str, re.Pattern]] = [
+    ("CHAT", re.compile(r"^\s*(hi|hello|hey|yo|good (morning|afternoon|evening)|thanks?( you)?|thank you|"
+                        r"cheers|bye|goodbye|see you|ok(ay)?|cool|great|nice|who are you|how are you)\b[\s\w,!.?']{0,20}$")),
+    ("COMPARE", re.compile(r"\b(vs\.?|versus|compare|comparison|compared to|better than|difference between|"
+                           r"or the|which is better)\b")),
+    ("LOCAL", re.compile(r"\b(in stock|your (stock|inventory|showroom)|do you (have|sell|stock)|available (with|at) you|"
+                         r"you guys have|show me (your|what you)|what do you have)\b")),
+    ("WEB", re.compile(r"\b(launch(ed|ing)?|news|latest|upcoming|review(s)?|recall|waiting period|"
+                       r"on[- ]road price of|price of|global ncap)\b")),
+]
+
+# Labelled examples the model starts from before any turns are logged
+SEED_EXAMPLES = [
+    ("hello there", "CHAT"), ("thanks a lot", "CHAT"), ("good morning jarvis", "CHAT"),
+    ("how are you doing", "CHAT"), ("tell me a joke", "CHAT"), ("bye for now", "CHAT"),
+    ("you are funny", "CHAT"), ("what's your name", "CHAT"), ("nice talking to you", "CHAT"),
+    ("show me SUVs under 15 lakh", "LOCAL"), ("do you have any diesel cars", "LOCAL"),
+    ("what sedans are in stock", "LOCAL"), ("any 7 seater in your showroom", "LOCAL"),
+    ("cheapest car you have", "LOCAL"), ("which hatchbacks do you have available", "LOCAL"),
+    ("electric cars in your inventory", "LOCAL"), ("cars with sunroof under 20 lakh", "LOCAL"),
+    ("is the creta available", "LOCAL"), ("list your automatic cars", "LOCAL"),
+    ("safest family car you sell", "LOCAL"), ("something with 6 airbags under 12 lakh", "LOCAL"),
+    ("what is the price of the new fortuner", "WEB"), ("when is the thar roxx launching", "WEB"),
+    ("latest news on maruti ev", "WEB"), ("review of the kia seltos facelift", "WEB"),
+    ("what is the mileage of the toyota hyryder", "WEB"), ("global ncap rating of the punch", "WEB"),
+    ("waiting period for scorpio n", "WEB"), ("top speed of the ferrari sf90", "WEB"),
+    ("how much is a bmw x5 in india", "WEB"), ("best bikes under 2 lakh", "WEB"),
+    ("nexon vs creta", "COMPARE"), ("compare city and verna", "COMPARE"),
+    ("which is better brezza or venue", "COMPARE"), ("bmw x5 versus audi q7", "COMPARE"),
+    ("difference between hector and harrier", "COMPARE"), ("seltos or creta for a family", "COMPARE"),
+    ("is the virtus better than the slavia", "COMPARE"), ("compare nexon ev with mg zs ev", "COMPARE"),
+]
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def featurize(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashed bag of words, word bigrams and character trigrams as sparse
+    (indices, values), L2-normalized. crc32 keeps hashes stable across runs.
+    """
+    words = _tokens(text)
+    grams = words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+    grams += [f"#{w[i:i + 3]}" for w in (f"<{w}>" for w in words) for i in range(len(w) - 2)]
+    idx, counts = np.unique(np.array([zlib.crc32(g.encode("utf-8")) & (FEATURE_DIM - 1) for g in grams],
+                                     dtype=np.int64), return_counts=True)
+    values = counts.astype(np.float32)
+    norm = np.linalg.norm(values)
+    return idx, (values / norm if norm else values)
+
+
+def rule_intent(text: str) -> Optional[str]:
+    lowered = text.lower()
+    for intent, pattern in RULES:
+        if pattern.search(lowered):
+            return intent
+    return None
+
+
+class LogisticIntentModel:
+    """Multinomial logistic regression trained with full-batch gradient descent."""
+
+    def __init__(self, weights: np.ndarray = None, bias: np.ndarray = None):
+        self.weights = weights if weights is not None else np.zeros((FEATURE_DIM, len(INTENTS)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(INTENTS), dtype=np.float32)
+
+    def fit(self, examples: List[Tuple[str, str]], epochs: int = 300, lr: float = 2.0, l2: float = 1e-4):
+        """Fit on (text, intent) pairs; features stay sparse so large turn logs are cheap."""
+        feats = [featurize(text) for text, _ in examples]
+        rows = np.concatenate([np.full(idx.size, i) for i, (idx, _) in enumerate(feats)])
+        cols = np.concatenate([idx for idx, _ in feats])
+        vals = np.concatenate([val for _, val in feats])
+        n, k = len(examples), len(INTENTS)
+        Y = np.eye(k, dtype=np.float32)[[INTENTS.index(intent) for _, intent in examples]]
+
+        W = np.zeros((FEATURE_DIM, k), dtype=np.float32)
+        b = np.zeros(k, dtype=np.float32)
+        for _ in range(epochs):
+            contrib = vals[:, None] * W[cols]
+            Z = np.stack([np.bincount(rows, weights=contrib[:, j], minlength=n) for j in range(k)], axis=1)
+            G = (self._softmax(Z + b) - Y) / n
+            upstream = vals[:, None] * G[rows]
+            dW = np.stack([np.bincount(cols, weights=upstream[:, j], minlength=FEATURE_DIM) for j in range(k)], axis=1)
+            W -= (lr * (dW + l2 * W)).astype(np.float32)
+            b -= (lr * G.sum(axis=0)).astype(np.float32)
+        self.weights, self.bias = W, b
+        return self
+
+    @staticmethod
+    def _softmax(z: np.ndarray) -> np.ndarray:
+        z = z - z.max(axis=-1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=-1, keepdims=True)
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        idx, values = featurize(text)
+        return self._softmax(values @ self.weights[idx] + self.bias)
+
+    def save(self, path: Path):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias)
+
+    @classmethod
+    def load(cls, path: Path) -> "LogisticIntentModel":
+        data = np.load(path)
+        return cls(data["weights"], data["bias"])
+
+
+class IntentClassifier:
+    """
+    Rules + logistic model with a confidence threshold.
+    predict() returns (intent, confidence, source); callers take the fast
+    path only when accept() says so and report each turn through record().
+    """
+
+    def __init__(self, model: LogisticIntentModel = None, threshold: float = DEFAULT_THRESHOLD):
+        self.model = model
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._stats = {"turns": 0, "fast_path": 0, "deferred": 0, "rule_hits": 0, "model_hits": 0}
+
+    def predict(self, text: str) -> Tuple[str, float, str]:
+        ruled = rule_intent(text)
+        if self.model is None:
+            return (ruled, RULE_CONFIDENCE, "rules") if ruled else ("CHAT", 0.0, "none")
+
+        probs = self.model.predict_proba(text)
+        best = INTENTS[int(probs.argmax())]
+        if ruled is None:
+            return best, float(probs.max()), "model"
+        if ruled == best:
+            return ruled, max(RULE_CONFIDENCE, float(probs.max())), "rules"
+        # Rules and model disagree: never confident enough for the fast path
+        return ruled, min(float(probs[INTENTS.index(ruled)]), 0.5), "rules"
+
+    def probabilities(self, text: str) -> Dict[str, float]:
+        """Model probability per intent (uniform without a model)."""
+        if self.model is None:
+            return {intent: 1.0 / len(INTENTS) for intent in INTENTS}
+        return dict(zip(INTENTS, self.model.predict_proba(text).tolist()))
+
+    def accept(self, text: str) -> Optional[Tuple[str, float, str]]:
+        """Prediction if it clears the threshold, else None (ask the LLM)."""
+        intent, confidence, source = self.predict(text)
+        return (intent, confidence, source) if confidence >= self.threshold else None
+
+    def record(self, source: Optional[str]):
+        """Count one routed turn: source of the fast-path prediction, or None if the LLM routed it."""
+        with self._lock:
+            self._stats["turns"] += 1
+            self._stats["fast_path" if source else "deferred"] += 1
+            if source:
+                self._stats["rule_hits" if source == "rules" else "model_hits"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            turns = self._stats["turns"]
+            return {**self._stats, "threshold": self.threshold,
+                    "fast_path_rate": self._stats["fast_path"] / turns if turns else 0.0}
+
+
+# ------------------------------------------
+# Turn log (training data from the LLM router)
+# ------------------------------------------
+
+_log_lock = threading.Lock()
+# Lines per log file, counted once and then tracked on append
+_log_lines: Dict[Path, int] = {}
+
+
+def log_turn(text: str, intent: str, path: Path = TURN_LOG, max_turns: int = MAX_LOGGED_TURNS):
+    """
+    Append one LLM-labelled turn for future training. Once the file holds
+    twice max_turns lines it is rewritten with the newest max_turns, so the
+    log stays bounded at an amortized O(1) cost per turn.
+    """
+    with _log_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path not in _log_lines:
+            _log_lines[path] = sum(1 for _ in open(path, encoding="utf-8")) if path.exists() else 0
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"text": text, "intent": intent, "ts": time.time()}) + "\n")
+        _log_lines[path] += 1
+        if _log_lines[path] >= 2 * max_turns:
+            with open(path, encoding="utf-8") as f:
+                kept = deque(f, maxlen=max_turns)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(tmp, path)
+            _log_lines[path] = len(kept)
+
+
+def load_turns(path: Path = TURN_LOG, max_turns: int = MAX_LOGGED_TURNS) -> List[Tuple[str, str]]:
+    """The newest max_turns logged turns as (text, intent)."""
+    if not path.exists():
+        return []
+    turns = []
+    with open(path, encoding="utf-8") as f:
+        for line in deque(f, maxlen=max_turns):
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("intent") in INTENTS and row.get("text"):
+                turns.append((row["text"], row["intent"]))
+    return turns
+
+
+def train_classifier(examples: List[Tuple[str, str]] = None, threshold: float = DEFAULT_THRESHOLD) -> IntentClassifier:
+    """Fit on the seed examples plus logged turns (or the given examples)."""
+    data = examples if examples is not None else SEED_EXAMPLES + load_turns()
+    return IntentClassifier(LogisticIntentModel().fit(data), threshold)
+
+
+# ------------------------------------------
+# Rule-based filter extraction for fast-path LOCAL turns
+# ------------------------------------------
+
+AMOUNT_UNITS = {"lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "l": 1e5, "crore": 1e7, "crores": 1e7, "cr": 1e7}
+BUDGET_PATTERN = re.compile(r"\b(?:under|below|less than|within|up ?to|max(?:imum)?|budget(?: of| is)?)\s*"
+                            r"(?:rs\.?|inr|₹)?\s*(\d+(?:\.\d+)?)\s*(lakhs?|lac|l|crores?|cr)\b")
+# "10 to 15 lakh": the upper end is the budget
+BUDGET_RANGE_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\s*(?:to|-|and)\s*(\d+(?:\.\d+)?)\s*(lakhs?|lac|l|crores?|cr)\b")
+# Features are only read from an explicit feature phrase ("with a sunroof", "that has ADAS");
+# matching the whole utterance turns "price range" into ev_range and "bang for the buck" into audio
+FEATURE_PHRASE = re.compile(r"\b(?:with|has|having|featuring|including|includes|equipped with)\s+"
+                            r"((?:(?!\b(?:under|below|within|less than|up ?to|for|in|priced|budget|from|at)\b)"
+                            r"[a-z0-9 ,&/-])+)")
+FEATURE_SPLIT = re.compile(r"\s*(?:,|&|/|\band\b|\bor\b|\bplus\b)\s*")
+FUEL_WORDS = {"petrol": "petrol", "diesel": "diesel", "electric": "electric", "ev": "electric", "evs": "electric",
+              "cng": "cng", "hybrid": "hybrid"}
+# Plain sort keys rank the best value first; "-" flips the direction
+SORT_WORDS = [("cheapest", "price"), ("most affordable", "price"), ("most expensive", "-price"),
+              ("best mileage", "mileage"), ("most fuel efficient", "mileage"), ("safest", "safety_rating"),
+              ("most powerful", "power"), ("fastest", "power")]
+KNOWN_FEATURES = {tag for tag, _ in FEATURE_PATTERNS} - {"airbags"}
+
+
+def extract_search(text: str, vehicle_types: List[str], brands: List[str]) -> InventorySearchRequest:
+    """Inventory filters a LOCAL turn states outright (budget, type, fuel, seats, brand, features)."""
+    lowered = text.lower()
+    words = set(_tokens(lowered))
+    request = InventorySearchRequest()
+
+    match = BUDGET_PATTERN.search(lowered) or BUDGET_RANGE_PATTERN.search(lowered)
+    if match:
+        request.budget_max = float(match.group(1)) * AMOUNT_UNITS[match.group(2)]
+
+    # Longest type first so "compact suv" beats "suv"
+    for vehicle_type in sorted(vehicle_types, key=len, reverse=True):
+        if re.search(rf"\b{vehicle_type.replace('_', ' ')}s?\b", lowered):
+            request.vehicle_type = vehicle_type
+            break
+
+    fuels = [FUEL_WORDS[w] for w in words if w in FUEL_WORDS]
+    if len(set(fuels)) == 1:
+        request.fuel_type = fuels[0]
+
+    match = re.search(r"\b(\d+)[- ]?(?:seater|seats)\b", lowered)
+    if match:
+        request.seating_min = int(match.group(1))
+
+    match = re.search(r"\b(\d+)\s*airbags?\b", lowered)
+    if match:
+        request.airbags_min = int(match.group(1))
+
+    for brand in brands:
+        # "Maruti Suzuki" is usually just "maruti"
+        if brand.lower() in lowered or brand.lower().split()[0].split("-")[0] in words:
+            request.brand = brand
+            break
+
+    phrases = [part for match in FEATURE_PHRASE.finditer(lowered) for part in FEATURE_SPLIT.split(match.group(1))]
+    tags = (tag for part in phrases if part.strip() for tag in normalize_feature(part.strip()))
+    request.features_all = list(dict.fromkeys(tag for tag in tags if tag in KNOWN_FEATURES))
+    for phrase, sort_by in SORT_WORDS:
+        if phrase in lowered:
+            request.sort_by = sort_by
+            break
+    return request
+
+
+_CLASSIFIER: Optional[IntentClassifier] = None
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Process-wide classifier, trained once at first use."""
+    global _CLASSIFIER
+    if _CLASSIFIER is None:
+        _CLASSIFIER = train_classifier()
+    return _CLASSIFIER
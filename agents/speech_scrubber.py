@@ -0,0 +1,64 @@
+# ==========================================
+# FILE: agents/speech_scrubber.py
+# ==========================================
+"""
+Incremental clean-up of the synthesizer's output for speech.
+Removes markdown emphasis/headers and robotic titles ("Verdict:") from a
+token stream. Tokens can split a marker ("Ver" + "dict:"), so the tail that
+could still grow into one is held back until the next chunk (or flush()).
+"""
+import re
+from typing import Iterable, Iterator
+
+# Removed wherever they appear
+SCRUB_MARKERS = ("**", "###", "##", "Verdict:", "Conclusion:", "Comparison:")
+
+
+class SpeechScrubber:
+    """feed() chunks in, get speakable text out; call flush() at the end."""
+
+    def __init__(self, markers: Iterable[str] = SCRUB_MARKERS):
+        self.markers = tuple(markers)
+        # Longest marker first, so "###" wins over "##"
+        self._pattern = re.compile("|".join(re.escape(m) for m in sorted(self.markers, key=len, reverse=True)))
+        self._pending = ""
+
+    def _held_length(self, text: str) -> int:
+        """Length of the longest suffix that is (the start of) a marker."""
+        longest = max(len(m) for m in self.markers)
+        for size in range(min(longest, len(text)), 0, -1):
+            tail = text[-size:]
+            if any(m.startswith(tail) for m in self.markers):
+                return size
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        text = self._pending + chunk
+        cut = len(text) - self._held_length(text)
+        # Never split a marker that straddles the cut
+        for match in self._pattern.finditer(text):
+            if match.start() < cut < match.end():
+                cut = match.start()
+                break
+        self._pending = text[cut:]
+        return self._pattern.sub("", text[:cut])
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return self._pattern.sub("", text)
+
+    def scrub(self, text: str) -> str:
+        """Whole-text version (same result as feeding it in one chunk and flushing)."""
+        return self.feed(text) + self.flush()
+
+
+def scrub_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """Scrubbed, non-empty pieces of a chunk stream."""
+    scrubber = SpeechScrubber()
+    for chunk in chunks:
+        out = scrubber.feed(chunk)
+        if out:
+            yield out
+    tail = scrubber.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,111 @@
+"""
+Per-utterance setup cost: temp-file + fresh-device path vs AudioSession.
+The old path wrote each TTS response to response_<uuid>.mp3, loaded it into
+pygame, deleted it, and created / terminated a PyAudio instance plus a mic
+stream around every utterance. AudioSession pays the device cost once and
+decodes from memory. Device timings need pyaudio and a sound card; without
+them only the file-system and decode parts are measured.
+
+Usage: python benchmarks/bench_audio_session.py [utterances]
+"""
+import io
+import os
+import sys
+import math
+import time
+import uuid
+import wave
+import struct
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from voice.audio_session import AudioSession, decode_audio, TTS_PCM_RATE, MIC_RATE, MIC_CHUNK
+
+
+def tone(seconds: float, rate: int = TTS_PCM_RATE) -> bytes:
+    """16-bit mono PCM sine, about the size of a spoken sentence."""
+    frames = int(seconds * rate)
+    return struct.pack(f"<{frames}h", *(int(8000 * math.sin(2 * math.pi * 220 * i / rate)) for i in range(frames)))
+
+
+def as_wav(pcm: bytes, rate: int = TTS_PCM_RATE) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(rate)
+        clip.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def report(label, samples):
+    if samples:
+        print(f"{label:<34} p50 {percentile(samples, 50) * 1000:>8.2f} ms   p95 {percentile(samples, 95) * 1000:>8.2f} ms")
+    else:
+        print(f"{label:<34} n/a")
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def temp_file_round_trip(audio: bytes) -> float:
+    """Old path minus playback: write the response next to main.py, read it back, delete it."""
+    start = time.perf_counter()
+    path = Path(__file__).parent.parent / f"response_{uuid.uuid4().hex[:8]}.mp3"
+    with open(path, "wb") as f:
+        f.write(audio)
+    with open(path, "rb") as f:
+        f.read()
+    os.remove(path)
+    return time.perf_counter() - start
+
+
+def fresh_devices() -> float:
+    """Old path: PyAudio() + mic stream opened and torn down around one utterance."""
+    import pyaudio
+    start = time.perf_counter()
+    p = pyaudio.PyAudio()
+    mic = p.open(format=pyaudio.paInt16, channels=1, rate=MIC_RATE, input=True, frames_per_buffer=MIC_CHUNK)
+    mic.stop_stream()
+    mic.close()
+    p.terminate()
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    pcm = tone(3.0)
+    wav = as_wav(pcm)
+    print(f"{n} utterances of {len(pcm) / (2 * TTS_PCM_RATE):.1f} s audio ({len(wav) / 1024:.0f} KB)\n")
+
+    report("temp file write/read/delete", [temp_file_round_trip(wav) for _ in range(n)])
+    report("in-memory decode (raw PCM)", [timed(decode_audio, pcm, "pcm") for _ in range(n)])
+    report("in-memory decode (WAV)", [timed(decode_audio, wav, "wav") for _ in range(n)])
+
+    try:
+        import pyaudio  # noqa: F401
+    except ImportError:
+        print("\npyaudio not installed: device setup not measured")
+        return
+    try:
+        report("fresh PyAudio + mic stream", [fresh_devices() for _ in range(min(n, 10))])
+        session = AudioSession().open()
+        session.drain_input()
+        report("AudioSession mic drain (reused)", [timed(session.drain_input) for _ in range(n)])
+        print(f"\nAudioSession one-time open: {session.stats()['open_ms']} ms")
+        session.close()
+    except OSError as e:
+        print(f"\nno audio device available: {e}")
+
+
+if __name__ == "__main__":
+    main()
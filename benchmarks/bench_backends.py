@@ -0,0 +1,93 @@
+"""
+Startup time and RSS per inventory backend.
+Writes a synthetic catalog in every format, then opens each backend in a
+fresh subprocess and reports open time, resident memory (anonymous vs
+file-backed, i.e. shareable mmap pages) and a query latency.
+
+Usage: python benchmarks/bench_backends.py [rows]
+"""
+import sys
+import json
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def rss_kb() -> dict:
+    """VmRSS / RssAnon / RssFile in kB from /proc (Linux)."""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0])
+    return fields
+
+
+def child(url: str, rows: int):
+    """Runs in the subprocess: open one backend and print a JSON report."""
+    from data.backends import open_backend
+    from benchmarks.synthetic_inventory import make_inventory
+
+    records = make_inventory(rows) if url == "memory" else None
+    baseline = rss_kb()
+
+    start = time.perf_counter()
+    backend = open_backend(url, records)
+    backend.store
+    open_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = backend.search_inventory(vehicle_type="suv", budget_max=1800000, sort_by="price", limit=5)
+    backend.get_vehicle_by_id(hits[0].vehicle_id)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    after = rss_kb()
+    print(json.dumps({
+        "open_s": open_s,
+        "query_ms": query_ms,
+        "rss_mb": (after["VmRSS"] - baseline["VmRSS"]) / 1024,
+        "anon_mb": (after["RssAnon"] - baseline["RssAnon"]) / 1024,
+        "file_mb": (after["RssFile"] - baseline["RssFile"]) / 1024,
+    }))
+
+
+def run(rows: int = 1_000_000):
+    from data.backends import write_sqlite, write_parquet, write_mmap
+    from benchmarks.synthetic_inventory import make_inventory
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"📦 Writing {rows:,} rows...")
+        records = make_inventory(rows)
+        urls = ["memory"]
+        write_sqlite(records, f"{tmp}/cars.db")
+        urls.append(f"sqlite://{tmp}/cars.db")
+        try:
+            write_parquet(records, f"{tmp}/cars.parquet")
+            urls.append(f"parquet://{tmp}/cars.parquet")
+        except ImportError as e:
+            print(f"   (skipping parquet: {e})")
+        write_mmap(records, f"{tmp}/cars_mmap")
+        urls.append(f"mmap://{tmp}/cars_mmap")
+        del records
+
+        print(f"\n{'backend':<9} {'open s':>8} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8} {'query ms':>9}")
+        for url in urls:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", url, str(rows)],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            report = json.loads(out)
+            print(f"{url.split(':')[0]:<9} {report['open_s']:>8.2f} {report['rss_mb']:>8.0f} "
+                  f"{report['anon_mb']:>8.0f} {report['file_mb']:>8.0f} {report['query_ms']:>9.2f}")
+        print("\n(file MB = page-cache pages shared between processes mapping the same files)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
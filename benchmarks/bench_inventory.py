@@ -0,0 +1,76 @@
+"""
+Inventory search latency vs catalog size.
+Compares the original per-dict loop, the full mask scan and the indexed planner.
+
+Usage: python benchmarks/bench_inventory.py [max_rows]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.inventory_store import InventoryStore
+from benchmarks.synthetic_inventory import make_inventory
+
+QUERIES = {
+    "budget<8L": dict(budget_max=800000),
+    "suv+diesel": dict(vehicle_type="suv", fuel_type="diesel"),
+    "brand=bmw": dict(brand="bmw"),
+    "petrol<20L,5 seats": dict(budget_max=2000000, fuel_type="petrol", seating_min=5),
+}
+
+# The original loop is only timed up to this size
+LOOP_LIMIT = 100_000
+
+
+def legacy_loop(records, budget_max=None, vehicle_type=None, fuel_type=None, seating_min=None, brand=None):
+    """Row ids matched by the original search_inventory loop (without building VehicleSpecs)."""
+    hits = []
+    for i, car in enumerate(records):
+        if budget_max and car["price"] > budget_max:
+            continue
+        if vehicle_type and car["type"] != vehicle_type:
+            continue
+        if fuel_type and car["fuel_type"] != fuel_type:
+            continue
+        if seating_min and car["seating"] < seating_min:
+            continue
+        if brand and car["brand"].lower() != brand.lower():
+            continue
+        hits.append(i)
+    return hits
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(max_rows: int = 1_000_000):
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= max_rows]
+    print(f"{'rows':>9} {'query':<20} {'matches':>8} {'loop ms':>9} {'mask ms':>9} {'index ms':>9}")
+    for n in sizes:
+        records = make_inventory(n)
+        start = time.perf_counter()
+        store = InventoryStore.from_records(records)
+        build_ms = (time.perf_counter() - start) * 1000
+        id_ms = timed(lambda: store.find_row(records[n // 2]["vehicle_id"]), repeat=50)
+        print(f"{n:>9} (build {build_ms:.0f} ms, id lookup {id_ms * 1000:.1f} us)")
+
+        for label, filters in QUERIES.items():
+            matches = store.select(**filters)
+            assert (matches == store.filter_mask(**filters).nonzero()[0]).all()
+            loop_ms = timed(lambda: legacy_loop(records, **filters), repeat=1) if n <= LOOP_LIMIT else float("nan")
+            mask_ms = timed(lambda: store.filter_mask(**filters).nonzero())
+            index_ms = timed(lambda: store.select(**filters))
+            print(f"{'':>9} {label:<20} {matches.size:>8} {loop_ms:>9.2f} {mask_ms:>9.2f} {index_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
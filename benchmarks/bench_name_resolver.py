@@ -0,0 +1,148 @@
+"""
+Accuracy and latency of the fuzzy name resolver.
+Builds a catalog of N distinct synthetic models (plus the real inventory),
+then resolves perturbed names: spacing ("nexon e v"), typos, sound-alike
+spellings and spoken numbers. Reports top-1 / top-5 accuracy and latency
+percentiles per perturbation.
+
+Usage: python benchmarks/bench_name_resolver.py [models] [queries]
+"""
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.car_database import CAR_INVENTORY
+from data.name_resolver import NameResolver
+
+SYLLABLES = ["ka", "ro", "vin", "ter", "za", "lo", "nex", "cre", "ta", "mar", "sel", "to", "ver", "na",
+             "qu", "dra", "phi", "lux", "ae", "ri", "on", "bel", "sto", "gha", "ix", "mo", "tri", "zen"]
+SUFFIXES = ["", "", "", " EV", " Plus", " 300", " X", " GT", " Pro", " Max"]
+SOUNDS = [("c", "k"), ("k", "c"), ("ph", "f"), ("z", "s"), ("x", "ks"), ("w", "v"), ("ee", "i"), ("i", "ee")]
+NUMBER_WORDS = {"3": "three", "5": "five", "7": "seven", "10": "ten"}
+
+# Spoken / typed forms of the real catalog and the vehicle they should hit
+REAL_CASES = [
+    ("Nexon E V", "CAR015"), ("kreta", "CAR011"), ("Hundai Verna", "CAR005"), ("honda siti", "CAR004"),
+    ("scorpio n", "CAR010"), ("Mercedes C class", "CAR013"), ("three series", "CAR014"),
+    ("breeza", "CAR009"), ("alto k ten", "CAR001"), ("tata nexon electric", "CAR015"),
+    ("vertus", "CAR006"), ("MG hektor", "CAR012"), ("grand i 10 nios", "CAR002"), ("tiago", "CAR003"),
+    # Variants not in stock must not resolve to a sibling model
+    ("Tata Tiago EV", None), ("tiago cng", None), ("creta electric", None),
+]
+
+
+def make_models(n: int, rng: random.Random):
+    """n records with distinct model names over a few hundred brands."""
+    brands = [("".join(rng.choice(SYLLABLES) for _ in range(2))).title() for _ in range(300)]
+    records, seen = [], set()
+    while len(records) < n:
+        model = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title() + rng.choice(SUFFIXES)
+        if model.lower() in seen:
+            continue
+        seen.add(model.lower())
+        brand = rng.choice(brands)
+        records.append({"vehicle_id": f"M{len(records):07d}", "brand": brand, "model": model,
+                        "name": f"{brand} {model}"})
+    return records
+
+
+def typo(text: str, rng: random.Random) -> str:
+    letters = [i for i, ch in enumerate(text) if ch.isalpha()]
+    i = rng.choice(letters)
+    op = rng.choice(["drop", "swap", "sub"])
+    if op == "drop":
+        return text[:i] + text[i + 1:]
+    if op == "swap" and i + 1 < len(text):
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+
+
+def spaced(text: str, rng: random.Random) -> str:
+    """Split the model into spelled-out chunks: "Nexon EV" -> "nexon e v"."""
+    words = text.lower().split()
+    last = words[-1]
+    words[-1] = " ".join(last) if len(last) <= 3 else last[:len(last) // 2] + " " + last[len(last) // 2:]
+    return " ".join(words)
+
+
+def sound_alike(text: str, rng: random.Random) -> str:
+    lower = text.lower()
+    options = [(a, b) for a, b in SOUNDS if a in lower]
+    if not options:
+        return lower
+    a, b = rng.choice(options)
+    return lower.replace(a, b, 1)
+
+
+def spoken_number(text: str, rng: random.Random) -> str:
+    return " ".join(NUMBER_WORDS.get(w, w) for w in text.split())
+
+
+PERTURBATIONS = {
+    "exact": lambda text, rng: text,
+    "brand+model": None,  # filled per record
+    "spacing": spaced,
+    "typo": typo,
+    "sound-alike": sound_alike,
+    "spoken number": spoken_number,
+}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def main():
+    n_models = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(11)
+
+    records = make_models(n_models, rng) + CAR_INVENTORY
+    start = time.perf_counter()
+    resolver = NameResolver(records)
+    build = time.perf_counter() - start
+    print(f"{n_models:,} synthetic models + {len(CAR_INVENTORY)} real: {len(resolver):,} aliases, "
+          f"built in {build:.1f} s\n")
+
+    # The same model name can exist under several brands; any of them is a hit
+    by_model = {}
+    for car in records:
+        by_model.setdefault(car["model"].lower(), set()).add(car["vehicle_id"])
+
+    print(f"{'perturbation':<15} {'top-1':>7} {'top-5':>7} {'p50 us':>8} {'p99 us':>8}")
+    sample = rng.sample(records[:n_models], min(n_queries, n_models))
+    for label, perturb in PERTURBATIONS.items():
+        hits1 = hits5 = 0
+        latencies = []
+        for car in sample:
+            if label == "brand+model":
+                query = car["name"]
+            else:
+                query = perturb(car["model"], rng)
+            gold = by_model[car["model"].lower()]
+            start = time.perf_counter()
+            ranked = resolver.resolve(query, limit=5)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            ids = [vid for vid, _ in ranked]
+            hits1 += bool(ids) and ids[0] in gold
+            hits5 += any(vid in gold for vid in ids)
+        print(f"{label:<15} {hits1 / len(sample):>7.1%} {hits5 / len(sample):>7.1%} "
+              f"{percentile(latencies, 50):>8.0f} {percentile(latencies, 99):>8.0f}")
+
+    # Synthetic names can collide with real ones ("Nexonev"), so real cases use the real catalog
+    print("\nReal catalog, spoken forms:")
+    real = NameResolver(CAR_INVENTORY)
+    correct = 0
+    for query, expected in REAL_CASES:
+        got = real.resolve_one(query)
+        correct += got == expected
+        print(f"  {'✅' if got == expected else '❌'} {query!r:<26} -> {got}")
+    print(f"  {correct}/{len(REAL_CASES)} resolved")
+
+
+if __name__ == "__main__":
+    main()
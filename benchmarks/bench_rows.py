@@ -0,0 +1,65 @@
+"""
+Memory and materialization cost of the row representation.
+Compares a catalog held as dicts, as validated VehicleSpecs objects and as
+compact VehicleRow objects, and times building API results from each.
+
+Usage: python benchmarks/bench_rows.py [rows]
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from schema import VehicleSpecs
+from data.rows import VehicleRow
+from benchmarks.synthetic_inventory import make_inventory
+
+
+def measure(build):
+    """(result, traced MB, seconds) for building a structure."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 2**20, elapsed
+
+
+def run(rows: int = 100_000):
+    # Simulates rows arriving from a feed: every row owns its strings and lists
+    source = [{k: (list(v) if isinstance(v, list) else v) for k, v in car.items()}
+              for car in make_inventory(rows)]
+
+    dicts, dict_mb, _ = measure(lambda: [
+        {k: (list(v) if isinstance(v, list) else (v + "#")[:-1] if isinstance(v, str) else v)
+         for k, v in car.items()} for car in source])
+    specs, specs_mb, specs_s = measure(lambda: [VehicleSpecs(**car) for car in source])
+    compact, compact_mb, _ = measure(lambda: [VehicleRow.from_record(car) for car in source])
+
+    print(f"{'representation':<24} {'MB':>8} {'bytes/row':>10}")
+    for label, mb in (("dicts", dict_mb), ("VehicleSpecs (validated)", specs_mb), ("VehicleRow (compact)", compact_mb)):
+        print(f"{label:<24} {mb:>8.1f} {mb * 2**20 / rows:>10.0f}")
+
+    sample = compact[: min(rows, 10_000)]
+    start = time.perf_counter()
+    [VehicleSpecs(**car) for car in source[: len(sample)]]
+    validate_s = time.perf_counter() - start
+    start = time.perf_counter()
+    [row.to_specs() for row in sample]
+    construct_s = time.perf_counter() - start
+
+    print(f"\nMaterializing {len(sample):,} results:")
+    print(f"  VehicleSpecs(**dict)       : {validate_s * 1000:.1f} ms")
+    print(f"  VehicleRow.to_specs()      : {construct_s * 1000:.1f} ms (validated from attributes)")
+    start = time.perf_counter()
+    [VehicleSpecs.model_construct(**row.to_dict()) for row in sample]
+    print(f"  model_construct(**dict)    : {(time.perf_counter() - start) * 1000:.1f} ms (unvalidated)")
+    print(f"\n(full-catalog validation took {specs_s:.2f} s for {rows:,} rows)")
+    del dicts, specs
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
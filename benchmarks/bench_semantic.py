@@ -0,0 +1,84 @@
+"""
+Semantic index recall/latency benchmark.
+Builds the index over a synthetic catalog with the CPU embedding model,
+then reports build / incremental rebuild / load times, query latency and
+recall@k of the FAISS index against exact brute-force search.
+
+Usage: python benchmarks/bench_semantic.py [rows]
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.semantic_index import SemanticIndex, sentence_transformer_embedder
+from benchmarks.synthetic_inventory import make_inventory
+
+QUERIES = [
+    "safe car for new parents",
+    "cheap first car for college",
+    "seven seater for a big family road trip",
+    "luxury sedan with a great sound system",
+    "electric car with fast charging",
+    "fun to drive sporty sedan",
+    "rugged 4x4 for bad roads",
+    "fuel efficient city hatchback",
+]
+K = 10
+
+
+def recall_at_k(index: SemanticIndex, vector: np.ndarray, hits) -> float:
+    """Share of returned hits that score at least as high as the exact k-th best (ties count)."""
+    exact = np.asarray(index.embeddings) @ vector
+    kth = np.partition(-exact, K - 1)[K - 1] * -1
+    return sum(1 for _, score in hits if score >= kth - 1e-5) / K
+
+
+def run(rows: int = 20_000):
+    records = make_inventory(rows)
+    embed = sentence_transformer_embedder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SemanticIndex(tmp, embedder=embed)
+
+        start = time.perf_counter()
+        embedded = index.build(records)
+        print(f"🏗️  Full build       : {embedded} vehicles in {time.perf_counter() - start:.1f} s")
+
+        # Change 1% of the catalog and rebuild
+        for car in records[:: 100]:
+            car["price"] += 10000
+        start = time.perf_counter()
+        embedded = index.build(records)
+        print(f"♻️  Incremental build: {embedded} vehicles in {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        loaded = SemanticIndex(tmp, embedder=embed)
+        loaded.load()
+        print(f"📂 Load (mmap)      : {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{type(loaded.embeddings).__name__} {loaded.embeddings.shape}")
+
+        latencies, recalls = [], []
+        for query in QUERIES:
+            vector = embed([query])[0]
+            start = time.perf_counter()
+            hits = loaded.search(query, k=K)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(recall_at_k(loaded, vector, hits))
+
+        filtered = [car["vehicle_id"] for car in records if car["fuel_type"] == "diesel"]
+        start = time.perf_counter()
+        loaded.search(QUERIES[2], k=K, candidates=filtered)
+        hybrid_ms = (time.perf_counter() - start) * 1000
+
+    print(f"⏱️  Query latency    : p50 {np.percentile(latencies, 50):.1f} ms, "
+          f"p95 {np.percentile(latencies, 95):.1f} ms (includes query embedding)")
+    print(f"🔀 Hybrid query     : {hybrid_ms:.1f} ms over {len(filtered)} filtered candidates")
+    print(f"🎯 Recall@{K}        : {np.mean(recalls):.3f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
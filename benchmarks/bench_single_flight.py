@@ -0,0 +1,145 @@
+"""
+Request coalescing for concurrent identical web searches.
+Swaps in a local stub search client with a fixed latency, then fires the
+same query from many threads and many asyncio tasks at once and checks
+that the stub saw exactly one request per burst and every caller got the
+same result. A failing upstream must reach every waiter (once), and must
+not stick: the next burst calls upstream again.
+Exits non-zero if any check fails, so it doubles as a regression test.
+
+Usage: python benchmarks/bench_single_flight.py [callers] [latency_s]
+"""
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tools import car_tools
+from tools.search_cache import SearchCache
+from tools.single_flight import SingleFlight
+
+
+class StubSearchClient:
+    """Stands in for TavilyClient: sleeps, counts calls, returns canned results."""
+
+    def __init__(self, latency: float, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, **kwargs) -> dict:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("stub upstream down")
+        return {"results": [{"title": f"Review: {query}", "url": "https://example.com", "content": "Stub result."}]}
+
+
+def fresh_client(latency: float, fail: bool = False) -> StubSearchClient:
+    """New stub client and an empty, memory-only cache so every burst misses."""
+    client = StubSearchClient(latency, fail)
+    car_tools.set_search_client(client)
+    car_tools.search_cache = SearchCache(db_path=None)
+    return client
+
+
+def thread_burst(callers: int, query: str):
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        return list(pool.map(car_tools.web_search_cars_tool, [query] * callers))
+
+
+async def async_burst(callers: int, query: str):
+    return await asyncio.gather(*(car_tools.web_search_cars_async(query) for _ in range(callers)))
+
+
+def shared_errors(callers: int, latency: float) -> list:
+    """SingleFlight directly: every waiting thread must see the leader's exception."""
+    flights, calls, lock = SingleFlight(), [], threading.Lock()
+
+    def failing():
+        with lock:
+            calls.append(1)
+        time.sleep(latency)
+        raise ConnectionError("stub upstream down")
+
+    def caller(_):
+        try:
+            flights.do("key", failing)
+        except ConnectionError as e:
+            return e
+        return None
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        errors = list(pool.map(caller, range(callers)))
+    failures = []
+    if len(calls) != 1:
+        failures.append(f"errors: expected 1 upstream call, got {len(calls)}")
+    if any(e is None for e in errors) or len({id(e) for e in errors}) != 1:
+        failures.append(f"errors: waiters did not all get the one shared exception ({sum(e is None for e in errors)} got none)")
+    if flights.in_flight():
+        failures.append("errors: failed flight was not cleared")
+    return failures
+
+
+def main():
+    callers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    query = "2025 Hyundai Creta launch price"
+    # Same normalized query, different spelling
+    variants = ["2025 hyundai creta launch price", "  2025 Hyundai CRETA launch cost in India "]
+    failures = []
+
+    print(f"{callers} concurrent callers, stub latency {latency * 1000:.0f} ms\n")
+    print(f"{'mode':<10} {'upstream calls':>15} {'wall ms':>10} {'same result':>12}")
+
+    for mode, fail, burst in [
+        ("threads", False, lambda: thread_burst(callers, query)),
+        ("asyncio", False, lambda: asyncio.run(async_burst(callers, query))),
+        ("mixed", False, lambda: asyncio.run(mixed_burst(callers, variants))),
+        ("failing", True, lambda: thread_burst(callers, query)),
+    ]:
+        client = fresh_client(latency, fail)
+        start = time.perf_counter()
+        results = burst()
+        elapsed = (time.perf_counter() - start) * 1000
+        same = len(set(results)) == 1
+        print(f"{mode:<10} {client.calls:>15} {elapsed:>10.0f} {str(same):>12}")
+        if client.calls != 1:
+            failures.append(f"{mode}: expected 1 upstream call, got {client.calls}")
+        if not same:
+            failures.append(f"{mode}: callers got {len(set(results))} different results")
+        if fail:
+            if not all(r.startswith("Error during web search") for r in results):
+                failures.append(f"{mode}: the upstream error did not reach every caller")
+            # The failure must not be cached or left in flight
+            client.fail = False
+            thread_burst(callers, query)
+            if client.calls != 2:
+                failures.append(f"{mode}: retry after the failure made {client.calls - 1} upstream calls, expected 1")
+
+    failures += shared_errors(callers, latency)
+    print(f"\nflights: {car_tools.search_flights.stats()}")
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+async def mixed_burst(callers: int, variants):
+    """Half the callers on threads, half as tasks, alternating query spellings."""
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        threaded = [loop.run_in_executor(pool, car_tools.web_search_cars_tool, variants[i % 2])
+                    for i in range(callers // 2)]
+        tasks = [car_tools.web_search_cars_async(variants[i % 2]) for i in range(callers - callers // 2)]
+        return await asyncio.gather(*threaded, *tasks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Pipelined vs whole-answer text-to-speech, offline.
+A stub synthesizer sleeps like a network TTS call (fixed overhead plus time
+per character) and a stub player sleeps for the clip's spoken length.
+Reports time to first audio and total time for both strategies, then
+checks that a barge-in cancels the pending synthesis.
+With --pyttsx3 the local pyttsx3 voice is used as the synthesizer.
+
+Usage: python benchmarks/bench_speech_engine.py [--pyttsx3]
+"""
+import io
+import sys
+import time
+import wave
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from voice.speech_engine import SpeechEngine, Pyttsx3Synthesizer, split_sentences
+
+ANSWER = (
+    "The Hyundai Creta is priced at about sixteen and a half lakh rupees on the road. "
+    "It comes with a 1.5 litre petrol engine making 113 horsepower, paired with a manual or CVT gearbox. "
+    "You get six airbags, a panoramic sunroof and ventilated front seats as standard on the top trim. "
+    "Compared with the Kia Seltos it is slightly cheaper, and the ride is a little softer. "
+    "If you would like, I can check which colours we have in stock today."
+)
+
+TTS_OVERHEAD_S = 0.35
+TTS_PER_CHAR_S = 0.004
+# Playback runs 4x faster than real speech (~15 chars/s) to keep the run short
+SPOKEN_CHARS_PER_S = 60.0
+
+
+class StubSynthesizer:
+    def __init__(self):
+        self.calls = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> bytes:
+        with self._lock:
+            self.calls += 1
+        time.sleep(TTS_OVERHEAD_S + TTS_PER_CHAR_S * len(text))
+        with self._lock:
+            self.completed += 1
+        return text.encode("utf-8")
+
+
+def clip_seconds(audio: bytes) -> float:
+    """Length of a WAV clip, or of stub audio (the text itself) at SPOKEN_CHARS_PER_S."""
+    if audio[:4] == b"RIFF":
+        with wave.open(io.BytesIO(audio)) as clip:
+            return clip.getnframes() / clip.getframerate()
+    return len(audio) / SPOKEN_CHARS_PER_S
+
+
+class StubPlayer:
+    """'Plays' a clip by waiting for its length."""
+
+    def __init__(self):
+        self.first_audio = None
+
+    def __call__(self, audio: bytes, interrupt: threading.Event) -> bool:
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter()
+        return not interrupt.wait(clip_seconds(audio))
+
+
+def timed(speak, player: StubPlayer, text: str):
+    player.first_audio = None
+    start = time.perf_counter()
+    speak(text)
+    return player.first_audio - start, time.perf_counter() - start
+
+
+def main():
+    use_pyttsx3 = "--pyttsx3" in sys.argv
+    synthesizer = Pyttsx3Synthesizer() if use_pyttsx3 else StubSynthesizer()
+    print(f"{len(split_sentences(ANSWER))} sentences, {len(ANSWER)} chars, "
+          f"synthesizer: {'pyttsx3' if use_pyttsx3 else 'stub'}\n")
+
+    # Whole answer as one clip, then play it: the old behaviour
+    player = StubPlayer()
+    whole_first, whole_total = timed(lambda text: player(synthesizer(text), threading.Event()), player, ANSWER)
+
+    player = StubPlayer()
+    engine = SpeechEngine(synthesizer, player)
+    piped_first, piped_total = timed(engine.speak, player, ANSWER)
+
+    print(f"{'strategy':<12} {'first audio':>12} {'total':>8}")
+    print(f"{'whole':<12} {whole_first * 1000:>10.0f}ms {whole_total:>7.2f}s")
+    print(f"{'pipelined':<12} {piped_first * 1000:>10.0f}ms {piped_total:>7.2f}s")
+    print(f"\nengine stats: {engine.stats()}")
+
+    if not use_pyttsx3:
+        # Barge-in 0.5 s into the first sentence: nothing else may be synthesized or played
+        interrupt = threading.Event()
+        synthesizer.calls = synthesizer.completed = 0
+        threading.Timer(TTS_OVERHEAD_S + 0.5, interrupt.set).start()
+        start = time.perf_counter()
+        finished = engine.speak(ANSWER, interrupt)
+        stopped_after = time.perf_counter() - start
+        time.sleep(1.0)  # let in-flight synthesis settle
+        print(f"\nbarge-in: finished={finished}, returned after {stopped_after:.2f}s, "
+              f"synthesis started {synthesizer.calls}/{len(split_sentences(ANSWER))}, "
+              f"completed {synthesizer.completed}")
+        assert not finished and stopped_after < 1.5
+        assert synthesizer.calls < len(split_sentences(ANSWER))
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
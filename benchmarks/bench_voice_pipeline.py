@@ -0,0 +1,96 @@
+"""
+Continuous capture pipeline vs the old listen -> recognize -> respond loop, offline.
+A synthetic microphone writes speech-like utterances over room noise into
+the ring buffer in real time, a stub recognizer sleeps like a web STT call
+and a stub graph worker sleeps like a graph run plus spoken answer. The user
+speaks on a fixed schedule, including while Jarvis is still answering.
+The old loop only listens between turns, so those utterances are lost;
+the pipeline keeps capturing and answers them in order.
+
+Usage: python benchmarks/bench_voice_pipeline.py
+"""
+import sys
+import time
+import threading
+from pathlib import Path
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from voice.ring_buffer import RingBuffer
+from voice.capture import UtteranceCapture, VoicePipeline
+from eval_barge_in import noise, speech
+
+RATE = 16000
+BLOCK = 1024
+RECOGNIZE_S = 0.4
+RESPOND_S = 2.0
+# (onset, duration) of each user utterance, seconds from the start
+SCHEDULE = [(0.5, 1.0), (2.5, 0.8), (3.8, 1.2), (7.5, 0.9), (8.8, 0.7)]
+LENGTH_S = 11.0
+
+
+def microphone_audio(rng) -> np.ndarray:
+    signal = noise(LENGTH_S, -50, "room", rng)
+    for onset, duration in SCHEDULE:
+        start = int(onset * RATE)
+        burst = speech(duration, -24, rng)
+        signal[start:start + burst.size] += burst
+    return np.clip(signal * 32767, -32768, 32767).astype(np.int16)
+
+
+def old_loop() -> list:
+    """Onsets the old loop answers: it only hears speech that starts while it is listening."""
+    answered, free_at = [], 0.0
+    for onset, duration in SCHEDULE:
+        if onset < free_at:
+            continue  # spoken while Jarvis was busy: lost
+        # recognizer.listen waits out a 0.8 s pause before returning
+        free_at = onset + duration + 0.8 + RECOGNIZE_S + RESPOND_S
+        answered.append(onset)
+    return answered
+
+
+def main():
+    rng = np.random.default_rng(3)
+    pcm = microphone_audio(rng)
+    ring = RingBuffer(RATE * 20)
+
+    def transcribe(utterance):
+        time.sleep(RECOGNIZE_S)
+        return f"utterance at {utterance.onset - t0:.1f}s ({utterance.seconds:.1f}s of audio)"
+
+    pipeline = VoicePipeline(UtteranceCapture(ring, RATE), transcribe)
+    pipeline.start()
+    t0 = time.time()
+
+    def microphone():
+        for start in range(0, pcm.size, BLOCK):
+            ring.write(pcm[start:start + BLOCK])
+            time.sleep(max(0.0, t0 + (start + BLOCK) / RATE - time.time()))
+
+    mic = threading.Thread(target=microphone, daemon=True)
+    mic.start()
+    answered = []
+    deadline = t0 + LENGTH_S + len(SCHEDULE) * (RECOGNIZE_S + RESPOND_S)
+    while len(answered) < len(SCHEDULE) and time.time() < deadline:
+        text = pipeline.next_text(timeout=0.2)
+        if text is None:
+            continue
+        picked_up = time.time() - t0
+        print(f"  {picked_up:5.1f}s graph <- {text}")
+        answered.append(text)
+        time.sleep(RESPOND_S)  # graph run + spoken answer
+    mic.join()
+    pipeline.stop()
+
+    old = old_loop()
+    print(f"\n{len(SCHEDULE)} utterances spoken")
+    print(f"old loop:  answered {len(old)}, lost {len(SCHEDULE) - len(old)}")
+    print(f"pipeline:  answered {len(answered)}, lost {len(SCHEDULE) - len(answered)}")
+    print(f"\npipeline stats: {pipeline.stats()}")
+
+
+if __name__ == "__main__":
+    main()
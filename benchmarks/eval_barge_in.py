@@ -0,0 +1,191 @@
+"""
+Barge-in detection on WAV fixtures, offline.
+Synthetic recordings are generated first: voiced speech-like bursts (a
+harmonic stack with syllable-rate amplitude modulation) over background
+noise at known onsets, and noise-only recordings (fan hum, hiss, door
+clicks, a loud room). Each file is replayed through the VAD in
+callback-sized blocks and scored on detection latency, missed onsets and
+false triggers, next to the old fixed-threshold detector (L2 norm of a
+1024-sample chunk above 160000).
+
+Real recordings can be added with --dir: any 16-bit WAV with a sibling
+<name>.json holding {"onsets": [seconds, ...]} (an empty list means the
+file must not trigger).
+
+Usage: python benchmarks/eval_barge_in.py [--dir path/to/wavs] [--keep]
+"""
+import sys
+import json
+import time
+import wave
+import tempfile
+from pathlib import Path
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from voice.barge_in import detect_wav, load_wav
+
+RATE = 16000
+# An onset counts as detected if the trigger lands within this window
+MAX_LATENCY_S = 0.5
+OLD_THRESHOLD = 160000
+OLD_CHUNK = 1024
+
+
+def noise(seconds: float, level_db: float, kind: str, rng) -> np.ndarray:
+    n = int(seconds * RATE)
+    if kind == "hiss":
+        signal = rng.standard_normal(n)
+    elif kind == "fan":
+        t = np.arange(n) / RATE
+        signal = np.sin(2 * np.pi * 50 * t) + 0.5 * np.sin(2 * np.pi * 100 * t) + 0.3 * rng.standard_normal(n)
+    else:  # room: low-passed noise
+        signal = np.convolve(rng.standard_normal(n), np.ones(8) / 8, mode="same")
+    signal /= np.sqrt(np.mean(signal ** 2)) + 1e-12
+    return signal * 10 ** (level_db / 20)
+
+
+def speech(seconds: float, level_db: float, rng) -> np.ndarray:
+    """Voiced, speech-like burst: drifting pitch, harmonics, 4 Hz syllables."""
+    n = int(seconds * RATE)
+    t = np.arange(n) / RATE
+    pitch = rng.uniform(100, 220) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / RATE
+    signal = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t - np.pi / 2)
+    signal = signal * syllables
+    signal /= np.sqrt(np.mean(signal ** 2)) + 1e-12
+    return signal * 10 ** (level_db / 20)
+
+
+def clicks(seconds: float, level_db: float, rng) -> np.ndarray:
+    signal = np.zeros(int(seconds * RATE))
+    for at in rng.uniform(0.5, seconds - 0.5, size=4):
+        start = int(at * RATE)
+        signal[start:start + int(0.01 * RATE)] = rng.standard_normal(int(0.01 * RATE)) * 10 ** (level_db / 20)
+    return signal
+
+
+def write_wav(path: Path, signal: np.ndarray, onsets):
+    pcm = np.clip(signal * 32767, -32768, 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(RATE)
+        clip.writeframes(pcm.tobytes())
+    path.with_suffix(".json").write_text(json.dumps({"onsets": onsets}))
+
+
+def make_fixtures(directory: Path, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    cases = [
+        # (name, noise kind, noise dBFS, [(onset, duration, speech dBFS)])
+        ("quiet_room", "room", -55, [(1.5, 1.2, -26), (4.0, 0.8, -30)]),
+        ("fan", "fan", -40, [(2.0, 1.5, -24)]),
+        ("hiss", "hiss", -42, [(1.0, 1.0, -28), (3.5, 1.0, -28)]),
+        ("soft_speaker", "room", -50, [(2.5, 1.0, -36)]),
+        ("loud_room", "room", -30, [(3.0, 1.5, -14)]),
+        ("fan_only", "fan", -38, []),
+        ("hiss_only", "hiss", -30, []),
+        ("loud_room_only", "room", -28, []),
+    ]
+    for name, kind, level, bursts in cases:
+        signal = noise(6.0, level, kind, rng)
+        for onset, duration, speech_db in bursts:
+            start = int(onset * RATE)
+            burst = speech(duration, speech_db, rng)
+            signal[start:start + burst.size] += burst
+        write_wav(directory / f"{name}.wav", signal, [onset for onset, _, _ in bursts])
+    signal = noise(6.0, -50, "room", rng) + clicks(6.0, -10, rng)
+    write_wav(directory / "door_clicks.wav", signal, [])
+
+
+def old_detector(path) -> list:
+    """Trigger times of the fixed L2-norm threshold (re-armed after 1 s)."""
+    samples, rate = load_wav(path)
+    # The old monitor read 1024-sample chunks at 44.1 kHz; keep the same chunk duration
+    chunk = int(OLD_CHUNK * rate / 44100)
+    scale = np.sqrt(OLD_CHUNK / chunk)
+    triggers, last = [], -1.0
+    for start in range(0, samples.size - chunk + 1, chunk):
+        at = (start + chunk) / rate
+        if np.linalg.norm(samples[start:start + chunk].astype(np.float64)) * scale > OLD_THRESHOLD and at - last > 1.0:
+            triggers.append(at)
+            last = at
+    return triggers
+
+
+def score(onsets, triggers):
+    """(latencies of detected onsets, missed onsets, false triggers)."""
+    latencies, matched = [], set()
+    for onset in onsets:
+        hit = next((t for i, t in enumerate(triggers) if i not in matched and onset - 0.05 <= t <= onset + MAX_LATENCY_S), None)
+        if hit is None:
+            continue
+        matched.add(triggers.index(hit))
+        latencies.append(max(0.0, hit - onset))
+    return latencies, len(onsets) - len(latencies), len(triggers) - len(matched)
+
+
+def main():
+    keep = "--keep" in sys.argv
+    directories = []
+    if "--dir" in sys.argv:
+        directories.append(Path(sys.argv[sys.argv.index("--dir") + 1]))
+    tmp = tempfile.TemporaryDirectory()
+    fixtures = Path(tmp.name)
+    make_fixtures(fixtures)
+    directories.insert(0, fixtures)
+
+    totals = {"vad": [[], 0, 0, 0.0], "old": [[], 0, 0, 0.0]}
+    onsets_total = 0
+    audio_s = 0.0
+    print(f"{'file':<18} {'onsets':>6} {'vad ms':>8} {'miss':>5} {'false':>6} {'old ms':>8} {'miss':>5} {'false':>6}")
+    for directory in directories:
+        for path in sorted(directory.glob("*.wav")):
+            label = path.with_suffix(".json")
+            if not label.exists():
+                continue
+            onsets = json.loads(label.read_text())["onsets"]
+            samples, rate = load_wav(path)
+            audio_s += samples.size / rate
+            onsets_total += len(onsets)
+
+            start = time.perf_counter()
+            events = detect_wav(path)
+            vad_cpu = time.perf_counter() - start
+            # The detector fires when the onset is confirmed, not at the estimated onset
+            vad_triggers = [detected for kind, _, detected in events if kind == "start"]
+            start = time.perf_counter()
+            old_triggers = old_detector(path)
+            old_cpu = time.perf_counter() - start
+
+            row = [path.stem, len(onsets)]
+            for name, triggers, cpu in (("vad", vad_triggers, vad_cpu), ("old", old_triggers, old_cpu)):
+                latencies, missed, false = score(onsets, triggers)
+                total = totals[name]
+                total[0].extend(latencies)
+                total[1] += missed
+                total[2] += false
+                total[3] += cpu
+                avg = f"{np.mean(latencies) * 1000:.0f}" if latencies else "-"
+                row += [avg, missed, false]
+            print(f"{row[0]:<18} {row[1]:>6} {row[2]:>8} {row[3]:>5} {row[4]:>6} {row[5]:>8} {row[6]:>5} {row[7]:>6}")
+
+    print(f"\n{onsets_total} onsets, {audio_s:.0f}s of audio")
+    for name, (latencies, missed, false, cpu) in totals.items():
+        avg = np.mean(latencies) * 1000 if latencies else float("nan")
+        print(f"{name:<4} detected {len(latencies)}/{onsets_total}, avg latency {avg:.0f}ms, "
+              f"false triggers {false}, cpu {cpu / audio_s * 100:.2f}% of real time")
+    if keep:
+        kept = Path("barge_in_fixtures")
+        kept.mkdir(exist_ok=True)
+        for path in fixtures.iterdir():
+            (kept / path.name).write_bytes(path.read_bytes())
+        print(f"fixtures kept in {kept}/")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
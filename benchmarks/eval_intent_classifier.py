@@ -0,0 +1,165 @@
+"""
+Offline accuracy / latency evaluation of the zero-LLM intent classifier.
+Scores a held-out labelled set (phrasings not in the seed examples), and
+the logged LLM-router turns when memory/router_turns.jsonl exists (5-fold
+cross-validation). For a range of thresholds it reports fast-path coverage
+(share of turns that skip the LLM) and precision on those turns, plus
+per-turn classification latency. Fast-path filter extraction is checked
+against expected filters, including phrasings that must not become features.
+
+Usage: python benchmarks/eval_intent_classifier.py [turn_log.jsonl]
+"""
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.intent_classifier import (
+    INTENTS, SEED_EXAMPLES, TURN_LOG, DEFAULT_THRESHOLD, IntentClassifier, LogisticIntentModel,
+    extract_search, load_turns, rule_intent, train_classifier,
+)
+from data.car_database import get_vehicle_types, get_brands
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95]
+
+HELD_OUT = [
+    ("hey jarvis", "CHAT"), ("thank you so much", "CHAT"), ("good evening", "CHAT"),
+    ("who are you", "CHAT"), ("that was helpful, cheers", "CHAT"), ("lol okay", "CHAT"),
+    ("what can you do", "CHAT"), ("you're awesome", "CHAT"), ("see you tomorrow", "CHAT"),
+    ("can you tell me something interesting", "CHAT"),
+    ("do you have a 7 seater under 20 lakh", "LOCAL"), ("show me your diesel SUVs", "LOCAL"),
+    ("which electric cars do you have", "LOCAL"), ("cheapest hatchback in stock", "LOCAL"),
+    ("any sedans with sunroof", "LOCAL"), ("what's available under 10 lakh", "LOCAL"),
+    ("do you sell any BMWs", "LOCAL"), ("list automatic SUVs you have", "LOCAL"),
+    ("is the hector in your showroom", "LOCAL"), ("family cars with 6 airbags", "LOCAL"),
+    ("safest car you have", "LOCAL"), ("what mahindra cars do you stock", "LOCAL"),
+    ("do you have cars in the price range 10 to 15 lakh", "LOCAL"), ("best bang for the buck under 20 lakh", "LOCAL"),
+    ("price of the new mahindra xuv 3xo", "WEB"), ("when does the creta ev launch", "WEB"),
+    ("latest news about tata sierra", "WEB"), ("how reliable is the jimny", "WEB"),
+    ("thar roxx review", "WEB"), ("what is the on-road price of a fortuner in delhi", "WEB"),
+    ("upcoming cars in 2025", "WEB"), ("what is the ground clearance of the jimny", "WEB"),
+    ("is the kia carens getting a recall", "WEB"), ("what's the range of the byd atto 3", "WEB"),
+    ("nexon or brezza", "COMPARE"), ("creta vs seltos vs grand vitara", "COMPARE"),
+    ("compare the city with the verna", "COMPARE"), ("which is better, xuv700 or safari", "COMPARE"),
+    ("bmw 3 series versus mercedes c class", "COMPARE"), ("difference between nexon ev and punch ev", "COMPARE"),
+    ("tiago compared to alto", "COMPARE"), ("is the hector better than the harrier", "COMPARE"),
+]
+
+
+# (utterance, filters extract_search must return; unlisted fields must stay empty)
+FILTER_CASES = [
+    ("do you have cars in the price range 10 to 15 lakh", {"budget_max": 1.5e6}),
+    ("best bang for the buck under 20 lakh", {"budget_max": 2e6}),
+    ("cars with sunroof under 20 lakh", {"budget_max": 2e6, "features_all": ["sunroof"]}),
+    ("any sedans with sunroof", {"vehicle_type": "sedan", "features_all": ["sunroof"]}),
+    ("suv that has ventilated seats and a 360 camera under 25 lakh",
+     {"budget_max": 2.5e6, "vehicle_type": "suv", "features_all": ["ventilated_seats", "camera_360"]}),
+    ("family cars with 6 airbags", {"airbags_min": 6}),
+    ("show me your diesel SUVs", {"vehicle_type": "suv", "fuel_type": "diesel"}),
+    ("what's the best car for a long range highway drive", {}),
+    ("a car that sounds like a bang on budget", {}),
+]
+
+
+def check_filters() -> int:
+    """Prints each mismatch; returns the number of cases extracted exactly."""
+    types, brands = get_vehicle_types(), get_brands()
+    passed = 0
+    for text, expected in FILTER_CASES:
+        got = extract_search(text, types, brands).model_dump(exclude_none=True, exclude_defaults=True)
+        if got == expected:
+            passed += 1
+        else:
+            print(f"  MISMATCH '{text}': got {got}, expected {expected}")
+    print(f"Filter extraction: {passed}/{len(FILTER_CASES)} exact\n")
+    return passed
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def sweep(classifier: IntentClassifier, examples):
+    """(threshold, coverage, fast-path precision) rows plus overall top-1 accuracy."""
+    predictions = [classifier.predict(text) for text, _ in examples]
+    accuracy = sum(p[0] == gold for p, (_, gold) in zip(predictions, examples)) / len(examples)
+    rows = []
+    for threshold in THRESHOLDS:
+        taken = [(p[0], gold) for p, (_, gold) in zip(predictions, examples) if p[1] >= threshold]
+        precision = sum(a == b for a, b in taken) / len(taken) if taken else float("nan")
+        rows.append((threshold, len(taken) / len(examples), precision))
+    return accuracy, rows
+
+
+def report(title: str, classifier: IntentClassifier, examples):
+    accuracy, rows = sweep(classifier, examples)
+    rules_only = sum(rule_intent(text) == gold for text, gold in examples) / len(examples)
+    print(f"{title}: {len(examples)} turns, top-1 accuracy {accuracy:.1%} (rules alone {rules_only:.1%})")
+    print(f"  {'threshold':>9} {'fast path':>10} {'precision':>10}")
+    for threshold, coverage, precision in rows:
+        marker = "  <- default" if threshold == DEFAULT_THRESHOLD else ""
+        print(f"  {threshold:>9.2f} {coverage:>10.1%} {precision:>10.1%}{marker}")
+    print()
+
+
+def cross_validate(turns, folds: int = 5):
+    """Per-fold classifiers trained on seeds + the other folds, pooled predictions."""
+    rng = random.Random(5)
+    turns = turns[:]
+    rng.shuffle(turns)
+    pooled = []
+    for k in range(folds):
+        test = turns[k::folds]
+        train = [t for i, t in enumerate(turns) if i % folds != k]
+        classifier = IntentClassifier(LogisticIntentModel().fit(SEED_EXAMPLES + train))
+        pooled.extend((classifier, example) for example in test)
+    return pooled
+
+
+def main():
+    log_path = Path(sys.argv[1]) if len(sys.argv) > 1 else TURN_LOG
+
+    start = time.perf_counter()
+    classifier = train_classifier(SEED_EXAMPLES)
+    print(f"Trained on {len(SEED_EXAMPLES)} seed examples in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+    report("Held-out set", classifier, HELD_OUT)
+
+    per_intent = {intent: [ex for ex in HELD_OUT if ex[1] == intent] for intent in INTENTS}
+    for intent, examples in per_intent.items():
+        correct = sum(classifier.predict(text)[0] == intent for text, _ in examples)
+        print(f"  {intent:<8} {correct}/{len(examples)}")
+    print()
+
+    filters_ok = check_filters() == len(FILTER_CASES)
+
+    turns = load_turns(log_path)
+    if len(turns) >= 20:
+        pooled = cross_validate(turns)
+        predictions = [(c.predict(text), gold) for c, (text, gold) in pooled]
+        accuracy = sum(p[0] == gold for p, gold in predictions) / len(predictions)
+        print(f"Logged turns ({log_path.name}): {len(turns)} turns, 5-fold accuracy {accuracy:.1%}")
+        for threshold in THRESHOLDS:
+            taken = [(p[0], gold) for p, gold in predictions if p[1] >= threshold]
+            precision = sum(a == b for a, b in taken) / len(taken) if taken else float("nan")
+            print(f"  {threshold:>9.2f} {len(taken) / len(predictions):>10.1%} {precision:>10.1%}")
+        print()
+    else:
+        print(f"Logged turns: {len(turns)} in {log_path} (need 20 for cross-validation)\n")
+
+    latencies = []
+    texts = [text for text, _ in HELD_OUT] * 25
+    for text in texts:
+        start = time.perf_counter()
+        classifier.predict(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    print(f"Latency over {len(texts)} turns: p50 {percentile(latencies, 50):.0f} us, "
+          f"p99 {percentile(latencies, 99):.0f} us")
+    if not filters_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
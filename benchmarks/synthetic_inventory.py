@@ -0,0 +1,32 @@
+"""
+Synthetic catalogs for benchmarks.
+Scales CAR_INVENTORY up to N rows by cloning the base cars with jittered
+prices and fresh vehicle_ids.
+"""
+import sys
+from pathlib import Path
+from typing import List, Dict, Any
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.car_database import CAR_INVENTORY
+
+
+def make_inventory(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Return `n` vehicle dicts shaped like CAR_INVENTORY."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, len(CAR_INVENTORY), size=n)
+    jitter = rng.uniform(0.85, 1.15, size=n)
+    stock = rng.choice(["available", "limited", "sold_out"], size=n, p=[0.8, 0.15, 0.05])
+
+    records = []
+    for i in range(n):
+        car = CAR_INVENTORY[base[i]]
+        records.append(dict(
+            car,
+            vehicle_id=f"SYN{i:07d}",
+            price=round(car["price"] * float(jitter[i]), -3),
+            stock_status=str(stock[i]),
+        ))
+    return records
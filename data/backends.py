@@ -0,0 +1,394 @@
+"""
+Inventory backends.
+Every backend loads the catalog into an InventoryStore and serves the same
+search_inventory / get_vehicle_by_id / facet API on top of it.
+
+  memory   - a list of vehicle dicts (the CAR_INVENTORY literal by default)
+  sqlite   - a `vehicles` table in a SQLite file
+  parquet  - a Parquet file (pandas + pyarrow)
+  mmap     - a directory of .npy columns and a row blob, memory-mapped
+             read-only so several worker processes share the same pages
+"""
+import json
+import mmap
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+import numpy as np
+from schema import VehicleSpecs, InventoryPage
+from data.inventory_store import InventoryStore, ColumnBuilder, CATEGORICAL_COLUMNS
+from data.rows import VehicleRow, FIELDS, LIST_FIELDS
+
+MMAP_FORMAT_VERSION = 1
+
+
+# Rebuild the store once this share of its rows are tombstones
+COMPACT_RATIO = 0.25
+
+
+class InventoryBackend:
+    """
+    Base class: subclasses only implement _open().
+    Reads go through an immutable store snapshot; writes build a new
+    snapshot and swap the reference, so the read path takes no lock.
+    """
+    name = "base"
+
+    def __init__(self):
+        self._store: Optional[InventoryStore] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _open(self) -> InventoryStore:
+        raise NotImplementedError
+
+    @property
+    def store(self) -> InventoryStore:
+        """The loaded store (opened on first use)."""
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._open()
+        return self._store
+
+    @property
+    def version(self) -> int:
+        """Inventory version; bumped by every write."""
+        return self.store.version
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Every vehicle as a raw dict, in row order."""
+        store = self.store
+        for i in store.live_rows():
+            yield store.record(int(i))
+
+    # ------------------------------------------
+    # Shared query API
+    # ------------------------------------------
+    def search_inventory(self, sort_by=None, limit: int = None, **filters) -> List[VehicleSpecs]:
+        return self.store.search(sort_by=sort_by, limit=limit, **filters)
+
+    def iter_inventory(self, sort_by=None, **filters) -> Iterator[VehicleSpecs]:
+        store = self.store
+        return store.iter_rows(store.rank(store.select(**filters), sort_by))
+
+    def search_page(self, limit: int = 10, cursor: str = None, sort_by=None, **filters) -> InventoryPage:
+        """
+        One page of results plus the total match count.
+        Price order (or no sort_by) pages by keyset on (price, vehicle_id);
+        other sort keys page by offset. `cursor` is the previous page's next_cursor.
+        """
+        store = self.store
+        rows = store.select(**filters)
+        total = int(rows.size)
+
+        if not sort_by or sort_by == "price":
+            after = None
+            if cursor:
+                price, _, vehicle_id = cursor[2:].partition(":")
+                after = (float(price), vehicle_id)
+            # one extra row tells us whether another page exists
+            page = store.keyset_page(rows, limit + 1, after)
+            next_cursor = None
+            if page.size > limit:
+                page = page[:limit]
+                last = page[-1:]
+                next_cursor = f"k:{float(store.numeric['price'][last[0]])!r}:{store.ids_at(last)[0]}"
+        else:
+            offset = int(cursor[2:]) if cursor else 0
+            page = store.rank(rows, sort_by, offset + limit)[offset:]
+            next_cursor = f"o:{offset + limit}" if offset + limit < total else None
+
+        return InventoryPage(items=store.rows(page), total=total, next_cursor=next_cursor)
+
+    def match_vehicle_ids(self, **filters) -> List[str]:
+        store = self.store
+        return store.ids_at(store.select(**filters))
+
+    def get_vehicle_by_id(self, vehicle_id: str) -> Optional[VehicleSpecs]:
+        store = self.store
+        row = store.find_row(vehicle_id)
+        return None if row is None else store.row(row)
+
+    def get_all_vehicles(self) -> List[VehicleSpecs]:
+        store = self.store
+        return store.rows(store.live_rows())
+
+    def get_vehicle_types(self) -> List[str]:
+        return self.store.labels("type")
+
+    def get_brands(self) -> List[str]:
+        return self.store.labels("brand")
+
+    def get_price_range(self) -> Dict[str, float]:
+        return self.store.price_range()
+
+    def get_feature_tags(self) -> List[str]:
+        return list(self.store.feature_vocab)
+
+    def get_facets(self) -> Dict[str, Any]:
+        return self.store.facets.as_dict()
+
+    def count_inventory(self, budget_max: float = None, vehicle_type: str = None) -> int:
+        facets = self.store.facets
+        if budget_max:
+            return facets.count_under(budget_max, vehicle_type)
+        if vehicle_type:
+            return facets.counts["type"].get(vehicle_type, 0)
+        return facets.total
+
+    def summarize_inventory(self) -> str:
+        return self.store.facets.summary_text()
+
+    # ------------------------------------------
+    # Write path (in-memory; the source file is not modified)
+    # ------------------------------------------
+    def _commit(self, upserts: List[Dict[str, Any]] = (), deletes: List[str] = ()) -> int:
+        with self._write_lock:
+            store = self.store.apply(upserts, deletes)
+            if store.dead > store.size * COMPACT_RATIO:
+                store = store.compacted()
+            self._store = store
+            return store.version
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace vehicles (validated against VehicleSpecs). Returns the new version."""
+        return self._commit(upserts=[VehicleSpecs(**car).model_dump() for car in records])
+
+    def delete(self, vehicle_ids: Iterable[str]) -> int:
+        """Remove vehicles by id. Returns the new version."""
+        return self._commit(deletes=list(vehicle_ids))
+
+    def patch(self, vehicle_id: str, **fields) -> int:
+        """Change some fields of one vehicle. Returns the new version."""
+        with self._write_lock:
+            store = self.store
+            row = store.find_row(vehicle_id)
+            if row is None:
+                raise KeyError(f"Unknown vehicle_id '{vehicle_id}'")
+            record = VehicleSpecs(**{**store.record(row), **fields}).model_dump()
+            self._store = store.apply(upserts=[record])
+            return self._store.version
+
+
+# ==========================================
+# MEMORY (default)
+# ==========================================
+class MemoryBackend(InventoryBackend):
+    name = "memory"
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        super().__init__()
+        self.records = records
+
+    def _open(self) -> InventoryStore:
+        return InventoryStore.from_records(self.records)
+
+
+# ==========================================
+# SQLITE
+# ==========================================
+class SQLiteBackend(InventoryBackend):
+    """
+    Reads a `vehicles` table once to build the columns; rows are fetched
+    back from SQLite by rowid only when they are returned.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str, table: str = "vehicles"):
+        super().__init__()
+        self.path = str(path)
+        self.table = table
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+
+    def _decode(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = {name: row[name] for name in FIELDS}
+        for name in LIST_FIELDS:
+            record[name] = json.loads(record[name] or "[]")
+        return record
+
+    def _open(self) -> InventoryStore:
+        self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        builder, rowids = ColumnBuilder(), []
+        cursor = self._conn.execute(f"SELECT rowid AS _rowid, * FROM {self.table} ORDER BY rowid")
+        for row in cursor:
+            builder.add(self._decode(row))
+            rowids.append(row["_rowid"])
+        self._rowids = np.array(rowids, dtype=np.int64)
+
+        return InventoryStore(builder.finish(), self._fetch_row)
+
+    def _fetch_row(self, index: int) -> VehicleRow:
+        with self._conn_lock:
+            row = self._conn.execute(
+                f"SELECT * FROM {self.table} WHERE rowid = ?", (int(self._rowids[index]),)
+            ).fetchone()
+        return VehicleRow.from_record(self._decode(row))
+
+
+def write_sqlite(records: Iterable[Dict[str, Any]], path: str, table: str = "vehicles"):
+    """Write vehicle dicts into a SQLite table usable by SQLiteBackend."""
+    records = (VehicleSpecs(**car).model_dump() for car in records)
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"CREATE TABLE {table} ({', '.join(FIELDS)})")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_id ON {table}(vehicle_id)")
+        placeholders = ", ".join("?" for _ in FIELDS)
+        conn.executemany(
+            f"INSERT INTO {table} VALUES ({placeholders})",
+            (tuple(json.dumps(car.get(name, [])) if name in LIST_FIELDS else car.get(name)
+                   for name in FIELDS) for car in records),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ==========================================
+# PARQUET
+# ==========================================
+class ParquetBackend(InventoryBackend):
+    """Loads a Parquet file with pandas; list fields are native list columns."""
+    name = "parquet"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = str(path)
+
+    def _open(self) -> InventoryStore:
+        import pandas as pd
+
+        self._frame = pd.read_parquet(self.path, columns=FIELDS)
+        builder = ColumnBuilder()
+        for values in self._frame.itertuples(index=False, name=None):
+            builder.add(dict(zip(FIELDS, values)))
+        return InventoryStore(builder.finish(), self._fetch_row)
+
+    def _fetch_row(self, index: int) -> VehicleRow:
+        record = {name: value.item() if isinstance(value, np.generic) else value
+                  for name, value in self._frame.iloc[index].to_dict().items()}
+        if record.get("safety_rating") != record.get("safety_rating"):
+            record["safety_rating"] = None    # NaN -> None
+        return VehicleRow.from_record(record)
+
+
+def write_parquet(records: Iterable[Dict[str, Any]], path: str):
+    """Write vehicle dicts to a Parquet file usable by ParquetBackend."""
+    import pandas as pd
+
+    frame = pd.DataFrame([VehicleSpecs(**car).model_dump() for car in records], columns=FIELDS)
+    frame.to_parquet(str(path), index=False)
+
+
+# ==========================================
+# MEMORY-MAPPED COLUMNS
+# ==========================================
+class MmapBackend(InventoryBackend):
+    """
+    Opens a directory written by write_mmap(). Columns, indexes and the
+    row blob are mapped read-only, so startup does no parsing and every
+    process using the same directory shares the page cache.
+    """
+    name = "mmap"
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = Path(directory)
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(self.directory / f"{name}.npy", mmap_mode="r")
+
+    def _open(self) -> InventoryStore:
+        with open(self.directory / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != MMAP_FORMAT_VERSION:
+            raise ValueError(f"Unsupported inventory format in {self.directory}")
+
+        columns = {
+            "numeric": {name: self._load(f"numeric_{name}") for name in meta["numeric"]},
+            "codes": {name: self._load(f"codes_{name}") for name in CATEGORICAL_COLUMNS},
+            "vocab": meta["vocab"],
+            "vehicle_ids": self._load("vehicle_ids"),
+            "feature_bits": self._load("feature_bits"),
+            "feature_vocab": meta["feature_vocab"],
+        }
+        indexes = {name: self._load(f"index_{name}") for name in meta["indexes"]}
+
+        self._offsets = self._load("row_offsets")
+        with open(self.directory / "rows.bin", "rb") as f:
+            self._rows = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._offsets[-1] else b""
+
+        return InventoryStore(columns, self._fetch_row, indexes)
+
+    def _fetch_row(self, index: int) -> VehicleRow:
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return VehicleRow.from_record(json.loads(self._rows[start:end]))
+
+
+def write_mmap(records: Iterable[Dict[str, Any]], directory: str):
+    """Write vehicle dicts as a memory-mappable column directory for MmapBackend."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    builder, offsets = ColumnBuilder(), [0]
+    with open(directory / "rows.bin", "wb") as blob:
+        for car in records:
+            car = VehicleSpecs(**car).model_dump()
+            builder.add(car)
+            offsets.append(offsets[-1] + blob.write(json.dumps(car).encode("utf-8")))
+
+    columns = builder.finish()
+    columns["vehicle_ids"] = np.array([vid.encode("utf-8") for vid in columns["vehicle_ids"]])
+    store = InventoryStore(columns, fetch_row=None)
+
+    for name, values in columns["numeric"].items():
+        np.save(directory / f"numeric_{name}.npy", values)
+    for name, values in columns["codes"].items():
+        np.save(directory / f"codes_{name}.npy", values)
+    np.save(directory / "vehicle_ids.npy", columns["vehicle_ids"])
+    np.save(directory / "feature_bits.npy", columns["feature_bits"])
+    np.save(directory / "row_offsets.npy", np.array(offsets, dtype=np.int64))
+    indexes = store.export_indexes()
+    for name, values in indexes.items():
+        np.save(directory / f"index_{name}.npy", values)
+
+    meta = {
+        "format": MMAP_FORMAT_VERSION,
+        "size": store.size,
+        "numeric": list(columns["numeric"]),
+        "vocab": columns["vocab"],
+        "feature_vocab": columns["feature_vocab"],
+        "indexes": list(indexes),
+    }
+    with open(directory / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+# ==========================================
+# SELECTION
+# ==========================================
+BACKENDS = {
+    "sqlite": SQLiteBackend,
+    "parquet": ParquetBackend,
+    "mmap": MmapBackend,
+}
+
+
+def open_backend(url: str, records: List[Dict[str, Any]] = None) -> InventoryBackend:
+    """
+    Backend for "memory" (serves `records`) or "<scheme>://<path>" with
+    scheme sqlite, parquet or mmap. Everything after "://" is the path, so
+    "sqlite://data/cars.db" is relative to the working directory and
+    "sqlite:///srv/cars.db" (three slashes) is the absolute /srv/cars.db.
+    """
+    if not url or url == "memory":
+        return MemoryBackend(records or [])
+    scheme, sep, path = url.partition("://")
+    if not sep or scheme not in BACKENDS:
+        raise ValueError(f"Unknown inventory backend '{url}'. Use memory, {', '.join(BACKENDS)}.")
+    return BACKENDS[scheme](path)
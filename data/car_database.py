@@ -1,9 +1,16 @@
 """
 Car inventory database with realistic Indian market vehicles.
 Includes detailed specs, pricing, and features.
+
+The literal below is the default in-memory backend; set CARASTRA_INVENTORY
+to "sqlite://path.db", "parquet://path.parquet" or "mmap://dir" (relative
+paths; "sqlite:///abs/path.db" is absolute) to serve a large catalog from
+data/backends.py instead.
 """
-from typing import List, Dict, Any
-from schema import VehicleSpecs
+import os
+from typing import List, Dict, Any, Iterator
+from schema import VehicleSpecs, InventoryPage
+from data.backends import InventoryBackend, open_backend
 
 
 # Comprehensive car inventory
@@ -336,18 +343,59 @@ CAR_INVENTORY = [
     }
 ]
 
+# Active inventory backend (columnar store + indexes)
+_BACKEND: InventoryBackend = open_backend(os.getenv("CARASTRA_INVENTORY", "memory"), CAR_INVENTORY)
+
+
+def get_inventory_backend() -> InventoryBackend:
+    """Get the backend serving inventory queries."""
+    return _BACKEND
+
+
+def set_inventory_backend(backend: InventoryBackend):
+    """Swap the backend serving inventory queries."""
+    global _BACKEND
+    _BACKEND = backend
+
+
+def get_inventory_version() -> int:
+    """Current inventory version; downstream caches can key on it."""
+    return _BACKEND.version
+
+
+def upsert_vehicle(car: Dict[str, Any]) -> int:
+    """Add a vehicle or replace it by vehicle_id. Returns the new inventory version."""
+    return _BACKEND.upsert([car])
+
+
+def delete_vehicle(vehicle_id: str) -> int:
+    """Remove a vehicle. Returns the new inventory version."""
+    return _BACKEND.delete([vehicle_id])
+
+
+def patch_vehicle(vehicle_id: str, **fields) -> int:
+    """Update fields of a vehicle (price, colors_available, ...). Returns the new inventory version."""
+    return _BACKEND.patch(vehicle_id, **fields)
+
+
+def patch_stock_status(vehicle_id: str, stock_status: str) -> int:
+    """Update the stock status of a vehicle. Returns the new inventory version."""
+    return _BACKEND.patch(vehicle_id, stock_status=stock_status)
+
+
+def iter_inventory_records() -> Iterator[Dict[str, Any]]:
+    """Every vehicle in the active backend as a raw dict."""
+    return _BACKEND.iter_records()
+
 
 def get_all_vehicles() -> List[VehicleSpecs]:
     """Get all vehicles from inventory as VehicleSpecs objects."""
-    return [VehicleSpecs(**car) for car in CAR_INVENTORY]
+    return _BACKEND.get_all_vehicles()
 
 
 def get_vehicle_by_id(vehicle_id: str) -> VehicleSpecs:
     """Get specific vehicle by ID."""
-    for car in CAR_INVENTORY:
-        if car["vehicle_id"] == vehicle_id:
-            return VehicleSpecs(**car)
-    return None
+    return _BACKEND.get_vehicle_by_id(vehicle_id)
 
 
 def search_inventory(
@@ -355,44 +403,88 @@ def search_inventory(
     vehicle_type: str = None,
     fuel_type: str = None,
     seating_min: int = None,
-    brand: str = None
+    brand: str = None,
+    features_all: List[str] = None,
+    features_any: List[str] = None,
+    features_none: List[str] = None,
+    airbags_min: int = None,
+    sort_by: str = None,
+    limit: int = None
 ) -> List[VehicleSpecs]:
-    """Search inventory with filters."""
-    results = []
-    
-    for car in CAR_INVENTORY:
-        # Apply filters
-        if budget_max and car["price"] > budget_max:
-            continue
-        
-        if vehicle_type and car["type"] != vehicle_type:
-            continue
-        
-        if fuel_type and car["fuel_type"] != fuel_type:
-            continue
-        
-        if seating_min and car["seating"] < seating_min:
-            continue
-        
-        if brand and car["brand"].lower() != brand.lower():
-            continue
-        
-        results.append(VehicleSpecs(**car))
-    
-    return results
+    """
+    Search inventory with filters (evaluated as column masks).
+    Feature filters take free text ("Sunroof", "ADAS", "6 airbags") that is
+    normalized to canonical tags and matched against the feature bitmap.
+    `sort_by` ranks the matches by price, mileage, safety_rating or power
+    ("-price" flips the direction, "safety_rating:0.7,price:0.3" blends keys);
+    `limit` keeps only the top results.
+    """
+    return _BACKEND.search_inventory(
+        budget_max=budget_max,
+        vehicle_type=vehicle_type,
+        fuel_type=fuel_type,
+        seating_min=seating_min,
+        brand=brand,
+        features_all=features_all,
+        features_any=features_any,
+        features_none=features_none,
+        airbags_min=airbags_min,
+        sort_by=sort_by,
+        limit=limit
+    )
+
+
+def iter_inventory(sort_by: str = None, **filters) -> Iterator[VehicleSpecs]:
+    """
+    Lazily yield matches of the search_inventory filters in `sort_by` order.
+    Rows are only built as the caller consumes them.
+    """
+    return _BACKEND.iter_inventory(sort_by=sort_by, **filters)
+
+
+def search_inventory_page(limit: int = 10, cursor: str = None, sort_by: str = None, **filters) -> InventoryPage:
+    """
+    One page of search_inventory results with the total match count.
+    Pass the returned `next_cursor` back in to get the following page.
+    """
+    return _BACKEND.search_page(limit=limit, cursor=cursor, sort_by=sort_by, **filters)
+
+
+def match_vehicle_ids(**filters) -> List[str]:
+    """vehicle_ids matching the search_inventory filters, without building rows."""
+    return _BACKEND.match_vehicle_ids(**filters)
 
 
 def get_vehicle_types() -> List[str]:
     """Get unique vehicle types."""
-    return list(set(car["type"] for car in CAR_INVENTORY))
+    return _BACKEND.get_vehicle_types()
 
 
 def get_brands() -> List[str]:
     """Get unique brands."""
-    return list(set(car["brand"] for car in CAR_INVENTORY))
+    return _BACKEND.get_brands()
+
+
+def get_feature_tags() -> List[str]:
+    """Get the canonical feature tags present in the inventory."""
+    return _BACKEND.get_feature_tags()
+
+
+def get_facets() -> Dict[str, Any]:
+    """Get precomputed counts, histograms and per-segment price ranges."""
+    return _BACKEND.get_facets()
+
+
+def count_inventory(budget_max: float = None, vehicle_type: str = None) -> int:
+    """Count cars by type and/or budget from cached aggregates."""
+    return _BACKEND.count_inventory(budget_max=budget_max, vehicle_type=vehicle_type)
+
+
+def summarize_inventory() -> str:
+    """Short text overview of the catalog for the LLM."""
+    return _BACKEND.summarize_inventory()
 
 
 def get_price_range() -> Dict[str, float]:
     """Get min and max prices."""
-    prices = [car["price"] for car in CAR_INVENTORY]
-    return {"min": min(prices), "max": max(prices)}
\ No newline at end of file
+    return _BACKEND.get_price_range()
\ No newline at end of file
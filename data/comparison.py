@@ -0,0 +1,109 @@
+"""
+Local comparison engine.
+Resolves car names to inventory rows and diffs their specs without any
+network call: price delta, power/torque parsed to numbers, mileage, safety
+and feature differences. Names that are not in the catalog are handed back
+so the caller can fall back to a web search for just those cars.
+"""
+import math
+from typing import List, Dict, Optional, Tuple
+from schema import ComparisonRequest, VehicleComparison, VehicleSpecs
+from data.car_database import get_vehicle_by_id
+from data.name_resolver import get_name_resolver
+from data.features import normalize_feature
+from data.inventory_store import parse_quantity, POWER_UNITS
+
+TORQUE_UNITS = {"nm": 1.0, "kgm": 9.807}
+
+# Stricter than the resolver default: a wrong match hides the real car from the web search
+RESOLVE_MIN_SCORE = 0.8
+
+# metric -> True if higher is better
+METRICS = {
+    "price": False,
+    "power_bhp": True,
+    "torque_nm": True,
+    "mileage": True,
+    "safety_rating": True,
+    "engine_cc": True,
+    "seating": True,
+    "warranty_years": True,
+}
+
+
+def resolve_vehicle(name: str) -> Optional[str]:
+    """vehicle_id for a spoken or typed car name ("City", "Nexon E V", "kreta"), or None."""
+    return get_name_resolver().resolve_one(name, min_score=RESOLVE_MIN_SCORE)
+
+
+def resolve_comparison(names: List[str]) -> Tuple[ComparisonRequest, List[str]]:
+    """Split requested names into a ComparisonRequest for cars in stock and the unresolved names."""
+    vehicle_ids, unresolved = [], []
+    for name in names:
+        vehicle_id = resolve_vehicle(name)
+        if vehicle_id is None:
+            unresolved.append(name)
+        elif vehicle_id not in vehicle_ids:
+            vehicle_ids.append(vehicle_id)
+    return ComparisonRequest(vehicle_ids=vehicle_ids), unresolved
+
+
+def _metric_values(car: VehicleSpecs) -> Dict[str, Optional[float]]:
+    values = {
+        "price": car.price,
+        "power_bhp": parse_quantity(car.power, POWER_UNITS),
+        "torque_nm": parse_quantity(car.torque, TORQUE_UNITS),
+        "mileage": car.mileage or None,  # 0 for EVs
+        "safety_rating": car.safety_rating,
+        "engine_cc": car.engine_cc or None,  # 0 for EVs
+        "seating": car.seating,
+        "warranty_years": car.warranty_years,
+    }
+    return {k: None if v is None or math.isnan(v) else float(v) for k, v in values.items()}
+
+
+def compare_vehicles(request: ComparisonRequest) -> VehicleComparison:
+    """Structured spec diff of the requested inventory vehicles."""
+    cars = [car for car in (get_vehicle_by_id(vid) for vid in request.vehicle_ids) if car is not None]
+    values = [_metric_values(car) for car in cars]
+
+    metrics = {name: [v[name] for v in values] for name in METRICS}
+    best = {}
+    for name, higher in METRICS.items():
+        known = [(value, car.vehicle_id) for value, car in zip(metrics[name], cars) if value is not None]
+        if len(known) > 1 and len({value for value, _ in known}) > 1:
+            best[name] = (max if higher else min)(known)[1]
+
+    cheapest = min((car.price for car in cars), default=0.0)
+    tags = [list(dict.fromkeys(tag for feature in car.features for tag in normalize_feature(feature))) for car in cars]
+    common = [tag for tag in tags[0] if all(tag in other for other in tags[1:])] if tags else []
+
+    return VehicleComparison(
+        vehicles=cars,
+        metrics=metrics,
+        best=best,
+        price_delta={car.vehicle_id: car.price - cheapest for car in cars},
+        common_features=common,
+        unique_features={car.vehicle_id: [tag for tag in own if tag not in common] for car, own in zip(cars, tags)},
+    )
+
+
+def format_comparison(comparison: VehicleComparison) -> str:
+    """Compact text rendering of a comparison for the LLM."""
+    names = {car.vehicle_id: car.name for car in comparison.vehicles}
+    title = "LOCAL STOCK COMPARISON: " if len(names) > 1 else "LOCAL STOCK: "
+    lines = [title + " vs ".join(names.values())]
+    for car, delta in zip(comparison.vehicles, comparison.price_delta.values()):
+        extra = f" (+₹{delta:,.0f})" if delta else " (cheapest)"
+        mileage = f"{car.mileage} kmpl" if car.mileage else "mileage n/a"
+        safety = car.safety_rating if car.safety_rating is not None else "n/a"
+        lines.append(f"- {car.name}: ₹{car.price:,.0f}{extra}, {car.power}, {car.torque}, {mileage}, safety {safety}")
+    if comparison.best:
+        lines.append("Best: " + "; ".join(f"{metric.replace('_', ' ')} {names[vid]}"
+                                          for metric, vid in comparison.best.items()))
+    if len(comparison.vehicles) > 1 and comparison.common_features:
+        lines.append("Common features: " + ", ".join(tag.replace("_", " ") for tag in comparison.common_features))
+    for vid, tags in comparison.unique_features.items():
+        if tags and len(comparison.vehicles) > 1:
+            lines.append(f"Only {names[vid]}: " + ", ".join(tag.replace("_", " ") for tag in tags))
+    return "\n".join(lines)
@@ -0,0 +1,154 @@
+"""
+Precomputed inventory aggregates.
+Counts per brand / type / fuel / transmission / stock status, price and
+safety-rating histograms and per-segment price ranges. Built once when a
+store loads and updated row by row as the inventory changes, so questions
+like "what SUVs do you have under 15 lakh" never touch the rows.
+"""
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+# Histogram bin edges
+PRICE_BINS_LAKH = [0, 5, 8, 10, 15, 20, 30, 50, 100, float("inf")]
+SAFETY_BINS = [0, 1, 2, 3, 3.5, 4, 4.5, 5, float("inf")]
+
+# Columns with per-label counts
+COUNT_COLUMNS = ("brand", "type", "fuel_type", "transmission", "stock_status")
+
+LAKH = 100000
+
+
+def _format_lakh(price: float) -> str:
+    return f"₹{price / LAKH:.1f} lakh"
+
+
+class InventoryFacets:
+    """Aggregates over the live rows of one store snapshot."""
+
+    def __init__(self):
+        self.total = 0
+        self.counts: Dict[str, Dict[str, int]] = {name: {} for name in COUNT_COLUMNS}
+        self.price_hist = np.zeros(len(PRICE_BINS_LAKH) - 1, dtype=np.int64)
+        self.safety_hist = np.zeros(len(SAFETY_BINS) - 1, dtype=np.int64)
+        self.safety_unknown = 0
+        # Sorted prices per vehicle type, for min / max / count-under-budget
+        self.segment_prices: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, store) -> "InventoryFacets":
+        """Vectorized build from a store's columns and inverted indexes."""
+        facets = cls()
+        rows = store.live_rows()
+        facets.total = int(rows.size)
+        for name in COUNT_COLUMNS:
+            facets.counts[name] = {label: int(postings.size)
+                                   for label, postings in zip(store.vocab[name], store.postings[name])
+                                   if postings.size}
+
+        prices = store.numeric["price"][rows]
+        facets.price_hist = np.histogram(prices / LAKH, bins=PRICE_BINS_LAKH)[0].astype(np.int64)
+
+        safety = store.numeric["safety_rating"][rows]
+        known = ~np.isnan(safety)
+        facets.safety_hist = np.histogram(safety[known], bins=SAFETY_BINS)[0].astype(np.int64)
+        facets.safety_unknown = int((~known).sum())
+
+        for label, postings in zip(store.vocab["type"], store.postings["type"]):
+            if postings.size:
+                facets.segment_prices[label] = np.sort(store.numeric["price"][postings])
+        return facets
+
+    def copy(self) -> "InventoryFacets":
+        """Copy for a new snapshot (segment arrays are replaced, never edited, so they are shared)."""
+        new = InventoryFacets()
+        new.total = self.total
+        new.counts = {name: dict(counts) for name, counts in self.counts.items()}
+        new.price_hist = self.price_hist.copy()
+        new.safety_hist = self.safety_hist.copy()
+        new.safety_unknown = self.safety_unknown
+        new.segment_prices = dict(self.segment_prices)
+        return new
+
+    # ------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------
+    def update(self, labels: Dict[str, str], price: float, safety: Optional[float], delta: int):
+        """Add (delta=+1) or remove (delta=-1) one row."""
+        self.total += delta
+        for name in COUNT_COLUMNS:
+            counts = self.counts[name]
+            counts[labels[name]] = counts.get(labels[name], 0) + delta
+            if counts[labels[name]] <= 0:
+                del counts[labels[name]]
+
+        self.price_hist[self._bin(PRICE_BINS_LAKH, price / LAKH)] += delta
+        if safety is None or np.isnan(safety):
+            self.safety_unknown += delta
+        else:
+            self.safety_hist[self._bin(SAFETY_BINS, safety)] += delta
+
+        segment = labels["type"]
+        prices = self.segment_prices.get(segment, np.empty(0, dtype=np.float64))
+        if delta > 0:
+            prices = np.insert(prices, np.searchsorted(prices, price), price)
+        else:
+            prices = np.delete(prices, np.searchsorted(prices, price))
+        if prices.size:
+            self.segment_prices[segment] = prices
+        else:
+            self.segment_prices.pop(segment, None)
+
+    @staticmethod
+    def _bin(edges: List[float], value: float) -> int:
+        return min(max(int(np.searchsorted(edges, value, side="right")) - 1, 0), len(edges) - 2)
+
+    # ------------------------------------------
+    # Queries
+    # ------------------------------------------
+    def count_under(self, budget_max: float, vehicle_type: str = None) -> int:
+        """How many cars (optionally of one type) cost at most `budget_max`."""
+        segments = [vehicle_type] if vehicle_type else list(self.segment_prices)
+        return sum(int(np.searchsorted(self.segment_prices[s], budget_max, side="right"))
+                   for s in segments if s in self.segment_prices)
+
+    def segments(self) -> Dict[str, Dict[str, float]]:
+        """Per vehicle type: count, min and max price."""
+        return {segment: {"count": int(prices.size), "min": float(prices[0]), "max": float(prices[-1])}
+                for segment, prices in self.segment_prices.items()}
+
+    def histograms(self) -> Dict[str, List[Dict[str, Any]]]:
+        def rows(edges, counts):
+            return [{"from": edges[i], "to": edges[i + 1], "count": int(c)} for i, c in enumerate(counts)]
+        safety = rows(SAFETY_BINS, self.safety_hist)
+        if self.safety_unknown:
+            safety.append({"from": None, "to": None, "count": self.safety_unknown})
+        return {"price_lakh": rows(PRICE_BINS_LAKH, self.price_hist), "safety_rating": safety}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "counts": {name: dict(counts) for name, counts in self.counts.items()},
+            "segments": self.segments(),
+            "histograms": self.histograms(),
+        }
+
+    def summary_text(self) -> str:
+        """Short catalog overview for the LLM, without listing individual cars."""
+        if not self.total:
+            return "The local inventory is empty."
+
+        def top(name: str, limit: int = 8) -> str:
+            items = sorted(self.counts[name].items(), key=lambda item: -item[1])[:limit]
+            return ", ".join(f"{label} ({count})" for label, count in items)
+
+        lines = [f"LOCAL INVENTORY: {self.total} cars."]
+        lines.append("Segments: " + "; ".join(
+            f"{segment.replace('_', ' ')} {info['count']} ({_format_lakh(info['min'])} to {_format_lakh(info['max'])})"
+            for segment, info in sorted(self.segments().items(), key=lambda item: item[1]["min"])))
+        lines.append("Brands: " + top("brand"))
+        lines.append("Fuel: " + top("fuel_type"))
+        lines.append("Stock: " + top("stock_status"))
+        bands = [f"{PRICE_BINS_LAKH[i]:g}-{PRICE_BINS_LAKH[i + 1]:g} lakh: {int(c)}"
+                 for i, c in enumerate(self.price_hist) if c]
+        lines.append("Price bands: " + ", ".join(bands).replace("-inf lakh", "+ lakh"))
+        return "\n".join(lines)
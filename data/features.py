@@ -0,0 +1,101 @@
+"""
+Feature vocabulary for the inventory.
+Maps the free-text VehicleSpecs.features strings onto canonical tags
+(e.g. "ADAS Level 2" -> adas, "Harman Kardon" -> premium_audio) and
+pulls airbag counts out into a number.
+"""
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Canonical tag -> pattern matched against the lower-cased feature text.
+# A feature can map to several tags ("Panoramic Sunroof" -> panoramic_sunroof + sunroof).
+FEATURE_PATTERNS = [
+    ("sunroof", r"sunroof|moonroof"),
+    ("panoramic_sunroof", r"panoramic"),
+    ("adas", r"\badas\b|honda sensing|driving assistant|lane keep|autonomous braking"),
+    ("abs", r"\babs\b"),
+    ("ebd", r"\bebd\b"),
+    ("esc", r"\besc\b|\besp\b|stability control"),
+    ("airbags", r"airbag"),
+    ("awd", r"\b4wd\b|\bawd\b|4x4|4matic|xdrive|quattro"),
+    ("premium_audio", r"bose|jbl|harman|burmester|sony|infinity|bang|meridian"),
+    ("hud", r"\bhud\b|head-?up"),
+    ("digital_cluster", r"digital (cluster|cockpit)|virtual cockpit"),
+    ("connected_car", r"connected car|blue ?link|i-?smart|alexa|bluelink"),
+    ("wireless_charging", r"wireless charg"),
+    ("cruise_control", r"cruise"),
+    ("ventilated_seats", r"ventilated"),
+    ("camera_360", r"360"),
+    ("keyless_entry", r"keyless"),
+    ("power_windows", r"power windows"),
+    ("led_headlamps", r"\bled\b.*head"),
+    ("projector_headlamps", r"projector"),
+    ("alloy_wheels", r"alloy"),
+    ("ambient_lighting", r"ambient"),
+    ("touchscreen", r"touchscreen|infotainment"),
+    ("rear_ac_vents", r"rear ac"),
+    ("fast_charging", r"fast charg"),
+    ("ev_range", r"range \d+"),
+    ("regenerative_braking", r"regenerative"),
+    ("drive_modes", r"drive modes"),
+    ("gesture_control", r"gesture"),
+]
+
+# Compiled once at import
+_COMPILED = [(tag, re.compile(pattern)) for tag, pattern in FEATURE_PATTERNS]
+
+# Words that stand in for an airbag count
+_AIRBAG_WORDS = {"dual": 2, "twin": 2, "two": 2, "four": 4, "six": 6, "eight": 8}
+
+
+@lru_cache(maxsize=4096)
+def parse_airbags(text: str) -> Optional[int]:
+    """Airbag count in a feature string ("6 Airbags" -> 6, "Dual Airbags" -> 2)."""
+    lowered = text.lower()
+    if "airbag" not in lowered:
+        return None
+    match = re.search(r"(\d+)\s*airbag", lowered)
+    if match:
+        return int(match.group(1))
+    for word, count in _AIRBAG_WORDS.items():
+        if re.search(rf"\b{word}\b", lowered):
+            return count
+    return 1
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+@lru_cache(maxsize=4096)
+def _feature_tags(text: str) -> Tuple[str, ...]:
+    lowered = text.lower().strip()
+    tags = tuple(tag for tag, pattern in _COMPILED if pattern.search(lowered))
+    return tags or (_slug(lowered),)
+
+
+def normalize_feature(text: str) -> List[str]:
+    """
+    Canonical tags for one feature string.
+    Unknown features fall back to a slug of their text so nothing is dropped.
+    The catalog repeats a small vocabulary, so results are cached per string.
+    """
+    return list(_feature_tags(text))
+
+
+def parse_feature_query(features: List[str]) -> Tuple[List[str], Optional[int]]:
+    """
+    Split requested features into canonical tags and an airbag minimum.
+    "6 airbags" becomes airbags >= 6 rather than a tag.
+    """
+    tags, airbags = [], None
+    for text in features or []:
+        count = parse_airbags(text)
+        if count is not None and count > 1:
+            airbags = max(airbags or 0, count)
+            continue
+        for tag in normalize_feature(text):
+            if tag not in tags:
+                tags.append(tag)
+    return tags, airbags
@@ -0,0 +1,782 @@
+"""
+Columnar inventory store.
+Holds the catalog as NumPy columns so search filters run as boolean masks
+instead of a Python loop over every dict, plus secondary indexes
+(id hash map, inverted indexes, sorted price array) and a small query planner.
+"""
+import re
+import copy
+from typing import List, Dict, Any, Optional, Tuple, Union, Callable, Iterable, Iterator
+import numpy as np
+from schema import VehicleSpecs
+from data.rows import VehicleRow
+from data.facets import InventoryFacets
+from data.features import normalize_feature, parse_airbags, parse_feature_query
+
+
+# Numeric columns and their storage dtype
+NUMERIC_COLUMNS = {
+    "price": np.float64,
+    "seating": np.int16,
+    "engine_cc": np.int32,
+    "safety_rating": np.float32,   # NaN when the rating is unknown
+    "mileage": np.float32,
+    "warranty_years": np.int16,
+}
+
+# String columns stored as integer codes into a per-column vocabulary
+CATEGORICAL_COLUMNS = ("brand", "type", "fuel_type", "transmission", "stock_status")
+
+# Search filters backed by an inverted index: filter name -> (column, ignore_case)
+INDEXED_FILTERS = {
+    "vehicle_type": ("type", False),
+    "fuel_type": ("fuel_type", False),
+    "brand": ("brand", True),
+}
+
+# Sort keys for ranked search: key -> True if higher values rank first
+SORT_KEYS = {
+    "price": False,
+    "mileage": True,
+    "safety_rating": True,
+    "power": True,
+}
+
+# Unit conversions to bhp for the parsed power column
+POWER_UNITS = {"bhp": 1.0, "hp": 1.0, "ps": 0.986, "kw": 1.341}
+
+# Use the full mask scan when the best index still covers more than this share of rows
+SCAN_THRESHOLD = 0.5
+
+
+def parse_quantity(text: str, units: Dict[str, float] = None) -> float:
+    """
+    Parse the leading number of a spec string such as "143 bhp" or "250 Nm".
+    Known units are converted with the given factors; NaN if there is no number.
+    """
+    match = re.search(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]*)", text or "")
+    if not match:
+        return float("nan")
+    value = float(match.group(1))
+    if units:
+        value *= units.get(match.group(2).lower(), 1.0)
+    return value
+
+
+def parse_sort_by(sort_by: Union[str, Dict[str, float]]) -> Dict[str, float]:
+    """
+    Normalize a sort spec into {key: weight}.
+    Accepts a single key ("price", "-price" to flip direction),
+    a weighted string ("safety_rating:0.7,price:0.3") or a dict of weights.
+    """
+    if isinstance(sort_by, dict):
+        weights = dict(sort_by)
+    else:
+        weights = {}
+        for part in str(sort_by).split(","):
+            key, _, weight = part.strip().partition(":")
+            if key:
+                weights[key.strip()] = float(weight) if weight else 1.0
+
+    spec = {}
+    for key, weight in weights.items():
+        if key.startswith("-"):
+            key, weight = key[1:], -weight
+        if key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{key}'. Use one of: {', '.join(SORT_KEYS)}")
+        spec[key] = weight
+    return spec
+
+
+def encode_features(record: Dict[str, Any]) -> Tuple[List[str], int]:
+    """Canonical feature tags and airbag count of one record."""
+    tags, airbags = {}, 0
+    for text in record.get("features", []):
+        tags.update(dict.fromkeys(normalize_feature(text)))
+        airbags = max(airbags, parse_airbags(text) or 0)
+    return list(tags), airbags
+
+
+class ColumnBuilder:
+    """
+    Single-pass builder that turns vehicle records into the column set an
+    InventoryStore is built from, without keeping the records around.
+    """
+
+    def __init__(self):
+        self._numeric = {name: [] for name in NUMERIC_COLUMNS}
+        self._power: List[float] = []
+        self._airbags: List[int] = []
+        self._lookups = {name: {} for name in CATEGORICAL_COLUMNS}
+        self._codes = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._ids: List[str] = []
+        self._feature_vocab: Dict[str, int] = {}
+        self._row_bits: List[int] = []
+
+    def add(self, record: Dict[str, Any]):
+        for name, values in self._numeric.items():
+            value = record.get(name)
+            values.append(np.nan if value is None else value)
+        self._power.append(parse_quantity(record.get("power"), POWER_UNITS))
+
+        for name, lookup in self._lookups.items():
+            self._codes[name].append(lookup.setdefault(record[name], len(lookup)))
+        self._ids.append(record["vehicle_id"])
+
+        # Feature tags as one Python int bitmask per row; packed into words in finish()
+        tags, airbags = encode_features(record)
+        bits = 0
+        for tag in tags:
+            bits |= 1 << self._feature_vocab.setdefault(tag, len(self._feature_vocab))
+        self._row_bits.append(bits)
+        self._airbags.append(airbags)
+
+    def finish(self) -> Dict[str, Any]:
+        numeric = {name: np.array(values, dtype=NUMERIC_COLUMNS[name])
+                   for name, values in self._numeric.items()}
+        numeric["power"] = np.array(self._power, dtype=np.float32)
+        numeric["airbags"] = np.array(self._airbags, dtype=np.int8)
+
+        words = max(1, -(-len(self._feature_vocab) // 64))
+        feature_bits = np.zeros((len(self._ids), words), dtype=np.uint64)
+        for w in range(words):
+            feature_bits[:, w] = np.fromiter(
+                ((bits >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for bits in self._row_bits),
+                dtype=np.uint64, count=len(self._ids))
+
+        return {
+            "numeric": numeric,
+            "codes": {name: np.array(codes, dtype=np.int32) for name, codes in self._codes.items()},
+            "vocab": {name: list(lookup) for name, lookup in self._lookups.items()},
+            "vehicle_ids": np.array(self._ids, dtype=object),
+            "feature_bits": feature_bits,
+            "feature_vocab": dict(self._feature_vocab),
+        }
+
+
+def build_columns(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Column set for an iterable of vehicle records."""
+    builder = ColumnBuilder()
+    for record in records:
+        builder.add(record)
+    return builder.finish()
+
+
+class SortedIdIndex:
+    """
+    vehicle_id -> row lookup by bisection over a sorted fixed-width id array.
+    Used instead of a dict when the ids are memory-mapped, so the index
+    itself is shared between processes.
+    """
+
+    def __init__(self, sorted_ids: np.ndarray, order: np.ndarray):
+        self.sorted_ids = sorted_ids
+        self.order = order
+
+    def get(self, vehicle_id: str, default=None):
+        key = vehicle_id.encode("utf-8")
+        pos = int(np.searchsorted(self.sorted_ids, key))
+        if pos < self.sorted_ids.size and self.sorted_ids[pos] == key:
+            return int(self.order[pos])
+        return default
+
+    def __contains__(self, vehicle_id: str) -> bool:
+        return self.get(vehicle_id) is not None
+
+    def __len__(self) -> int:
+        return int(self.sorted_ids.size)
+
+
+class InventoryStore:
+    """
+    Column-oriented view over the inventory.
+    Rows are fetched through `fetch_row` as compact VehicleRow objects and
+    only turned into VehicleSpecs for the final result set.
+
+    A store is an immutable snapshot: apply() returns a new store with the
+    changes and a bumped version, so readers never need a lock.
+    """
+
+    def __init__(self, columns: Dict[str, Any], fetch_row: Callable[[int], VehicleRow],
+                 indexes: Dict[str, Any] = None):
+        self._fetch_row = fetch_row
+        self.numeric: Dict[str, np.ndarray] = columns["numeric"]
+        self.codes: Dict[str, np.ndarray] = columns["codes"]
+        self.vocab: Dict[str, List[str]] = columns["vocab"]
+        self.vehicle_ids: np.ndarray = columns["vehicle_ids"]
+        self.feature_bits: np.ndarray = columns["feature_bits"]
+        self.feature_vocab: Dict[str, int] = columns["feature_vocab"]
+        self.size = len(self.vehicle_ids)
+
+        # Write-path state (see apply())
+        self.version = 0
+        self.alive: Optional[np.ndarray] = None       # None until a row is deleted
+        self.dead = 0
+        self._overrides: Dict[int, VehicleRow] = {}
+        self._id_overlay: Dict[str, Optional[int]] = {}
+
+        self._build_indexes(indexes or {})
+        self.facets = InventoryFacets.build(self)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "InventoryStore":
+        """Store over an in-memory list of vehicle dicts, kept as compact rows."""
+        rows = [VehicleRow.from_record(record) for record in records]
+        return cls(build_columns(records), rows.__getitem__)
+
+    # ------------------------------------------
+    # Secondary indexes
+    # ------------------------------------------
+    def _build_indexes(self, prebuilt: Dict[str, Any]):
+        """Build the secondary indexes, reusing any that were persisted with the columns."""
+        # id -> row hash map (bisection over sorted ids for byte-string id columns)
+        if self.vehicle_ids.dtype == object:
+            self.id_index = {vid: i for i, vid in enumerate(self.vehicle_ids)}
+        elif "id_order" in prebuilt:
+            self.id_index = SortedIdIndex(prebuilt["id_sorted"], prebuilt["id_order"])
+        else:
+            order = np.argsort(self.vehicle_ids, kind="stable")
+            self.id_index = SortedIdIndex(self.vehicle_ids[order], order)
+
+        # label -> codes (exact and lower-cased) for each categorical column
+        self.code_lookup: Dict[str, Dict[str, List[int]]] = {}
+        self.code_lookup_ci: Dict[str, Dict[str, List[int]]] = {}
+        for name in CATEGORICAL_COLUMNS:
+            exact, folded = {}, {}
+            for code, label in enumerate(self.vocab[name]):
+                exact.setdefault(label, []).append(code)
+                folded.setdefault(label.lower(), []).append(code)
+            self.code_lookup[name] = exact
+            self.code_lookup_ci[name] = folded
+
+        # Inverted indexes: column -> code -> sorted row ids
+        self.postings: Dict[str, List[np.ndarray]] = {}
+        for name in CATEGORICAL_COLUMNS:
+            codes = self.codes[name]
+            order = prebuilt.get(f"postings_{name}")
+            if order is None:
+                order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes, minlength=len(self.vocab[name]))
+            self.postings[name] = np.split(order, np.cumsum(counts)[:-1])
+
+        # Sorted price array for bisection on budget_max
+        if "price_order" in prebuilt:
+            self.price_order = prebuilt["price_order"]
+            self.sorted_prices = prebuilt["sorted_prices"]
+        else:
+            self.price_order = np.argsort(self.numeric["price"], kind="stable")
+            self.sorted_prices = self.numeric["price"][self.price_order]
+
+    def export_indexes(self) -> Dict[str, np.ndarray]:
+        """Index arrays worth persisting next to the columns."""
+        indexes = {"price_order": self.price_order, "sorted_prices": self.sorted_prices}
+        if isinstance(self.id_index, SortedIdIndex):
+            indexes["id_sorted"] = self.id_index.sorted_ids
+            indexes["id_order"] = self.id_index.order
+        for name in CATEGORICAL_COLUMNS:
+            indexes[f"postings_{name}"] = (np.concatenate(self.postings[name]) if self.size
+                                           else np.empty(0, dtype=np.int64))
+        return indexes
+
+    def ids_at(self, rows: np.ndarray) -> List[str]:
+        """vehicle_ids of the given rows as str."""
+        ids = self.vehicle_ids[rows].tolist()
+        if self.vehicle_ids.dtype != object:
+            ids = [vid.decode("utf-8") for vid in ids]
+        return ids
+
+    def labels(self, column: str) -> List[str]:
+        """Distinct values of a categorical column that occur in the store."""
+        return [label for label, rows in zip(self.vocab[column], self.postings[column]) if rows.size]
+
+    def price_range(self) -> Dict[str, float]:
+        """Min and max price, read from the ends of the sorted price array."""
+        if not self.sorted_prices.size:
+            return {"min": 0.0, "max": 0.0}
+        return {"min": float(self.sorted_prices[0]), "max": float(self.sorted_prices[-1])}
+
+    # ------------------------------------------
+    # Feature bitmap
+    # ------------------------------------------
+    def feature_mask(self, tags: List[str]) -> Optional[np.ndarray]:
+        """Bit pattern for the given tags, or None if any tag is unknown."""
+        pattern = np.zeros(self.feature_bits.shape[1], dtype=np.uint64)
+        for tag in tags:
+            bit = self.feature_vocab.get(tag)
+            if bit is None:
+                return None
+            pattern[bit // 64] |= np.uint64(1 << (bit % 64))
+        return pattern
+
+    def _features_filter(self, subset: np.ndarray, features_all=None, features_any=None,
+                         features_none=None) -> np.ndarray:
+        bits = self.feature_bits if subset is None else self.feature_bits[subset]
+        airbags = self.numeric["airbags"] if subset is None else self.numeric["airbags"][subset]
+        mask = np.ones(bits.shape[0], dtype=bool)
+
+        if features_all:
+            tags, min_airbags = parse_feature_query(features_all)
+            pattern = self.feature_mask(tags)
+            if pattern is None:
+                return np.zeros(bits.shape[0], dtype=bool)
+            mask &= ((bits & pattern) == pattern).all(axis=1)
+            if min_airbags:
+                mask &= airbags >= min_airbags
+
+        if features_any:
+            tags, min_airbags = parse_feature_query(features_any)
+            known = [t for t in tags if t in self.feature_vocab]
+            hit = np.zeros(bits.shape[0], dtype=bool)
+            if known:
+                hit |= (bits & self.feature_mask(known)).any(axis=1)
+            if min_airbags:
+                hit |= airbags >= min_airbags
+            mask &= hit
+
+        if features_none:
+            tags, min_airbags = parse_feature_query(features_none)
+            known = [t for t in tags if t in self.feature_vocab]
+            if known:
+                mask &= ~(bits & self.feature_mask(known)).any(axis=1)
+            if min_airbags:
+                mask &= airbags < min_airbags
+
+        return mask
+
+    # ------------------------------------------
+    # Query planning
+    # ------------------------------------------
+    def _category_codes(self, column: str, value: str, ignore_case: bool = False) -> List[int]:
+        """Return the codes in `column` whose label matches `value`."""
+        if ignore_case:
+            return self.code_lookup_ci[column].get(value.lower(), [])
+        return self.code_lookup[column].get(value, [])
+
+    def _category_rows(self, column: str, value: str, ignore_case: bool = False) -> np.ndarray:
+        """Row ids from the inverted index, in insertion order."""
+        postings = self.postings[column]
+        codes = self._category_codes(column, value, ignore_case)
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+        if len(codes) == 1:
+            return postings[codes[0]]
+        return np.sort(np.concatenate([postings[c] for c in codes]))
+
+    def _budget_count(self, budget_max: float) -> int:
+        return int(np.searchsorted(self.sorted_prices, budget_max, side="right"))
+
+    def plan(self, **filters) -> List[Tuple[str, int]]:
+        """
+        Estimate how many rows each indexed predicate would return.
+        Returns (filter name, estimated rows) pairs, most selective first.
+        """
+        estimates = []
+        if filters.get("budget_max"):
+            estimates.append(("budget_max", self._budget_count(filters["budget_max"])))
+        for name, (column, ignore_case) in INDEXED_FILTERS.items():
+            value = filters.get(name)
+            if value:
+                codes = self._category_codes(column, value, ignore_case)
+                estimates.append((name, sum(self.postings[column][c].size for c in codes)))
+        return sorted(estimates, key=lambda item: item[1])
+
+    def select(self, **filters) -> np.ndarray:
+        """
+        Return matching row ids in insertion order.
+        Starts from the most selective index and verifies the remaining
+        predicates on that candidate set only; falls back to a full mask
+        scan when no index narrows the search enough.
+        """
+        plan = self.plan(**filters)
+        if not plan or plan[0][1] > self.size * SCAN_THRESHOLD:
+            return np.flatnonzero(self.filter_mask(**filters))
+
+        name, _ = plan[0]
+        if name == "budget_max":
+            candidates = np.sort(self.price_order[:self._budget_count(filters[name])])
+        else:
+            column, ignore_case = INDEXED_FILTERS[name]
+            candidates = self._category_rows(column, filters[name], ignore_case)
+
+        if candidates.size == 0:
+            return candidates
+        return candidates[self.filter_mask(subset=candidates, **filters)]
+
+    # ------------------------------------------
+    # Filtering
+    # ------------------------------------------
+    def _category_mask(self, column: str, value: str, ignore_case: bool = False,
+                       subset: np.ndarray = None) -> np.ndarray:
+        values = self.codes[column] if subset is None else self.codes[column][subset]
+        codes = self._category_codes(column, value, ignore_case)
+        if not codes:
+            return np.zeros(values.size, dtype=bool)
+        if len(codes) == 1:
+            return values == codes[0]
+        return np.isin(values, codes)
+
+    def filter_mask(
+        self,
+        budget_max: float = None,
+        vehicle_type: str = None,
+        fuel_type: str = None,
+        seating_min: int = None,
+        brand: str = None,
+        features_all: List[str] = None,
+        features_any: List[str] = None,
+        features_none: List[str] = None,
+        airbags_min: int = None,
+        subset: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Evaluate the search filters as a single boolean mask.
+        If `subset` is given, the mask covers only those row ids.
+        """
+        def column(values: np.ndarray) -> np.ndarray:
+            return values if subset is None else values[subset]
+
+        if subset is None:
+            mask = np.ones(self.size, dtype=bool) if self.alive is None else self.alive.copy()
+        else:
+            mask = np.ones(subset.size, dtype=bool)
+
+        if budget_max:
+            mask &= column(self.numeric["price"]) <= budget_max
+
+        if vehicle_type:
+            mask &= self._category_mask("type", vehicle_type, subset=subset)
+
+        if fuel_type:
+            mask &= self._category_mask("fuel_type", fuel_type, subset=subset)
+
+        if seating_min:
+            mask &= column(self.numeric["seating"]) >= seating_min
+
+        if brand:
+            mask &= self._category_mask("brand", brand, ignore_case=True, subset=subset)
+
+        if airbags_min:
+            mask &= column(self.numeric["airbags"]) >= airbags_min
+
+        if features_all or features_any or features_none:
+            mask &= self._features_filter(subset, features_all, features_any, features_none)
+
+        return mask
+
+    # ------------------------------------------
+    # Ranking
+    # ------------------------------------------
+    def _sort_values(self, rows: np.ndarray, spec: Dict[str, float]) -> np.ndarray:
+        """
+        Per-row ranking key where smaller is better.
+        A single key uses the raw column; several keys are min-max
+        normalized and combined by weight. Unknown values sort last.
+        """
+        if len(spec) == 1:
+            (key, weight), = spec.items()
+            values = self.numeric[key][rows].astype(np.float64)
+            if SORT_KEYS[key] == (weight > 0):
+                values = -values
+            return np.where(np.isnan(values), np.inf, values)
+
+        score = np.zeros(rows.size, dtype=np.float64)
+        for key, weight in spec.items():
+            values = self.numeric[key][rows].astype(np.float64)
+            low, high = np.nanmin(values), np.nanmax(values)
+            scaled = (values - low) / (high - low) if high > low else np.zeros_like(values)
+            if not SORT_KEYS[key]:
+                scaled = 1.0 - scaled
+            score += weight * np.nan_to_num(scaled, nan=0.0)
+        return -score
+
+    def rank(self, rows: np.ndarray, sort_by=None, limit: int = None) -> np.ndarray:
+        """
+        Order `rows` by `sort_by` and keep the best `limit`.
+        Uses argpartition so only the top-k rows are fully sorted.
+        """
+        if limit is not None and limit <= 0:
+            return rows[:0]
+        if not sort_by:
+            return rows if limit is None else rows[:limit]
+
+        values = self._sort_values(rows, parse_sort_by(sort_by))
+        if limit is not None and limit < rows.size:
+            # keep every tie at the cutoff so pages agree with the full order
+            cutoff = values[np.argpartition(values, limit - 1)[limit - 1]]
+            top = np.flatnonzero(values <= cutoff)
+        else:
+            top = np.arange(rows.size)
+        # Stable order on ties: by value, then insertion order
+        order = top[np.lexsort((rows[top], values[top]))]
+        return rows[order[:limit]]
+
+    def keyset_page(self, rows: np.ndarray, limit: int, after: Tuple[float, str] = None) -> np.ndarray:
+        """
+        Next `limit` rows in (price, vehicle_id) order strictly after the
+        `after` key. Only the page itself (plus price ties) is sorted.
+        """
+        prices = self.numeric["price"][rows]
+        if after is not None:
+            price, vehicle_id = after
+            ids = self.vehicle_ids[rows]
+            key = vehicle_id if ids.dtype == object else vehicle_id.encode("utf-8")
+            later = (prices > price) | ((prices == price) & (ids > key))
+            rows, prices = rows[later], prices[later]
+        if limit < rows.size:
+            cutoff = np.partition(prices, limit - 1)[limit - 1]
+            keep = prices <= cutoff
+            rows, prices = rows[keep], prices[keep]
+        ids = self.ids_at(rows)
+        order = sorted(range(rows.size), key=lambda i: (prices[i], ids[i]))[:limit]
+        return rows[np.array(order, dtype=np.int64)]
+
+    # ------------------------------------------
+    # Row materialization
+    # ------------------------------------------
+    def compact_row(self, index: int) -> VehicleRow:
+        """Internal row object for a single row."""
+        override = self._overrides.get(index)
+        return override if override is not None else self._fetch_row(index)
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Raw vehicle dict for a single row."""
+        return self.compact_row(index).to_dict()
+
+    def row(self, index: int) -> VehicleSpecs:
+        """Build a VehicleSpecs for a single row."""
+        return self.compact_row(index).to_specs()
+
+    def live_rows(self) -> np.ndarray:
+        """Row ids that have not been deleted."""
+        return np.arange(self.size) if self.alive is None else np.flatnonzero(self.alive)
+
+    def rows(self, indices) -> List[VehicleSpecs]:
+        """Build VehicleSpecs objects for the given row indices."""
+        return [self.row(int(i)) for i in indices]
+
+    def iter_rows(self, indices) -> Iterator[VehicleSpecs]:
+        """Lazily build VehicleSpecs objects for the given row indices."""
+        for i in indices:
+            yield self.row(int(i))
+
+    def search(self, sort_by=None, limit: int = None, **filters) -> List[VehicleSpecs]:
+        """Filter, rank and materialize only the rows that are returned."""
+        return self.rows(self.rank(self.select(**filters), sort_by, limit))
+
+    def find_row(self, vehicle_id: str) -> Optional[int]:
+        """Return the row index for `vehicle_id`, or None (O(1) hash lookup)."""
+        if vehicle_id in self._id_overlay:
+            return self._id_overlay[vehicle_id]
+        return self.id_index.get(vehicle_id)
+
+    # ------------------------------------------
+    # Copy-on-write updates
+    # ------------------------------------------
+    def apply(self, upserts: Iterable[Dict[str, Any]] = (), deletes: Iterable[str] = ()) -> "InventoryStore":
+        """
+        Return a new snapshot with `deletes` removed and `upserts` inserted or
+        replaced, and version + 1. Indexes are maintained incrementally
+        (posting and price arrays are edited at their bisection points,
+        never re-sorted); this snapshot is left untouched.
+
+        Write cost: columns are copied per column on first write, so a batch
+        pays O(N) only for each column it actually changes (a price update
+        copies the price column and rebuilds the sorted price arrays; every
+        other column, memory-mapped or not, stays shared with this snapshot).
+        Inserts grow, and therefore copy, every column; deletes copy the
+        liveness mask.
+        """
+        new = copy.copy(self)
+        new._copy_for_write()
+
+        for vehicle_id in deletes:
+            new._delete(vehicle_id)
+
+        upserts = list(upserts)
+        fresh = list(dict.fromkeys(r["vehicle_id"] for r in upserts if new.find_row(r["vehicle_id"]) is None))
+        if fresh:
+            new._grow(len(fresh))
+            for offset, vehicle_id in enumerate(fresh):
+                new._id_overlay[vehicle_id] = self.size + offset
+        unwritten = set(fresh)
+        for record in upserts:
+            vehicle_id = record["vehicle_id"]
+            new._write_row(new.find_row(vehicle_id), record, indexed=vehicle_id not in unwritten)
+            unwritten.discard(vehicle_id)
+
+        new.version = self.version + 1
+        return new
+
+    def compacted(self) -> "InventoryStore":
+        """Rebuild without deleted rows (same version)."""
+        store = InventoryStore.from_records([self.record(int(i)) for i in self.live_rows()])
+        store.version = self.version
+        return store
+
+    def _copy_for_write(self):
+        """
+        Share every column with the parent snapshot; only the containers are
+        copied here. A column is copied the first time this snapshot writes
+        to it (_writable), so memory-mapped pages stay shared until changed.
+        """
+        self.numeric = dict(self.numeric)
+        self.codes = dict(self.codes)
+        self.vocab = dict(self.vocab)
+        self.code_lookup = dict(self.code_lookup)
+        self.code_lookup_ci = dict(self.code_lookup_ci)
+        self.postings = dict(self.postings)
+        self.feature_vocab = dict(self.feature_vocab)
+        # price_order / sorted_prices are replaced (np.insert / np.delete), never edited
+        self._overrides = dict(self._overrides)
+        self._id_overlay = dict(self._id_overlay)
+        self.facets = self.facets.copy()
+        self._owned = set()
+
+    def _writable(self, table: str, name: str = None):
+        """This snapshot's own copy of a column (`name` in the `table` dict, or the attribute itself)."""
+        key = (table, name)
+        if key not in self._owned:
+            value = getattr(self, table) if name is None else getattr(self, table)[name]
+            value = np.array(value) if isinstance(value, np.ndarray) else copy.copy(value)
+            if name is None:
+                setattr(self, table, value)
+            else:
+                getattr(self, table)[name] = value
+            self._owned.add(key)
+        return getattr(self, table) if name is None else getattr(self, table)[name]
+
+    def _grow(self, count: int):
+        """Append `count` empty rows (filled by _write_row)."""
+        for name, values in self.numeric.items():
+            self.numeric[name] = np.concatenate([values, np.zeros(count, dtype=values.dtype)])
+            self._owned.add(("numeric", name))
+        for name, values in self.codes.items():
+            self.codes[name] = np.concatenate([values, np.zeros(count, dtype=values.dtype)])
+            self._owned.add(("codes", name))
+        self.vehicle_ids = np.concatenate([self.vehicle_ids, np.zeros(count, dtype=self.vehicle_ids.dtype)])
+        self.feature_bits = np.vstack([self.feature_bits, np.zeros((count, self.feature_bits.shape[1]), dtype=np.uint64)])
+        self._owned.update({("vehicle_ids", None), ("feature_bits", None)})
+        if self.alive is not None:
+            self.alive = np.concatenate([self.alive, np.ones(count, dtype=bool)])
+            self._owned.add(("alive", None))
+        self.size += count
+
+    def _update_facets(self, row: int, delta: int):
+        labels = {name: self.vocab[name][self.codes[name][row]] for name in CATEGORICAL_COLUMNS}
+        safety = float(self.numeric["safety_rating"][row])
+        self.facets.update(labels, float(self.numeric["price"][row]), safety, delta)
+
+    def _unindex(self, row: int, columns: Iterable[str] = CATEGORICAL_COLUMNS, price: bool = True):
+        """Remove a row from the facets and from the given inverted indexes and the sorted price array."""
+        self._update_facets(row, -1)
+        for name in columns:
+            code = self.codes[name][row]
+            postings = self._writable("postings", name)
+            postings[code] = np.delete(postings[code], np.searchsorted(postings[code], row))
+        if not price:
+            return
+        price = self.sorted_prices.dtype.type(self.numeric["price"][row])
+        lo = np.searchsorted(self.sorted_prices, price, side="left")
+        hi = np.searchsorted(self.sorted_prices, price, side="right")
+        pos = lo + int(np.flatnonzero(self.price_order[lo:hi] == row)[0])
+        self.price_order = np.delete(self.price_order, pos)
+        self.sorted_prices = np.delete(self.sorted_prices, pos)
+
+    def _index(self, row: int, columns: Iterable[str] = CATEGORICAL_COLUMNS, price: bool = True):
+        """Insert a row into the facets and into the given inverted indexes and the sorted price array."""
+        self._update_facets(row, +1)
+        for name in columns:
+            code = self.codes[name][row]
+            postings = self._writable("postings", name)
+            postings[code] = np.insert(postings[code], np.searchsorted(postings[code], row), row)
+        if not price:
+            return
+        price = self.numeric["price"][row]
+        pos = np.searchsorted(self.sorted_prices, price, side="right")
+        self.price_order = np.insert(self.price_order, pos, row)
+        self.sorted_prices = np.insert(self.sorted_prices, pos, price)
+
+    def _code_for(self, column: str, label: str) -> int:
+        codes = self.code_lookup[column].get(label)
+        if codes:
+            return codes[0]
+        code = len(self.vocab[column])
+        self._writable("vocab", column).append(label)
+        self._writable("code_lookup", column)[label] = [code]
+        folded = self._writable("code_lookup_ci", column)
+        folded[label.lower()] = folded.get(label.lower(), []) + [code]
+        self._writable("postings", column).append(np.empty(0, dtype=np.int64))
+        return code
+
+    def _delete(self, vehicle_id: str) -> bool:
+        row = self.find_row(vehicle_id)
+        if row is None:
+            return False
+        self._unindex(row)
+        if self.alive is None:
+            self.alive = np.ones(self.size, dtype=bool)
+            self._owned.add(("alive", None))
+        self._writable("alive")[row] = False
+        self.dead += 1
+        self._id_overlay[vehicle_id] = None
+        self._overrides.pop(row, None)
+        return True
+
+    def _write_row(self, row: int, record: Dict[str, Any], indexed: bool):
+        """
+        Write `record` into `row`, keeping the indexes in sync. For an existing
+        row (indexed) only the columns whose stored value changes are written,
+        so only those columns are copied and re-indexed.
+        """
+        numeric = {name: np.nan if record.get(name) is None else record.get(name) for name in NUMERIC_COLUMNS}
+        numeric["power"] = parse_quantity(record.get("power"), POWER_UNITS)
+        tags, numeric["airbags"] = encode_features(record)
+        codes = {name: self._code_for(name, record[name]) for name in CATEGORICAL_COLUMNS}
+        for tag in tags:
+            self.feature_vocab.setdefault(tag, len(self.feature_vocab))
+        words = max(1, -(-len(self.feature_vocab) // 64))
+        if words > self.feature_bits.shape[1]:
+            extra = np.zeros((self.size, words - self.feature_bits.shape[1]), dtype=np.uint64)
+            self.feature_bits = np.hstack([self.feature_bits, extra])
+            self._owned.add(("feature_bits", None))
+        bits = np.zeros(self.feature_bits.shape[1], dtype=np.uint64)
+        for tag in tags:
+            bit = self.feature_vocab[tag]
+            bits[bit // 64] |= np.uint64(1 << (bit % 64))
+
+        changed_numeric = [name for name, value in numeric.items()
+                           if not indexed or not _stores_as(self.numeric[name], row, value)]
+        changed_codes = [name for name, code in codes.items() if not indexed or self.codes[name][row] != code]
+        if indexed:
+            self._unindex(row, changed_codes, price="price" in changed_numeric)
+
+        for name in changed_numeric:
+            self._writable("numeric", name)[row] = numeric[name]
+        for name in changed_codes:
+            self._writable("codes", name)[row] = codes[name]
+        if not indexed or not np.array_equal(self.feature_bits[row], bits):
+            self._writable("feature_bits")[row] = bits
+
+        if not indexed:
+            vehicle_id = record["vehicle_id"]
+            if self.vehicle_ids.dtype == object:
+                self.vehicle_ids[row] = vehicle_id
+            else:
+                encoded = vehicle_id.encode("utf-8")
+                if len(encoded) > self.vehicle_ids.dtype.itemsize:
+                    self.vehicle_ids = self.vehicle_ids.astype(f"S{len(encoded)}")
+                self.vehicle_ids[row] = encoded
+
+        self._overrides[row] = VehicleRow.from_record(record)
+        if indexed:
+            self._index(row, changed_codes, price="price" in changed_numeric)
+        else:
+            self._index(row)
+
+
+def _stores_as(column: np.ndarray, row: int, value) -> bool:
+    """True if writing `value` would leave column[row] unchanged (NaN equals NaN)."""
+    probe = np.empty(1, dtype=column.dtype)
+    probe[0] = value
+    current = column[row]
+    return bool(probe[0] == current) or (probe.dtype.kind == "f" and np.isnan(probe[0]) and np.isnan(current))
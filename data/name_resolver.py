@@ -0,0 +1,320 @@
+"""
+Fuzzy resolution of spoken or typed car names to vehicle_ids.
+Every vehicle contributes aliases (model, brand + model, full name) in a
+compact form (lowercase, no spaces or punctuation, number words as digits)
+so "Nexon E V", "nexon-ev" and "NexonEV" are the same key. Lookups try an
+exact alias hit first, then gather candidates from a character trigram
+index (rarest trigrams first) and a phonetic key, and verify them with a
+bit-parallel edit distance. Single edits are caught exactly through a
+delete-neighbourhood index (aliases and their one-letter deletions, stored
+as sorted hashes).
+"""
+import re
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
+
+# Spoken forms folded before matching
+WORD_FORMS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+    "electric": "ev",
+}
+
+# Words a mention never starts or ends with
+MENTION_STOPWORDS = {
+    "a", "an", "the", "and", "or", "vs", "versus", "with", "to", "of", "for", "in", "on",
+    "is", "it", "new", "compare", "between", "please", "me", "my", "car", "cars",
+}
+
+# Model names that are also everyday words: on their own they are not a car
+# ("best car for city driving"), only with the brand ("honda city")
+COMMON_WORDS = {
+    "city", "venue", "one", "1", "go", "class", "series", "plus", "pro", "max", "sport",
+    "grand", "star", "cross", "life", "magic", "glory", "gate",
+}
+
+# Tokens that name a different variant of the same model ("Tiago" vs "Tiago EV")
+VARIANT_TOKENS = {"ev", "cng", "hybrid", "phev"}
+
+# Phonetic folding applied before vowels are dropped (order matters)
+PHONETIC_RULES = [
+    ("ph", "f"), ("ck", "k"), ("kh", "k"), ("gh", "g"), ("th", "t"), ("sh", "s"),
+    ("ce", "se"), ("ci", "si"), ("cy", "si"),
+    ("q", "k"), ("x", "ks"), ("z", "s"), ("c", "k"), ("w", "v"), ("y", "i"),
+]
+
+# Trigram postings scanned per query, rarest first
+CANDIDATE_BUDGET = 2048
+# Trigram candidates verified per query
+VERIFY_LIMIT = 24
+# One-edit neighbours verified per query
+NEIGHBOUR_LIMIT = 64
+PHONETIC_SCORE = 0.85
+# Score factor for a candidate whose variant tokens differ from the query's
+VARIANT_PENALTY = 0.5
+MIN_SCORE = 0.6
+
+
+def name_tokens(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens with spoken forms folded ("three" -> "3")."""
+    return [WORD_FORMS.get(t, t) for t in re.findall(r"[a-z0-9]+", text.lower())]
+
+
+def variant_tokens(text: str) -> frozenset:
+    """Variant markers in a name, spelled-out ones included: "Nexon E V" -> {"ev"}."""
+    tokens = name_tokens(text)
+    pairs = [a + b for a, b in zip(tokens, tokens[1:])]
+    return frozenset(t for t in tokens + pairs if t in VARIANT_TOKENS)
+
+
+def compact_name(text: str) -> str:
+    """Spacing- and punctuation-insensitive key: "Nexon E V" -> "nexonev"."""
+    return "".join(name_tokens(text))
+
+
+def phonetic_key(compact: str) -> str:
+    """Rough sound-alike key: fold spellings, keep the first letter, drop later vowels and repeats."""
+    for old, new in PHONETIC_RULES:
+        compact = compact.replace(old, new)
+    if not compact:
+        return ""
+    key = [compact[0]]
+    for ch in compact[1:]:
+        if ch in "aeiouh" or ch == key[-1]:
+            continue
+        key.append(ch)
+    return "".join(key)
+
+
+def _trigrams(compact: str) -> List[str]:
+    padded = f"^{compact}$"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def _deletes(compact: str) -> List[str]:
+    """The string itself plus every one-letter deletion."""
+    return list(dict.fromkeys([compact] + [compact[:i] + compact[i + 1:] for i in range(len(compact))]))
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance via Myers' bit-parallel algorithm (O(len(b)) big-int ops)."""
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(b):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for ch in a:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+class NameResolver:
+    """
+    Alias index over a catalog. Aliases are deduplicated, so a model sold
+    as thousands of rows is one entry pointing at all of their vehicle_ids.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        alias_ids: Dict[str, int] = {}
+        self.aliases: List[str] = []
+        self.vehicle_ids: List[List[str]] = []
+        self.alias_variants: List[frozenset] = []
+        for car in records:
+            for text in (car["model"], f"{car['brand']} {car['model']}", car["name"]):
+                key = compact_name(text)
+                if not key:
+                    continue
+                if key not in alias_ids:
+                    alias_ids[key] = len(self.aliases)
+                    self.aliases.append(key)
+                    self.alias_variants.append(variant_tokens(text))
+                    self.vehicle_ids.append([])
+                ids = self.vehicle_ids[alias_ids[key]]
+                if not ids or ids[-1] != car["vehicle_id"]:
+                    ids.append(car["vehicle_id"])
+        self.alias_ids = alias_ids
+        self.alias_digits = [re.sub(r"\D", "", key) for key in self.aliases]
+
+        postings: Dict[str, List[int]] = {}
+        phonetic: Dict[str, List[int]] = {}
+        for i, key in enumerate(self.aliases):
+            for gram in _trigrams(key):
+                postings.setdefault(gram, []).append(i)
+            phonetic.setdefault(phonetic_key(key), []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.phonetic = phonetic
+
+        # Two strings within one edit share an entry of their delete sets
+        pairs = [(hash(d), i) for i, key in enumerate(self.aliases) for d in _deletes(key)]
+        hashes = np.fromiter((h for h, _ in pairs), dtype=np.int64, count=len(pairs))
+        owners = np.fromiter((i for _, i in pairs), dtype=np.int32, count=len(pairs))
+        order = np.argsort(hashes, kind="stable")
+        self.delete_hashes = hashes[order]
+        self.delete_owners = owners[order]
+
+    def __len__(self) -> int:
+        return len(self.aliases)
+
+    def _candidates(self, query: str) -> np.ndarray:
+        """Alias ids sharing the most trigrams with the query, best first."""
+        lists = sorted((self.postings[g] for g in _trigrams(query) if g in self.postings), key=len)
+        chosen, total = [], 0
+        for ids in lists:
+            if chosen and total + ids.size > CANDIDATE_BUDGET:
+                break
+            chosen.append(ids)
+            total += ids.size
+        if not chosen:
+            return np.empty(0, dtype=np.int32)
+        ids, counts = np.unique(np.concatenate(chosen), return_counts=True)
+        if ids.size > VERIFY_LIMIT:
+            top = np.argpartition(-counts, VERIFY_LIMIT - 1)[:VERIFY_LIMIT]
+            ids, counts = ids[top], counts[top]
+        return ids[np.argsort(-counts, kind="stable")]
+
+    def _neighbours(self, query: str) -> List[int]:
+        """Alias ids within (at most) one edit of the query."""
+        wanted = np.array([hash(d) for d in _deletes(query)], dtype=np.int64)
+        lo = np.searchsorted(self.delete_hashes, wanted, side="left")
+        hi = np.searchsorted(self.delete_hashes, wanted, side="right")
+        found = []
+        for a, b in zip(lo.tolist(), hi.tolist()):
+            if b > a:
+                found.extend(self.delete_owners[a:b].tolist())
+                if len(found) >= NEIGHBOUR_LIMIT:
+                    break
+        return found
+
+    def resolve_aliases(self, name: str, limit: int = 5, min_score: float = MIN_SCORE) -> List[Tuple[str, float]]:
+        """
+        Best matching aliases as (compact alias, score in [0, 1]).
+        An exact alias is returned on its own; otherwise one-edit neighbours,
+        sound-alikes and trigram candidates are scored by edit distance.
+        """
+        query = compact_name(name)
+        if not query:
+            return []
+        if query in self.alias_ids:
+            return [(query, 1.0)]
+
+        sound = phonetic_key(query)
+        sounds_alike = self.phonetic.get(sound, [])[:VERIFY_LIMIT]
+        candidates = dict.fromkeys(self._neighbours(query) + sounds_alike)
+        if len(candidates) < limit:
+            candidates.update(dict.fromkeys(self._candidates(query).tolist()))
+
+        # Numbers name different models ("3 Series" vs "5 Series"), so they must agree
+        digits = re.sub(r"\D", "", query)
+        # So must variants: "Tiago EV" is close to "Tiago" in spelling but not the same car
+        variants = variant_tokens(name)
+        ranked = []
+        for i in candidates:
+            alias = self.aliases[i]
+            alias_digits = self.alias_digits[i]
+            if digits and alias_digits and digits != alias_digits:
+                continue
+            score = 1.0 - edit_distance(query, alias) / max(len(query), len(alias))
+            if sound == phonetic_key(alias):
+                score = max(score, PHONETIC_SCORE)
+            if variants != self.alias_variants[i]:
+                score *= VARIANT_PENALTY
+            if score >= min_score:
+                ranked.append((-score, len(alias), i))
+        ranked.sort()
+        return [(self.aliases[i], -s) for s, _, i in ranked[:limit]]
+
+    def resolve(self, name: str, limit: int = 5, min_score: float = MIN_SCORE) -> List[Tuple[str, float]]:
+        """Ranked (vehicle_id, score) for a car name; empty if nothing is close enough."""
+        results, seen = [], set()
+        for alias, score in self.resolve_aliases(name, limit, min_score):
+            for vehicle_id in self.vehicle_ids[self.alias_ids[alias]]:
+                if vehicle_id not in seen:
+                    seen.add(vehicle_id)
+                    results.append((vehicle_id, score))
+                    if len(results) == limit:
+                        return results
+        return results
+
+    def resolve_one(self, name: str, min_score: float = MIN_SCORE) -> Optional[str]:
+        """Single best vehicle_id, or None."""
+        best = self.resolve(name, limit=1, min_score=min_score)
+        return best[0][0] if best else None
+
+    def is_common_word(self, span: str) -> bool:
+        """A single everyday word ("city"), which names a car only together with its brand."""
+        tokens = name_tokens(span)
+        return len(tokens) == 1 and tokens[0] in COMMON_WORDS
+
+    def is_unambiguous(self, span: str) -> bool:
+        """
+        Exactly a catalog alias and not an everyday word on its own:
+        "honda city", "nexon ev", "creta" are; "city" and fuzzy "kreta" are not.
+        """
+        return compact_name(span) in self.alias_ids and not self.is_common_word(span)
+
+    def find_mentions(self, text: str, max_words: int = 4, min_score: float = 0.8) -> List[Tuple[str, str]]:
+        """
+        Car names mentioned in free text as (span, vehicle_id), left to right.
+        At each position an exact alias wins over a fuzzy one and longer spans
+        win over shorter ones; fuzzy spans need at least four letters.
+        """
+        tokens = name_tokens(text)
+        mentions, start = [], 0
+        while start < len(tokens):
+            match = None
+            if tokens[start] not in MENTION_STOPWORDS:
+                widths = range(min(max_words, len(tokens) - start), 0, -1)
+                spans = [(w, tokens[start:start + w]) for w in widths if tokens[start + w - 1] not in MENTION_STOPWORDS]
+                for width, words in spans:
+                    alias = self.alias_ids.get("".join(words))
+                    if alias is not None:
+                        match = (width, self.vehicle_ids[alias][0])
+                        break
+                else:
+                    for width, words in spans:
+                        if len("".join(words)) >= 4:
+                            vehicle_id = self.resolve_one(" ".join(words), min_score=min_score)
+                            if vehicle_id is not None:
+                                match = (width, vehicle_id)
+                                break
+            if match is None:
+                start += 1
+                continue
+            width, vehicle_id = match
+            mentions.append((" ".join(tokens[start:start + width]), vehicle_id))
+            start += width
+        return mentions
+
+
+_RESOLVER: Optional[NameResolver] = None
+_RESOLVER_VERSION: Optional[int] = None
+
+
+def get_name_resolver() -> NameResolver:
+    """Resolver over the active inventory, rebuilt when the inventory version moves."""
+    global _RESOLVER, _RESOLVER_VERSION
+    from data.car_database import iter_inventory_records, get_inventory_version
+
+    version = get_inventory_version()
+    if _RESOLVER is None or _RESOLVER_VERSION != version:
+        _RESOLVER = NameResolver(iter_inventory_records())
+        _RESOLVER_VERSION = version
+    return _RESOLVER
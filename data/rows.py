@@ -0,0 +1,58 @@
+"""
+Compact internal row type for the inventory.
+VehicleRow keeps one vehicle in __slots__ with interned strings and shared
+feature/color tuples; it becomes a VehicleSpecs only at the API boundary.
+"""
+import sys
+from typing import Dict, Any, Tuple
+from schema import VehicleSpecs
+
+# Record fields in VehicleSpecs order
+FIELDS = tuple(VehicleSpecs.model_fields)
+LIST_FIELDS = ("features", "colors_available")
+FLOAT_FIELDS = ("price", "mileage", "safety_rating")
+
+# Identical feature / color lists across the catalog share one tuple
+_SHARED_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _shared_tuple(values) -> Tuple[str, ...]:
+    key = tuple(sys.intern(str(v)) for v in values)
+    return _SHARED_TUPLES.setdefault(key, key)
+
+
+class VehicleRow:
+    """One vehicle, stored without a per-row __dict__."""
+    __slots__ = FIELDS
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "VehicleRow":
+        row = cls.__new__(cls)
+        for name in FIELDS:
+            value = record.get(name)
+            if name in LIST_FIELDS:
+                value = _shared_tuple(() if value is None else value)
+            elif isinstance(value, str) and name != "vehicle_id":
+                value = sys.intern(value)
+            elif name in FLOAT_FIELDS and value is not None:
+                value = float(value)
+            setattr(row, name, value)
+        return row
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain vehicle dict (list fields as fresh lists)."""
+        record = {name: getattr(self, name) for name in FIELDS}
+        for name in LIST_FIELDS:
+            record[name] = list(record[name])
+        return record
+
+    def to_specs(self) -> VehicleSpecs:
+        """
+        Validated VehicleSpecs for the API boundary.
+        Validating straight from the slots (from_attributes) skips the
+        intermediate dict and measures faster than model_construct here.
+        """
+        return VehicleSpecs.model_validate(self, from_attributes=True)
+
+    def __repr__(self) -> str:
+        return f"VehicleRow({self.vehicle_id!r}, {self.name!r})"
@@ -0,0 +1,338 @@
+"""
+Semantic search over the inventory.
+Embeds a text rendering of each vehicle with a small sentence-transformers
+model on CPU, keeps the vectors in a FAISS index on disk and serves hybrid
+queries: structured search_inventory filters narrow the candidates,
+vector similarity ranks them.
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import numpy as np
+from schema import VehicleSpecs
+from data.features import normalize_feature
+
+# Small CPU-friendly model (384-dim)
+DEFAULT_MODEL = os.getenv("CARASTRA_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+INDEX_DIR = Path(__file__).parent.parent / "memory" / "semantic_index"
+
+# Above this many vectors the FAISS index is IVF (inverted lists) instead of exact flat search
+IVF_MIN_SIZE = 50_000
+IVF_NPROBE = 16
+# Retrain the IVF quantizer once this share of the trained size has been added since training
+RETRAIN_SHARE = 0.3
+# Rebuild compactly once this share of the rows are free slots left by removed vehicles
+MAX_FREE_SHARE = 0.25
+
+# Candidate sets up to this size are ranked by an exact dot product instead of FAISS
+EXACT_RERANK_LIMIT = 4096
+
+
+def render_vehicle(car: Dict[str, Any]) -> str:
+    """Text rendering of one vehicle used for embedding."""
+    parts = [
+        f"{car['name']} ({car['year']}), a {car['type'].replace('_', ' ')} by {car['brand']}.",
+        f"Price {car['price'] / 100000:.1f} lakh. {car['fuel_type']} {car['transmission']}, "
+        f"{car['power']}, {car['torque']}, {car['seating']} seats.",
+    ]
+    if car.get("mileage"):
+        parts.append(f"Mileage {car['mileage']} kmpl.")
+    if car.get("safety_rating") is not None:
+        parts.append(f"Safety rating {car['safety_rating']} out of 5.")
+    if car["seating"] >= 7:
+        parts.append("Seven-seater family car.")
+    parts.append(f"{car['warranty_years']} year warranty.")
+
+    tags = {tag.replace("_", " ") for text in car.get("features", []) for tag in normalize_feature(text)}
+    parts.append("Features: " + ", ".join(car.get("features", [])) + ". " + ", ".join(sorted(tags)) + ".")
+    return " ".join(parts)
+
+
+def _fingerprint(text: str, model_name: str) -> str:
+    return hashlib.sha1(f"{model_name}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _nlist(size: int) -> int:
+    """Inverted lists for an IVF index over `size` vectors."""
+    return int(4 * np.sqrt(size))
+
+
+def sentence_transformer_embedder(model_name: str = DEFAULT_MODEL) -> Callable[[List[str]], np.ndarray]:
+    """Load a sentence-transformers model on CPU and return a batch embedding function."""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(texts: List[str]) -> np.ndarray:
+        return model.encode(texts, batch_size=64, normalize_embeddings=True,
+                            convert_to_numpy=True, show_progress_bar=False).astype(np.float32)
+
+    return embed
+
+
+class SemanticIndex:
+    """
+    Persisted embedding index.
+    Files in `index_dir`:
+      - embeddings.npy : float32 unit vectors, memory-mapped on load
+      - manifest.json  : model name, vehicle_id per row (null for a free row),
+                         per-vehicle text hashes and IVF training bookkeeping
+      - vectors.faiss  : FAISS index over the same rows, keyed by row number
+    Rows are stable: a rebuild replaces changed vectors in place with
+    remove_ids / add_with_ids and only retrains when the catalog drifted.
+    """
+
+    def __init__(self, index_dir: Path = INDEX_DIR, model_name: str = DEFAULT_MODEL,
+                 embedder: Callable[[List[str]], np.ndarray] = None):
+        self.index_dir = Path(index_dir)
+        self.model_name = model_name
+        self._embedder = embedder
+        self.vehicle_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.hashes: Dict[str, str] = {}
+        self.embeddings: Optional[np.ndarray] = None
+        self.index = None
+        # Vectors in the index when the IVF quantizer was trained, and added since
+        self.trained_size = 0
+        self.added_since_training = 0
+
+    @property
+    def embed(self) -> Callable[[List[str]], np.ndarray]:
+        if self._embedder is None:
+            self._embedder = sentence_transformer_embedder(self.model_name)
+        return self._embedder
+
+    # ------------------------------------------
+    # Build / persist
+    # ------------------------------------------
+    def build(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Bring the on-disk index in line with `records`.
+        Only vehicles whose rendered text changed are re-embedded.
+        Returns the number of vehicles that were embedded.
+        """
+        if self.embeddings is None:
+            self.load()
+        if not records:
+            return 0
+
+        texts = {car["vehicle_id"]: render_vehicle(car) for car in records}
+        hashes = {vid: _fingerprint(text, self.model_name) for vid, text in texts.items()}
+        stale = [vid for vid, h in hashes.items() if self.hashes.get(vid) != h]
+        removed = [vid for vid in self.hashes if vid not in hashes]
+
+        if not stale and not removed:
+            return 0
+
+        # Identical renderings (same model at several dealers) share one embedding
+        fresh = {}
+        if stale:
+            unique = list(dict.fromkeys(texts[vid] for vid in stale))
+            vectors = dict(zip(unique, self.embed(unique)))
+            fresh = {vid: vectors[texts[vid]] for vid in stale}
+
+        if self._needs_rebuild(len(hashes), len(removed), len(fresh)):
+            order = list(texts)
+            dim = len(next(iter(fresh.values()))) if fresh else self.embeddings.shape[1]
+            matrix = np.empty((len(order), dim), dtype=np.float32)
+            for row, vid in enumerate(order):
+                matrix[row] = fresh[vid] if vid in fresh else self.embeddings[self.positions[vid]]
+            self._rebuild(order, hashes, matrix)
+        else:
+            self._update(fresh, removed, hashes)
+        self.load()
+        return len(stale)
+
+    def _needs_rebuild(self, size: int, removed: int, added: int) -> bool:
+        """True when an in-place update would leave a poorly fitted or fragmented index."""
+        import faiss
+
+        if self.index is None or not self.vehicle_ids:
+            return True
+        ivf = isinstance(self.index, faiss.IndexIVF)
+        if ivf != (size >= IVF_MIN_SIZE) or not (ivf or isinstance(self.index, faiss.IndexIDMap2)):
+            return True
+        free = sum(vid is None for vid in self.vehicle_ids) + removed
+        if free > MAX_FREE_SHARE * len(self.vehicle_ids):
+            return True
+        if ivf:
+            # Lists sized for a much smaller or larger catalog, or centroids trained on old data
+            if not _nlist(size) / 2 <= self.index.nlist <= _nlist(size) * 2:
+                return True
+            if self.added_since_training + added > RETRAIN_SHARE * self.trained_size:
+                return True
+        return False
+
+    def _rebuild(self, order: List[str], hashes: Dict[str, str], matrix: np.ndarray):
+        """Write a fresh index over `matrix` (row i is order[i]), training IVF if the catalog is large."""
+        import faiss
+
+        ids = np.arange(len(order), dtype=np.int64)
+        if len(order) >= IVF_MIN_SIZE:
+            quantizer = faiss.IndexFlatIP(matrix.shape[1])
+            index = faiss.IndexIVFFlat(quantizer, matrix.shape[1], _nlist(len(order)), faiss.METRIC_INNER_PRODUCT)
+            index.train(matrix)
+        else:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(matrix.shape[1]))
+        index.add_with_ids(matrix, ids)
+        self._save(order, hashes, matrix, index, trained_size=len(order), added_since_training=0)
+
+    def _update(self, fresh: Dict[str, np.ndarray], removed: List[str], hashes: Dict[str, str]):
+        """
+        Replace changed vectors in place: removed and changed rows leave the
+        index, changed and new vehicles are added under their row number
+        (new vehicles take free rows first).
+        """
+        import faiss
+
+        order = list(self.vehicle_ids)
+        positions = dict(self.positions)
+        matrix = np.array(self.embeddings)
+        index = faiss.read_index(str(self.index_dir / "vectors.faiss"))
+
+        dropped = [positions.pop(vid) for vid in removed]
+        for row in dropped:
+            order[row] = None
+            matrix[row] = 0.0
+        index.remove_ids(np.array(dropped + [positions[vid] for vid in fresh if vid in positions], dtype=np.int64))
+
+        free = iter([row for row, vid in enumerate(order) if vid is None])
+        for vid in fresh:
+            if vid not in positions:
+                row = next(free, None)
+                if row is None:
+                    row = len(order)
+                    order.append(None)
+                order[row] = vid
+                positions[vid] = row
+        if len(order) > matrix.shape[0]:
+            matrix = np.concatenate([matrix, np.zeros((len(order) - matrix.shape[0], matrix.shape[1]), np.float32)])
+
+        if fresh:
+            rows = np.array([positions[vid] for vid in fresh], dtype=np.int64)
+            vectors = np.stack(list(fresh.values())).astype(np.float32)
+            matrix[rows] = vectors
+            index.add_with_ids(vectors, rows)
+        self._save(order, hashes, matrix, index, self.trained_size, self.added_since_training + len(fresh))
+
+    def _save(self, order: List[Optional[str]], hashes: Dict[str, str], matrix: np.ndarray, index,
+              trained_size: int, added_since_training: int):
+        import faiss
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        # Drop the old mapping before overwriting the file underneath it
+        self.embeddings, self.index = None, None
+
+        np.save(self.index_dir / "embeddings.npy", matrix)
+        faiss.write_index(index, str(self.index_dir / "vectors.faiss"))
+
+        manifest = {"model": self.model_name, "vehicle_ids": order, "hashes": hashes,
+                    "trained_size": trained_size, "added_since_training": added_since_training}
+        with open(self.index_dir / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def load(self) -> bool:
+        """Memory-map a previously built index. Returns False if none exists."""
+        manifest_path = self.index_dir / "manifest.json"
+        if not manifest_path.exists():
+            return False
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("model") != self.model_name:
+            return False
+
+        import faiss
+
+        self.vehicle_ids = manifest["vehicle_ids"]
+        self.positions = {vid: i for i, vid in enumerate(self.vehicle_ids) if vid is not None}
+        self.hashes = manifest["hashes"]
+        self.trained_size = manifest.get("trained_size", 0)
+        self.added_since_training = manifest.get("added_since_training", 0)
+        self.embeddings = np.load(self.index_dir / "embeddings.npy", mmap_mode="r")
+        index_path = str(self.index_dir / "vectors.faiss")
+        try:
+            self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            self.index = faiss.read_index(index_path)
+        if isinstance(self.index, faiss.IndexIVF):
+            self.index.nprobe = IVF_NPROBE
+        return True
+
+    # ------------------------------------------
+    # Query
+    # ------------------------------------------
+    def search(self, query: str, k: int = 5, candidates: List[str] = None) -> List[Tuple[str, float]]:
+        """
+        Return up to `k` (vehicle_id, score) pairs, best first.
+        `candidates` restricts the result to those vehicle_ids (hybrid search).
+        """
+        if self.index is None or not self.positions:
+            return []
+        vector = self.embed([query])[0].astype(np.float32)
+
+        if candidates is not None:
+            rows = np.sort(np.fromiter(
+                (self.positions[v] for v in candidates if v in self.positions), dtype=np.int64))
+            if rows.size <= EXACT_RERANK_LIMIT:
+                scores = self.embeddings[rows] @ vector
+                top = np.argsort(-scores, kind="stable")[:k]
+                return [(self.vehicle_ids[rows[i]], float(scores[i])) for i in top]
+            allowed = np.zeros(len(self.vehicle_ids), dtype=bool)
+            allowed[rows] = True
+        else:
+            allowed = None
+
+        # Over-fetch from FAISS until enough hits survive the filter
+        fetch = k if allowed is None else k * 4
+        while True:
+            fetch = min(fetch, self.index.ntotal)
+            scores, ids = self.index.search(vector[None, :], fetch)
+            hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0])
+                    if i >= 0 and (allowed is None or allowed[i])]
+            if len(hits) >= k or fetch == self.index.ntotal:
+                return [(self.vehicle_ids[i], s) for i, s in hits[:k]]
+            fetch *= 4
+
+
+# ==========================================
+# Shared instance over CAR_INVENTORY
+# ==========================================
+_INDEX: Optional[SemanticIndex] = None
+_INDEX_VERSION: Optional[int] = None
+
+
+def get_semantic_index() -> SemanticIndex:
+    """
+    Load the persisted index, embedding only vehicles that changed since the
+    last build. Re-syncs whenever the inventory version moves.
+    """
+    global _INDEX, _INDEX_VERSION
+    from data.car_database import iter_inventory_records, get_inventory_version
+
+    version = get_inventory_version()
+    if _INDEX is None:
+        _INDEX = SemanticIndex()
+        _INDEX.load()
+    if _INDEX_VERSION != version:
+        _INDEX.build(list(iter_inventory_records()))
+        _INDEX_VERSION = version
+    return _INDEX
+
+
+def semantic_search_inventory(query: str, limit: int = 5, **filters) -> List[VehicleSpecs]:
+    """
+    Hybrid search: apply the structured search_inventory filters, then rank
+    the survivors by similarity to `query` ("safe car for new parents").
+    """
+    from data.car_database import match_vehicle_ids, get_vehicle_by_id
+
+    candidates = None
+    if any(filters.values()):
+        candidates = match_vehicle_ids(**filters)
+        if not candidates:
+            return []
+
+    hits = get_semantic_index().search(query, k=limit, candidates=candidates)
+    return [get_vehicle_by_id(vid) for vid, _ in hits]
@@ -1,100 +1,236 @@
 import os
 import sys
+import time
 import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 from openai import OpenAI
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.types import Send
+from langgraph.config import get_stream_writer
 
 # --- SETUP PATHS ---
 root_dir = Path(__file__).parent.parent
 sys.path.append(str(root_dir))
 
-from schema import ConversationState, Message
-from tools.car_tools import execute_tool
+from schema import ConversationState, Message, ResearchResult, RouterDecision, InventorySearchRequest
+from tools.car_tools import execute_tool, submit_tool, is_web_search_cached
+from tools.speculation import Speculator, call_key
+from data.comparison import resolve_comparison
+from data.name_resolver import get_name_resolver
+from data.car_database import get_vehicle_types, get_brands
+from agents.intent_classifier import get_intent_classifier, extract_search, log_turn, LOG_ROUTER_TURNS
 from agents.personas import GLOBAL_EXPERT_PROMPT 
+from agents.speech_scrubber import SpeechScrubber
 
 load_dotenv(override=True)
 client = OpenAI()
 
+# Seconds a single turn may spend in tools before they are cut off
+TURN_BUDGET_S = float(os.getenv("CARASTRA_TURN_BUDGET", 20))
+
+# Most research workers allowed to hit the search backend at once
+MAX_PARALLEL_SEARCHES = int(os.getenv("CARASTRA_MAX_PARALLEL_SEARCHES", 4))
+_search_slots = threading.BoundedSemaphore(MAX_PARALLEL_SEARCHES)
+# Upper bound on targets per turn, whatever the router emits
+MAX_TARGETS = 6
+
+# Speculative mode: a web search is started during routing only if the query
+# is cached or the local classifier gives WEB at least this probability
+SPECULATE_WEB_MIN = float(os.getenv("CARASTRA_SPECULATE_WEB_MIN", 0.3))
+speculator = Speculator(submit_tool)
+
 # ==========================================
 # NODE 1: THE ROUTER (UPDATED)
 # ==========================================
-def router_node(state: ConversationState):
-    """
-    Decides if we need Local, Web, Chat, OR 'COMPARE' (Parallel).
-    """
-    last_msg = state.messages[-1].content
-    print(f"\n🚦 [ROUTER] Analyzing: '{last_msg}'")
-    
-    # We ask GPT to classify. If comparison, we ask it to split the query.
-    response = client.chat.completions.create(
+ROUTER_PROMPT = """
+Route the user's message and extract everything the next step needs.
+
+intent:
+  LOCAL   - asking what we have in stock / our inventory
+  WEB     - general price, news or spec questions about the wider market
+  CHAT    - casual chat
+  COMPARE - comparing two or more cars (e.g. "BMW vs Audi")
+
+search (fill for LOCAL, otherwise leave every field null or empty):
+  budget_max in rupees ("15 lakh" = 1500000), vehicle_type (one of: {types}),
+  fuel_type (petrol, diesel, electric, cng, hybrid), seating_min, brand (e.g. {brands}),
+  features_all / features_any as short phrases ("sunroof", "6 airbags"),
+  sort_by (price, -price, mileage, safety_rating, power; "-" means descending).
+  Leave limit and cursor null.
+
+comparison_targets:
+  COMPARE - one car name per entry, as the user said it ("BMW X5", "Audi Q7")
+  WEB     - only if the question has several independent parts, one sub-query each
+  otherwise empty.
+"""
+
+def llm_route(last_msg: str) -> RouterDecision:
+    """One structured-output call: intent, inventory filters and comparison targets."""
+    prompt = ROUTER_PROMPT.format(types=", ".join(get_vehicle_types()), brands=", ".join(get_brands()[:12]))
+    response = client.chat.completions.parse(
         model="gpt-4o",
         temperature=0.0, 
         messages=[
-            {"role": "system", "content": """
-             Classify the user intent.
-             
-             1. If asking for stock/inventory -> Output: LOCAL
-             2. If asking for general price/info -> Output: WEB
-             3. If casual chat -> Output: CHAT
-             4. If asking to COMPARE two cars (e.g. "BMW vs Audi") -> Output: COMPARE|Car1 Name|Car2 Name
-                (Example: "COMPARE|BMW X5|Audi Q7")
-             """},
+            {"role": "system", "content": prompt},
             {"role": "user", "content": last_msg}
-        ]
+        ],
+        response_format=RouterDecision
     )
     
-    decision_raw = response.choices[0].message.content.strip()
-    
-    # Parse the decision
-    if "COMPARE" in decision_raw:
-        # Format is "COMPARE|Car A|Car B"
-        parts = decision_raw.split("|")
-        return {
-            "tool_used": "COMPARE",
-            "parallel_query_1": parts[1] if len(parts) > 1 else "Car 1",
-            "parallel_query_2": parts[2] if len(parts) > 2 else "Car 2"
-        }
-    else:
-        # Standard Single Path
-        return {"tool_used": decision_raw.upper()}
+    # A refusal has no parsed object; treat it as chat
+    return response.choices[0].message.parsed or RouterDecision(intent="CHAT")
+
+def fast_path_decision(text: str) -> Optional[RouterDecision]:
+    """
+    Decision from the local intent classifier, or None to ask the LLM.
+    COMPARE needs two cars the resolver can name; otherwise the LLM has to
+    work out the targets.
+    """
+    classifier = get_intent_classifier()
+    accepted = classifier.accept(text)
+    decision = None
+    if accepted is not None:
+        intent, confidence, source = accepted
+        if intent == "LOCAL":
+            decision = RouterDecision(intent="LOCAL", search=extract_search(text, get_vehicle_types(), get_brands()))
+        elif intent == "COMPARE":
+            spans = list(dict.fromkeys(span for span, _ in get_name_resolver().find_mentions(text)))
+            if len(spans) > 1:
+                decision = RouterDecision(intent="COMPARE", comparison_targets=spans)
+        else:
+            decision = RouterDecision(intent=intent)
+        if decision is not None:
+            print(f"   ⚡ [FAST PATH] {intent} ({source}, {confidence:.2f})")
+    classifier.record(accepted[2] if decision is not None else None)
+    return decision
+
+def planned_tool_call(text: str, intent: str, search_request: Optional[InventorySearchRequest], targets: List[str]):
+    """
+    (tool, params) the specialist node will run for this decision, or None
+    (chat, fan-out and local-only comparisons do not map to a single call).
+    """
+    if "LOCAL" in intent:
+        params = search_request.model_dump(exclude_none=True) if search_request else {}
+        filtered = any(v for k, v in params.items() if k not in ("sort_by", "limit", "cursor"))
+        # Named cars ("is the kreta in stock?") are looked up directly. A bare word
+        # like "city" is never a car on its own, and with filters only an exact
+        # name counts, so "best car for city driving under 10 lakh" stays a search
+        resolver = get_name_resolver()
+        vehicle_ids = list(dict.fromkeys(
+            vid for span, vid in resolver.find_mentions(text)
+            if not resolver.is_common_word(span) and (not filtered or resolver.is_unambiguous(span))
+        ))
+        if vehicle_ids:
+            return "compare_inventory", {"vehicle_ids": vehicle_ids}
+        # Only the filters the router extracted, so the query stays selective
+        return "search_inventory", params
+    if "WEB" in intent and not targets:
+        return "web_search_cars", {"query": text}
+    return None
+
+def speculative_calls(text: str) -> Dict[str, Any]:
+    """Calls worth starting before the router answers: the cheap local lookup always, the web search if likely."""
+    calls = {"local": planned_tool_call(text, "LOCAL", extract_search(text, get_vehicle_types(), get_brands()), [])}
+    if is_web_search_cached(text) or get_intent_classifier().probabilities(text)["WEB"] >= SPECULATE_WEB_MIN:
+        calls["web"] = planned_tool_call(text, "WEB", None, [])
+    return calls
+
+def router_node(state: ConversationState, speculative: bool = False):
+    """
+    Confident turns are routed by the local classifier; the rest go to the LLM.
+    In speculative mode the likely tool calls run while the LLM decides.
+    """
+    last_msg = state.messages[-1].content
+    print(f"\n🚦 [ROUTER] Analyzing: '{last_msg}'")
+    deadline = time.time() + TURN_BUDGET_S
+
+    decision = fast_path_decision(last_msg)
+    speculations = []
+    if decision is None:
+        if speculative:
+            speculations = speculator.start(speculative_calls(last_msg), deadline)
+        decision = llm_route(last_msg)
+        # LLM-labelled turns train the next classifier (CARASTRA_LOG_ROUTER_TURNS=1)
+        if LOG_ROUTER_TURNS:
+            log_turn(last_msg, decision.intent)
+    decided_at = time.perf_counter()
+    targets = [t.strip() for t in decision.comparison_targets if t.strip()][:MAX_TARGETS]
+
+    # Cars we stock are compared locally; only the rest go to the web
+    comparison_ids = []
+    if decision.intent == "COMPARE":
+        request, targets = resolve_comparison(targets)
+        comparison_ids = request.vehicle_ids
+
+    prefetched = {}
+    if speculations:
+        planned = planned_tool_call(last_msg, decision.intent, decision.search, targets)
+        prefetched = speculator.settle(speculations, [planned] if planned else [], decided_at, deadline)
+        print(f"   🔮 [SPECULATION] kept {len(prefetched)}/{len(speculations)}")
+
+    return {
+        "tool_used": decision.intent,
+        "search_request": decision.search,
+        "comparison_ids": comparison_ids,
+        "comparison_targets": targets,
+        "research_results": [],  # clear the previous turn's fan-out
+        "prefetched": prefetched,
+        "deadline": deadline
+    }
+
+def speculative_router_node(state: ConversationState):
+    return router_node(state, speculative=True)
+
+def run_planned_tool(state: ConversationState) -> str:
+    """Runs the router's planned call, unless a speculative run already has the result."""
+    tool, params = planned_tool_call(state.messages[-1].content, state.tool_used, state.search_request,
+                                     state.comparison_targets)
+    prefetched = state.prefetched.get(call_key(tool, params))
+    if prefetched is not None:
+        return prefetched
+    return execute_tool(tool, params, deadline=state.deadline)
 
 # ==========================================
 # NODE 2: LOCAL SPECIALIST
 # ==========================================
 def local_specialist_node(state: ConversationState):
     print("   └── 🏢 [LOCAL AGENT] Checking Showroom Inventory...")
-    last_msg = state.messages[-1].content
-    result = execute_tool("search_inventory", {"query": last_msg})
-    return {"messages": [Message(role="assistant", content=result)]}
+    return {"messages": [Message(role="assistant", content=run_planned_tool(state))]}
 
 # ==========================================
 # NODE 3: GLOBAL RESEARCHER (Standard)
 # ==========================================
 def global_researcher_node(state: ConversationState):
     print("   └── 🌍 [WEB AGENT] Searching Internet...")
-    last_msg = state.messages[-1].content
-    result = execute_tool("web_search_cars", {"query": last_msg})
-    return {"messages": [Message(role="assistant", content=result)]}
+    return {"messages": [Message(role="assistant", content=run_planned_tool(state))]}
 
 # ==========================================
-# 🆕 NODE 3.1 & 3.2: PARALLEL RESEARCHERS
+# 🆕 NODE 3.1: PARALLEL RESEARCHERS (map / reduce)
 # ==========================================
-def research_worker_1(state: ConversationState):
-    # Searches for Car 1
-    query = state.parallel_query_1
-    print(f"   └── 🏎️  [WORKER 1] Searching for '{query}'...")
-    result = execute_tool("web_search_cars", {"query": query})
-    return {"messages": [Message(role="assistant", content=f"SPECS FOR {query}: {result}")]}
-
-def research_worker_2(state: ConversationState):
-    # Searches for Car 2
-    query = state.parallel_query_2
-    print(f"   └── 🚙 [WORKER 2] Searching for '{query}'...")
-    result = execute_tool("web_search_cars", {"query": query})
-    return {"messages": [Message(role="assistant", content=f"SPECS FOR {query}: {result}")]}
+def research_worker(task: Dict[str, Any]):
+    """
+    One fan-out branch: searches for a single target.
+    `task` is the Send payload (index, query, deadline), not the full state.
+    """
+    query = task["query"]
+    print(f"   └── 🏎️  [WORKER {task['index'] + 1}] Searching for '{query}'...")
+    with _search_slots:
+        result = execute_tool("web_search_cars", {"query": query}, deadline=task["deadline"])
+    return {"research_results": [ResearchResult(index=task["index"], query=query, content=result)]}
+
+def merge_research_node(state: ConversationState):
+    """Joins the local comparison and the worker results (in target order) into one message."""
+    label = "SPECS FOR" if "COMPARE" in state.tool_used else "RESULTS FOR"
+    parts = []
+    if state.comparison_ids:
+        print(f"   └── 🏢 [LOCAL COMPARE] {len(state.comparison_ids)} cars in stock")
+        parts.append(execute_tool("compare_inventory", {"vehicle_ids": state.comparison_ids}, deadline=state.deadline))
+    parts.extend(f"{label} {r.query}: {r.content}" for r in state.research_results)
+    return {"messages": [Message(role="assistant", content="\n\n".join(parts))]}
 
 # ==========================================
 # NODE 4: J.A.R.V.I.S
@@ -102,6 +238,8 @@ def research_worker_2(state: ConversationState):
 def voice_synthesizer_node(state: ConversationState):
     """
     Acts as the 'Voice'. Cleans text for audio so it sounds natural.
+    Tokens are streamed out as they arrive (stream_mode="custom" yields
+    {"token": text}); the returned message holds the whole answer.
     """
     # Grab context (works for both single and parallel paths)
     recent_context = "\n".join([m.content for m in state.messages[-3:]])
@@ -113,22 +251,31 @@ def voice_synthesizer_node(state: ConversationState):
         "\n\nTASK: Rewrite the data above into smooth SPOKEN text. No headers. No 'Verdict' titles."
     )
 
-    response = client.chat.completions.create(
+    stream = client.chat.completions.create(
         model="gpt-4o",
         messages=[
             {"role": "system", "content": system_instruction},
             {"role": "user", "content": f"Data Found: {recent_context}"}
-        ]
+        ],
+        stream=True
     )
 
-    final_text = response.choices[0].message.content
-
-    # 🛡️ SAFETY SCRUBBER: Remove "robotic" formatting
-    # This removes bolding, headers, and common AI titles
-    clean_text = final_text.replace("**", "").replace("###", "").replace("##", "")
-    clean_text = clean_text.replace("Verdict:", "").replace("Conclusion:", "").replace("Comparison:", "")
+    # 🛡️ SAFETY SCRUBBER: Remove "robotic" formatting (bolding, headers, AI titles) as tokens arrive
+    writer = get_stream_writer()
+    scrubber = SpeechScrubber()
+    parts = []
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        clean = scrubber.feed(delta) if delta else ""
+        if clean:
+            parts.append(clean)
+            writer({"token": clean})
+    tail = scrubber.flush()
+    if tail:
+        parts.append(tail)
+        writer({"token": tail})
     
-    return {"messages": [Message(role="assistant", content=clean_text)]}
+    return {"messages": [Message(role="assistant", content="".join(parts))]}
 
 # ==========================================
 # LOGIC & GRAPH DEFINITION
@@ -136,8 +283,15 @@ def voice_synthesizer_node(state: ConversationState):
 def route_logic(state: ConversationState):
     decision = state.tool_used
     
-    if "COMPARE" in decision:
-        return ["worker_1", "worker_2"] # <--- 🚀 RETURNS A LIST (PARALLEL)
+    if state.comparison_targets and ("COMPARE" in decision or "WEB" in decision):
+        # 🚀 One worker per target (PARALLEL)
+        return [
+            Send("research_worker", {"index": i, "query": target, "deadline": state.deadline})
+            for i, target in enumerate(state.comparison_targets)
+        ]
+    elif "COMPARE" in decision:
+        # Every car is in stock: no web round-trip
+        return "merge"
     elif "LOCAL" in decision: 
         return "local"
     elif "WEB" in decision: 
@@ -145,17 +299,21 @@ def route_logic(state: ConversationState):
     else: 
         return "synthesizer"
 
-def get_multi_agent_app():
+def get_multi_agent_app(speculative: bool = False):
+    """
+    Compiled graph. speculative=True overlaps the likely tool calls with the
+    router's LLM call (see tools/speculation.py; metrics in speculator.stats()).
+    """
     workflow = StateGraph(ConversationState)
     
     # Add Nodes
-    workflow.add_node("router", router_node)
+    workflow.add_node("router", speculative_router_node if speculative else router_node)
     workflow.add_node("local_specialist", local_specialist_node)
     workflow.add_node("global_researcher", global_researcher_node)
     
-    # 🆕 Add Parallel Nodes
-    workflow.add_node("worker_1", research_worker_1)
-    workflow.add_node("worker_2", research_worker_2)
+    # 🆕 Add Fan-out Nodes
+    workflow.add_node("research_worker", research_worker)
+    workflow.add_node("merge_research", merge_research_node)
     
     workflow.add_node("JARVIS", voice_synthesizer_node)
     
@@ -169,8 +327,8 @@ def get_multi_agent_app():
         {
             "local": "local_specialist", 
             "web": "global_researcher", 
-            "worker_1": "worker_1", # Path A
-            "worker_2": "worker_2", # Path B
+            "research_worker": "research_worker", # Fan-out (one Send per target)
+            "merge": "merge_research", # Local-only comparison
             "synthesizer": "JARVIS" 
         }
     )
@@ -178,8 +336,8 @@ def get_multi_agent_app():
     # Standard Edges (All roads lead to JARVIS)
     workflow.add_edge("local_specialist", "JARVIS")
     workflow.add_edge("global_researcher", "JARVIS")
-    workflow.add_edge("worker_1", "JARVIS") # Merge point
-    workflow.add_edge("worker_2", "JARVIS") # Merge point
+    workflow.add_edge("research_worker", "merge_research") # Waits for every worker
+    workflow.add_edge("merge_research", "JARVIS")
     workflow.add_edge("JARVIS", END)
     
     # Memory
@@ -1,139 +1,124 @@
 import os
 import sys
 import time
-import pygame
-import speech_recognition as sr
-import numpy as np
-import pyaudio
-import uuid
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 from openai import OpenAI
 from graph.multi_agent_graph import get_multi_agent_app
 from schema import ConversationState, Message
+from voice.speech_engine import SpeechEngine, OpenAISynthesizer
+from voice.audio_session import get_audio_session
+from voice.tts_cache import CachedSynthesizer
+from voice.barge_in import BargeInDetector
+from voice.capture import UtteranceCapture, VoicePipeline
 
 # Setup
 load_dotenv(override=True)
 client = OpenAI()
-pygame.mixer.init()
 
 # ==========================================
 # SHARED: TEXT-TO-SPEECH (TTS)
 # ==========================================
-def speak_real_voice(text, enable_voice=True):
+# One PyAudio instance and mic stream for the whole session; audio never hits the disk
+audio_session = get_audio_session()
+
+# Fixed phrases are synthesized once (preloaded in the background when a spoken mode starts) and replayed from disk
+FIXED_PHRASES = [
+    "Voice mode active. I am listening.",
+    "Hybrid mode initialized. Awaiting input.",
+    "Powering down, Sir.",
+    "Powering down.",
+]
+TTS_FORMAT = "pcm"
+tts = CachedSynthesizer(OpenAISynthesizer(client, voice="onyx", response_format=TTS_FORMAT))
+
+# Sentences are synthesized in parallel (raw PCM) and played as soon as each is ready
+speech_engine = SpeechEngine(tts, audio_session.player(TTS_FORMAT))
+
+# Speech must reach this level (dBFS), so loud speaker echo does not count as the user
+MIN_SPEECH_DB = float(os.getenv("CARASTRA_BARGE_IN_MIN_DB", -40))
+
+# Barge-in: voice activity detection on the mic ring buffer (adaptive noise floor,
+# energy + zero-crossing rate), woken by the audio callback instead of polling
+barge_in = BargeInDetector(audio_session.ring, audio_session.mic_rate, min_speech_db=MIN_SPEECH_DB)
+
+def speak_stream(chunks):
+    """Speaks text as it arrives (whole answers or LLM tokens); returns False on barge-in."""
+    print("   (Speak to interrupt him...)")
+    interrupt = threading.Event()
+    # Voice capture drops what it hears while Jarvis talks, unless it was a barge-in
+    capture = voice_pipeline.capture
+    try:
+        audio_session.open()
+        capture.playback_started()
+        barge_in.start(interrupt, on_trigger=capture.barge_in)
+        return speech_engine.speak_stream(chunks, interrupt)
+    except Exception as e:
+        print(f"Error in TTS: {e}")
+        return False
+    finally:
+        barge_in.stop()
+        capture.playback_ended()
+
+def speak_real_voice(text, enable_voice=True, echo=True):
     """
     Plays audio using OpenAI Onyx voice.
-    If enable_voice is False, it just prints the text.
+    If enable_voice is False, it just prints the text
+    (echo=False when the text was already streamed to the console).
     """
-    print(f"\n🗣️  J.A.R.V.I.S: {text}")
+    if echo:
+        print(f"\n🗣️  J.A.R.V.I.S: {text}")
     
     if not enable_voice:
         return # Exit if silent mode
 
-    print("   (Speak LOUDLY to interrupt him...)")
-    
-    filename = f"response_{uuid.uuid4().hex[:8]}.mp3"
-    speech_file_path = Path(__file__).parent / filename
-    
-    mic_stream = None
-    p = None
-    
-    try:
-        # Generate MP3
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="onyx",
-            input=text
-        )
-        response.stream_to_file(speech_file_path)
-        
-        # Play Audio
-        chunk = 1024
-        p = pyaudio.PyAudio()
-        pygame.mixer.music.load(str(speech_file_path))
-        pygame.mixer.music.play()
-        
-        # Interruption Logic
-        mic_stream = p.open(format=pyaudio.paInt16, channels=1, rate=44100, input=True, frames_per_buffer=chunk)
-        start_time = time.time()
-        
-        while pygame.mixer.music.get_busy():
-            # Grace period (prevents immediate self-interruption)
-            if time.time() - start_time < 1.0:
-                time.sleep(0.1)
-                continue
-
-            try:
-                data = mic_stream.read(chunk, exception_on_overflow=False)
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                volume = np.linalg.norm(audio_data)
-                
-                # === THRESHOLD SETTING ===
-                # High threshold so background noise does not stop Jarvis.
-                THRESHOLD = 160000 
-                
-                if volume > THRESHOLD:
-                    print(f"\n🛑 Interrupted! (Vol: {int(volume)})")
-                    pygame.mixer.music.stop()
-                    break
-            except:
-                pass
-            time.sleep(0.01)
-            
-    except Exception as e:
-        print(f"Error in TTS: {e}")
-    
-    finally:
-        if mic_stream: mic_stream.stop_stream(); mic_stream.close()
-        if p: p.terminate()
-        pygame.mixer.music.unload() 
-        try:
-            if os.path.exists(speech_file_path): os.remove(speech_file_path)
-        except: pass
+    speak_stream([text])
 
 # ==========================================
 # SHARED: SPEECH-TO-TEXT (STT)
 # ==========================================
-recognizer = sr.Recognizer()
-def listen_mic():
-    with sr.Microphone() as source:
-        print("\n🎤 Listening... (Speak now)")
-        # High threshold for your loud mic
-        recognizer.energy_threshold = 4000 
-        recognizer.dynamic_energy_threshold = False 
-        try:
-            audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-            print("⏳ Processing...")
-            text = recognizer.recognize_google(audio)
-            print(f"👤 You: {text}")
-            return text
-        except:
-            return None
+# The mic keeps capturing in the background: utterances are endpointed on the
+# ring buffer and recognized while the previous turn is still being answered
+voice_pipeline = VoicePipeline(UtteranceCapture(audio_session.ring, audio_session.mic_rate,
+                                                min_speech_db=MIN_SPEECH_DB))
 
 # ==========================================
 def process_and_respond(app, config, user_input, enable_voice):
     try:
         input_message = Message(role="user", content=user_input)
         
-        # Send to LangGraph (Standard Invoke)
-        # Note: If your graph still has 'interrupt_before=["booking_node"]', remove it in multi_agent_graph.py
-        # Otherwise, this invoke will just pause silently if booking happens.
-        # But since you asked to remove HITL logic here, we assume standard invoke.
+        # The synthesizer streams its tokens (stream_mode="custom"), so the
+        # answer is printed (and spoken, sentence by sentence) as it is generated
+        parts = []
+        def tokens():
+            for event in app.stream({"messages": [input_message]}, config=config, stream_mode="custom"):
+                token = event.get("token") if isinstance(event, dict) else None
+                if not token:
+                    continue
+                if not parts:
+                    print("\n🗣️  J.A.R.V.I.S: ", end="", flush=True)
+                print(token, end="", flush=True)
+                parts.append(token)
+                yield token
         
-        # Use stream to handle potentially multiple outputs (like parallel)
-        final_response = ""
-        for event in app.stream({"messages": [input_message]}, config=config):
-            # We iterate through events until the end
+        stream = tokens()
+        if enable_voice:
+            speak_stream(stream)
+        # Finish the run even after a barge-in so the answer is checkpointed
+        for _ in stream:
             pass
-            
-        # Get Final State to read the answer
+        
+        if parts:
+            print()
+            return
+        
+        # Nothing streamed (e.g. a node that does not stream): read the final state
         snapshot = app.get_state(config)
         if snapshot.values['messages']:
-            # Get the very last message
             last_msg = snapshot.values['messages'][-1]
             if last_msg.role == "assistant":
-                ai_response = last_msg.content
-                speak_real_voice(ai_response, enable_voice=enable_voice)
+                speak_real_voice(last_msg.content, enable_voice=enable_voice)
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -143,14 +128,22 @@ def process_and_respond(app, config, user_input, enable_voice):
 # ==========================================
 def run_voice_mode(app, config):
     print("\n🔹 STARTING VOICE MODE 🔹")
+    tts.preload(FIXED_PHRASES)
+    audio_session.open()
     speak_real_voice("Voice mode active. I am listening.", enable_voice=True)
-    while True:
-        user_input = listen_mic()
-        if not user_input: continue
-        if user_input.lower() in ["exit", "quit", "stop"]:
-            speak_real_voice("Powering down, Sir.", enable_voice=True)
-            break
-        process_and_respond(app, config, user_input, enable_voice=True)
+    # Listen only after the greeting, so it is not heard as a user turn
+    voice_pipeline.start()
+    try:
+        while True:
+            print("\n🎤 Listening... (Speak now)")
+            user_input = voice_pipeline.next_text()
+            print(f"👤 You: {user_input}")
+            if user_input.lower() in ["exit", "quit", "stop"]:
+                speak_real_voice("Powering down, Sir.", enable_voice=True)
+                break
+            process_and_respond(app, config, user_input, enable_voice=True)
+    finally:
+        voice_pipeline.stop()
 
 def run_text_mode(app, config):
     print("\n🔹 STARTING TEXT MODE 🔹")
@@ -166,6 +159,7 @@ def run_text_mode(app, config):
 def run_hybrid_mode(app, config):
     print("\n🔹 STARTING HYBRID MODE 🔹")
     print("(You Type -> Jarvis Speaks)")
+    tts.preload(FIXED_PHRASES)
     speak_real_voice("Hybrid mode initialized. Awaiting input.", enable_voice=True)
     while True:
         user_input = input("\n👤 You (Type): ").strip()
@@ -179,7 +173,8 @@ def run_hybrid_mode(app, config):
 # MAIN MENU
 # ==========================================
 if __name__ == "__main__":
-    app = get_multi_agent_app()
+    # CARASTRA_SPECULATIVE=1 overlaps likely tool calls with the router's LLM call
+    app = get_multi_agent_app(speculative=os.getenv("CARASTRA_SPECULATIVE", "0") == "1")
     
     # Persistent Memory (Remembers you across restarts)
     # Uncomment the line below to enable long-term memory
@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any, Literal, Annotated
 import operator
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 
 # === Agent Types ===
@@ -29,13 +29,41 @@ class VehicleSpecs(BaseModel):
     stock_status: str
 
 # === 2. Tool Request Schemas ===
+# Single-key sorts the router may ask for (data.inventory_store.SORT_KEYS, "-" flips direction)
+SortKey = Literal["price", "-price", "mileage", "-mileage", "safety_rating", "-safety_rating", "power", "-power"]
+
 class InventorySearchRequest(BaseModel):
     budget_max: Optional[float] = None
     vehicle_type: Optional[str] = None
     fuel_type: Optional[str] = None
     seating_min: Optional[int] = None
     brand: Optional[str] = None
-    sort_by: Optional[str] = None
+    features_all: List[str] = Field(default_factory=list)
+    features_any: List[str] = Field(default_factory=list)
+    features_none: List[str] = Field(default_factory=list)
+    airbags_min: Optional[int] = None
+    sort_by: Optional[SortKey] = None
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+    @field_validator("sort_by", mode="before")
+    @classmethod
+    def _known_sort_key(cls, value):
+        """An unknown sort key ("relevance") means no sort rather than a failed search."""
+        return value if value in SortKey.__args__ else None
+
+class RouterDecision(BaseModel):
+    """Everything the router decides for a turn, returned by one structured-output call."""
+    intent: Literal["LOCAL", "WEB", "CHAT", "COMPARE"]
+    # Filters for LOCAL turns (leave fields null when the user gave no constraint)
+    search: InventorySearchRequest = Field(default_factory=InventorySearchRequest)
+    # COMPARE: one car name per entry; WEB: independent sub-queries, if any
+    comparison_targets: List[str] = Field(default_factory=list)
+
+class InventoryPage(BaseModel):
+    items: List[VehicleSpecs] = Field(default_factory=list)
+    total: int = 0
+    next_cursor: Optional[str] = None
 
 class FinancingCalculation(BaseModel):
     vehicle_price: float
@@ -46,6 +74,17 @@ class FinancingCalculation(BaseModel):
 class ComparisonRequest(BaseModel):
     vehicle_ids: List[str]
 
+class VehicleComparison(BaseModel):
+    vehicles: List[VehicleSpecs] = Field(default_factory=list)
+    # metric -> one value per vehicle (None if unknown), in `vehicles` order
+    metrics: Dict[str, List[Optional[float]]] = Field(default_factory=dict)
+    # metric -> vehicle_id with the best value
+    best: Dict[str, str] = Field(default_factory=dict)
+    # vehicle_id -> price above the cheapest car
+    price_delta: Dict[str, float] = Field(default_factory=dict)
+    common_features: List[str] = Field(default_factory=list)
+    unique_features: Dict[str, List[str]] = Field(default_factory=dict)
+
 class DealOffer(BaseModel):
     vehicle_id: str
     vehicle_name: str
@@ -65,6 +104,22 @@ class CustomerProfile(BaseModel):
     preferences: List[str] = Field(default_factory=list)
     usage_type: Optional[str] = None
 
+class ResearchResult(BaseModel):
+    index: int      # position of the target in comparison_targets
+    query: str
+    content: str
+
+def merge_research(current: List[ResearchResult], update: List[ResearchResult]) -> List[ResearchResult]:
+    """
+    Reducer for fan-out results: keyed by index so the merged order never
+    depends on which worker finished first. An empty update clears the list.
+    """
+    if not update:
+        return []
+    merged = {r.index: r for r in current}
+    merged.update((r.index, r) for r in update)
+    return [merged[i] for i in sorted(merged)]
+
 # ==========================================
 # 🚨 STATE DEFINITION
 # ==========================================
@@ -74,8 +129,18 @@ class ConversationState(BaseModel):
     
     # Router Decisions
     tool_used: str = "CHAT"
-    parallel_query_1: Optional[str] = None
-    parallel_query_2: Optional[str] = None
+    # Filters the router extracted for the local specialist
+    search_request: Optional[InventorySearchRequest] = None
+    # Cars to compare that are in stock (diffed locally, no web search)
+    comparison_ids: List[str] = Field(default_factory=list)
+    # One research worker is dispatched per target (cars not in stock or sub-queries)
+    comparison_targets: List[str] = Field(default_factory=list)
+    research_results: Annotated[List[ResearchResult], merge_research] = Field(default_factory=list)
+    
+    # Absolute time.time() by which this turn's tool calls must finish
+    deadline: Optional[float] = None
+    # Speculative tool results the router kept, keyed by tools.speculation.call_key()
+    prefetched: Dict[str, str] = Field(default_factory=dict)
     
     # Booking Details (For Human-in-the-Loop)
     booking_details: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Single-flight coalescing of web searches, with a stub search client.
+N concurrent callers asking for the same query (threads, asyncio tasks, or
+both at once) must cause one upstream call and all get the same result; a
+failing upstream must reach every caller and not stick.
+"""
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tools import car_tools
+from tools.search_cache import SearchCache
+from tools.single_flight import SingleFlight
+
+CALLERS = 16
+LATENCY = 0.3
+
+
+class StubSearchClient:
+    """Stands in for TavilyClient: sleeps, counts calls, returns canned results."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, **kwargs) -> dict:
+        with self._lock:
+            self.calls += 1
+        time.sleep(LATENCY)
+        if self.fail:
+            raise ConnectionError("stub upstream down")
+        return {"results": [{"title": f"Review: {query}", "url": "https://example.com", "content": "Stub result."}]}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Factory for a stub client behind an empty, memory-only cache."""
+    def install(fail: bool = False) -> StubSearchClient:
+        client = StubSearchClient(fail)
+        monkeypatch.setattr(car_tools, "search_client", client)
+        monkeypatch.setattr(car_tools, "search_cache", SearchCache(db_path=None))
+        return client
+    return install
+
+
+def thread_burst(query: str, callers: int = CALLERS) -> list:
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        return list(pool.map(car_tools.web_search_cars_tool, [query] * callers))
+
+
+async def async_burst(query: str, callers: int = CALLERS) -> list:
+    return await asyncio.gather(*(car_tools.web_search_cars_async(query) for _ in range(callers)))
+
+
+def test_threads_share_one_call(stub):
+    client = stub()
+    results = thread_burst("creta review")
+    assert client.calls == 1
+    assert len(set(results)) == 1
+    assert "Review: creta review" in results[0]
+
+
+def test_asyncio_tasks_share_one_call(stub):
+    client = stub()
+    results = asyncio.run(async_burst("nexon ev range"))
+    assert client.calls == 1
+    assert len(set(results)) == 1
+    assert "Review: nexon ev range" in results[0]
+
+
+def test_mixed_callers_share_one_call(stub):
+    client = stub()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        threaded = pool.submit(thread_burst, "verna vs city")
+        awaited = asyncio.run(async_burst("verna vs city"))
+        results = threaded.result() + awaited
+    assert client.calls == 1
+    assert len(results) == 2 * CALLERS
+    assert len(set(results)) == 1
+
+
+def test_upstream_error_reaches_every_caller(stub):
+    client = stub(fail=True)
+    results = thread_burst("hector price")
+    assert client.calls == 1
+    assert all(r.startswith("Error during web search:") and "stub upstream down" in r for r in results)
+    # The failure is not cached or left in flight: the next burst calls upstream again
+    assert car_tools.search_flights.in_flight() == 0
+    asyncio.run(async_burst("hector price"))
+    assert client.calls == 2
+
+
+def test_exception_shared_by_waiting_threads():
+    flights, calls = SingleFlight(), []
+
+    def failing():
+        calls.append(1)
+        time.sleep(LATENCY)
+        raise ConnectionError("stub upstream down")
+
+    def caller(_):
+        with pytest.raises(ConnectionError):
+            flights.do("key", failing)
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        list(pool.map(caller, range(CALLERS)))
+    assert len(calls) == 1
+    assert flights.stats() == {"calls": 1, "shared": CALLERS - 1}
+    assert flights.in_flight() == 0
+
+
+def test_exception_shared_by_waiting_tasks():
+    flights, calls = SingleFlight(), []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(LATENCY)
+        raise ConnectionError("stub upstream down")
+
+    async def burst():
+        return await asyncio.gather(*(flights.do_async("key", failing) for _ in range(CALLERS)),
+                                    return_exceptions=True)
+
+    errors = asyncio.run(burst())
+    assert len(calls) == 1
+    assert all(isinstance(e, ConnectionError) for e in errors)
+    assert flights.in_flight() == 0
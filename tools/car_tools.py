@@ -11,9 +11,21 @@ load_dotenv(dotenv_path=env_path, override=True)
 # Add root to path so we can import schema
 sys.path.append(str(Path(__file__).parent.parent))
 
+import asyncio
+import functools
+from concurrent.futures import Future
 from typing import Dict, Any, List
-from tavily import TavilyClient
-from data.car_database import search_inventory
+import httpx
+from schema import ComparisonRequest
+from data.car_database import search_inventory_page, summarize_inventory
+from data.semantic_index import semantic_search_inventory
+from data.comparison import compare_vehicles, format_comparison
+from tools.search_cache import SearchCache, cache_key
+from tools.single_flight import SingleFlight
+from tools.runtime import ToolRuntime, DeadlineExceeded
+
+# Most cars rendered into one tool response; the rest is reported as a count
+MAX_TOOL_RESULTS = 10
 
 # --- 2. CHECK ALL API KEYS ---
 tavily_api_key = os.getenv("TAVILY_API_KEY")
@@ -43,84 +55,210 @@ else:
     print("⚠️ LangChain Tracing: NOT FOUND (App works, but no logs)")
 print("="*40 + "\n")
 
-# Initialize Tavily Client
-tavily = TavilyClient(api_key=tavily_api_key) if tavily_api_key else None
+# Shared async runtime: one event loop and one pooled HTTP client for every tool
+runtime = ToolRuntime()
 
-def web_search_cars_tool(query: str) -> str:
+class TavilySearch:
+    """Tavily search over the runtime's pooled HTTP client."""
+
+    URL = "https://api.tavily.com/search"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    async def search(self, **payload) -> Dict[str, Any]:
+        response = await runtime.http.post(
+            self.URL, json=payload, headers={"Authorization": f"Bearer {self.api_key}"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+# Client used by web_search_cars; anything with Tavily's .search() works (sync or async)
+search_client = TavilySearch(tavily_api_key) if tavily_api_key else None
+
+# Shared web search cache (set CARASTRA_SEARCH_CACHE to persist it across restarts)
+search_cache = SearchCache()
+
+# Concurrent identical searches share one outstanding request
+search_flights = SingleFlight()
+
+# Fire a backup search once one runs past the recent p95 (costs a second API call)
+HEDGE_WEB_SEARCH = os.getenv("CARASTRA_HEDGE_WEB_SEARCH", "0") == "1"
+
+SEARCH_DOMAINS = [
+    "caranddriver.com", "topgear.com", "edmunds.com", 
+    "autocarindia.com", "zigwheels.com", "mbusa.com", "ferrari.com",
+    "bikewale.com"
+]
+
+def set_search_client(client) -> None:
+    """Swap the web search client (e.g. a local stub for tests and benchmarks)."""
+    global search_client
+    search_client = client
+
+def _transient(error: Exception) -> bool:
+    """Network failures, rate limits and 5xx replies are worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+async def _tavily_results(query: str) -> List[Dict[str, Any]]:
+    """Raw Tavily results, trimmed to the fields we render."""
+    print(f"   (Tavily: Searching for '{query}'...)")
+    payload = dict(
+        query=query, 
+        search_depth="advanced",
+        max_results=5,
+        include_domains=SEARCH_DOMAINS
+    )
+    client = search_client
+    if asyncio.iscoroutinefunction(client.search):
+        request = lambda: client.search(**payload)
+    else:
+        request = lambda: asyncio.to_thread(client.search, **payload)
+    response = await runtime.call("tavily", request, retry_if=_transient, hedge=HEDGE_WEB_SEARCH)
+    return [
+        {
+            "title": result.get('title', 'No Title'),
+            "url": result.get('url', '#'),
+            "content": result.get('content', '')[:300], # Limit length
+        }
+        for result in response.get('results', [])
+    ]
+
+def _format_web_results(results: List[Dict[str, Any]]) -> str:
+    lines = ["Here is what I found on the web:"]
+    lines.extend(f"- {r['title']}: {r['content']} (Source: {r['url']})" for r in results)
+    return "\n".join(lines) + "\n"
+
+async def _web_search(params: Dict[str, Any]) -> str:
     """
     Searches the global web for car recommendations, prices, and specs.
+    Results are served from search_cache when the same query was seen recently,
+    and concurrent identical searches wait on a single request.
     """
-    if not tavily:
+    if not search_client:
         return "⚠️ Error: Web search is not enabled (missing TAVILY_API_KEY)."
     
-    print(f"   (Tavily: Searching for '{query}'...)")
-    
+    query = params.get("query", "")
     try:
-        response = tavily.search(
-            query=query, 
-            search_depth="advanced",
-            max_results=5,
-            include_domains=[
-                "caranddriver.com", "topgear.com", "edmunds.com", 
-                "autocarindia.com", "zigwheels.com", "mbusa.com", "ferrari.com",
-                "bikewale.com"
-            ]
+        flight = functools.partial(_tavily_results, query)
+        results = await search_cache.get_or_fetch_async(
+            query,
+            lambda: search_flights.do_async(cache_key(query, SEARCH_DOMAINS), flight),
+            domains=SEARCH_DOMAINS
         )
-        
-        results_text = "Here is what I found on the web:\n"
-        for result in response.get('results', []):
-            title = result.get('title', 'No Title')
-            url = result.get('url', '#')
-            content = result.get('content', '')[:300] # Limit length
-            results_text += f"- {title}: {content} (Source: {url})\n"
-            
-        return results_text
+        return _format_web_results(results)
         
     except Exception as e:
         return f"Error during web search: {str(e)}"
+
+def web_search_cars_tool(query: str) -> str:
+    """Blocking web search (runs on the tool runtime)."""
+    return execute_tool("web_search_cars", {"query": query})
+
+async def web_search_cars_async(query: str, deadline: float = None) -> str:
+    """Web search awaitable from any event loop."""
+    try:
+        return await asyncio.wrap_future(runtime.submit("web_search_cars", {"query": query}, deadline))
+    except DeadlineExceeded as e:
+        return f"⚠️ Web search did not finish in time ({e})."
     
 #rag is implemented here 
 
-def execute_tool(tool_name: str, params: Dict[str, Any]) -> str:
+def _search_inventory(params: Dict[str, Any]) -> str:
+    try:
+        page = search_inventory_page(
+            limit=min(params.get('limit') or MAX_TOOL_RESULTS, MAX_TOOL_RESULTS),
+            cursor=params.get('cursor'),
+            sort_by=params.get('sort_by'),
+            budget_max=params.get('budget_max'),
+            vehicle_type=params.get('vehicle_type'),
+            fuel_type=params.get('fuel_type'),
+            seating_min=params.get('seating_min'),
+            brand=params.get('brand'),
+            features_all=params.get('features_all'),
+            features_any=params.get('features_any'),
+            features_none=params.get('features_none'),
+            airbags_min=params.get('airbags_min')
+        )
+        
+        if not page.items:
+            return "No matching cars found in local inventory."
+        
+        lines = [f"Found {page.total} cars in our LOCAL STOCK (showing {len(page.items)}):"]
+        lines.extend(f"- {car.name}: ₹{car.price:,.0f}" for car in page.items)
+        if page.next_cursor:
+            lines.append(f"...more available (cursor: {page.next_cursor}).")
+        return "\n".join(lines) + "\n"
+        
+    except Exception as e:
+        return f"Error searching inventory: {e}"
+
+def _semantic_search(params: Dict[str, Any]) -> str:
+    try:
+        results = semantic_search_inventory(
+            params.get("query", ""),
+            limit=params.get("limit") or 5,
+            budget_max=params.get('budget_max'),
+            vehicle_type=params.get('vehicle_type'),
+            fuel_type=params.get('fuel_type'),
+            seating_min=params.get('seating_min'),
+            brand=params.get('brand')
+        )
+
+        if not results:
+            return "No matching cars found in local inventory."
+
+        lines = ["Closest matches in our LOCAL STOCK:"]
+        lines.extend(f"- {car.name}: ₹{car.price:,.0f}" for car in results)
+        return "\n".join(lines) + "\n"
+
+    except Exception as e:
+        return f"Error in semantic search: {e}"
+
+def _compare_inventory(params: Dict[str, Any]) -> str:
+    # Spec diff of in-stock cars, computed locally
+    try:
+        comparison = compare_vehicles(ComparisonRequest(vehicle_ids=params.get("vehicle_ids", [])))
+        if not comparison.vehicles:
+            return "None of these cars are in local inventory."
+        return format_comparison(comparison)
+
+    except Exception as e:
+        return f"Error comparing inventory: {e}"
+
+def _inventory_summary(params: Dict[str, Any]) -> str:
+    # Catalog overview from cached aggregates
+    return summarize_inventory()
+
+# Tool table, built once (name -> handler, timeout in seconds)
+runtime.register("web_search_cars", _web_search, timeout=12.0)
+runtime.register("search_inventory", _search_inventory, timeout=3.0)
+# First call may load the embedding model
+runtime.register("semantic_search_inventory", _semantic_search, timeout=30.0)
+runtime.register("inventory_summary", _inventory_summary, timeout=3.0)
+runtime.register("compare_inventory", _compare_inventory, timeout=3.0)
+
+def is_web_search_cached(query: str) -> bool:
+    """True if a web search for `query` would be answered from the cache (fresh or stale)."""
+    value, _ = search_cache.get(cache_key(query, SEARCH_DOMAINS))
+    return value is not None
+
+def submit_tool(tool_name: str, params: Dict[str, Any], deadline: float = None) -> Future:
+    """Start a tool on the runtime without waiting; the Future raises DeadlineExceeded on timeout."""
+    return runtime.submit(tool_name, params, deadline)
+
+def execute_tool(tool_name: str, params: Dict[str, Any], deadline: float = None) -> str:
     """
     Router calls this function to execute a specific tool.
+    Sync façade over the async runtime; `deadline` is the turn's absolute
+    time.time() deadline and caps the tool's own timeout.
     """
-    # Map tool names to functions
-    tools_map = {
-        "web_search_cars": web_search_cars_tool,
-        "search_inventory": search_inventory, 
-    }
-    
-    tool_func = tools_map.get(tool_name)
-    if not tool_func:
+    if tool_name not in runtime.tools:
         return f"Tool {tool_name} not found."
     
-    # --- Execute Web Search ---
-    if tool_name == "web_search_cars":
-        return tool_func(params.get("query", ""))
-
-    # --- Execute Local Inventory ---
-    if tool_name == "search_inventory":
-        try:
-            results = tool_func(
-                budget_max=params.get('budget_max'),
-                vehicle_type=params.get('vehicle_type'),
-                fuel_type=params.get('fuel_type'),
-                seating_min=params.get('seating_min'),
-                brand=params.get('brand')
-            )
-            
-            if not results:
-                return "No matching cars found in local inventory."
-            
-            text_output = "Found these cars in our LOCAL STOCK:\n"
-            for car in results:
-                c_name = car.name if hasattr(car, 'name') else car.get('name', 'Unknown')
-                c_price = car.price if hasattr(car, 'price') else car.get('price', 0)
-                text_output += f"- {c_name}: ₹{c_price:,.0f}\n"
-            return text_output
-            
-        except Exception as e:
-            return f"Error searching inventory: {e}"
-
-    return "Unknown tool requested."
\ No newline at end of file
+    try:
+        return runtime.run(tool_name, params, deadline)
+    except DeadlineExceeded as e:
+        return f"⚠️ {tool_name} did not finish in time ({e})."
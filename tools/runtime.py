@@ -0,0 +1,216 @@
+"""
+Async tool runtime.
+Tools run as coroutines on one background event loop that owns a pooled
+httpx.AsyncClient, so a slow web search no longer pins a worker thread for
+the whole turn. Every call gets a timeout (the tool's own limit, capped by
+the turn deadline passed down from the graph); upstream requests made via
+ToolRuntime.call() get bounded retries with jitter and can be hedged once
+their latency passes a recent percentile.
+Sync callers use ToolRuntime.run(), which blocks on the loop's result.
+"""
+import time
+import random
+import atexit
+import asyncio
+import threading
+import contextvars
+from collections import deque, Counter
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+RETRY_BASE_DELAY = 0.25
+# Latency samples needed per upstream before hedging kicks in
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 95
+
+# Absolute (time.time()) deadline of the tool call being executed
+current_deadline: contextvars.ContextVar = contextvars.ContextVar("tool_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The turn deadline leaves no time to start or finish a tool call."""
+
+
+class LatencyTracker:
+    """Rolling window of latencies for one upstream."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class ToolSpec:
+    __slots__ = ("name", "handler", "timeout", "is_async")
+
+    def __init__(self, name: str, handler: Callable[[Dict[str, Any]], Any], timeout: float):
+        self.name = name
+        self.handler = handler
+        self.timeout = timeout
+        self.is_async = asyncio.iscoroutinefunction(handler)
+
+
+class ToolRuntime:
+    """
+    Registry of tools plus the event loop and HTTP pool they share.
+    Handlers take the params dict; sync handlers run in the loop's thread pool.
+    """
+
+    def __init__(self, max_connections: int = 20, hedge_percentile: float = HEDGE_PERCENTILE):
+        self.tools: Dict[str, ToolSpec] = {}
+        self.max_connections = max_connections
+        self.hedge_percentile = hedge_percentile
+        self.latency: Dict[str, LatencyTracker] = {}
+        self._stats = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, handler: Callable[[Dict[str, Any]], Any], timeout: float = DEFAULT_TIMEOUT):
+        self.tools[name] = ToolSpec(name, handler, timeout)
+
+    # ------------------------------------------
+    # Event loop and HTTP pool
+    # ------------------------------------------
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tool-runtime", daemon=True).start()
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Pooled client; only use it from coroutines running on self.loop."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=3.0),
+            )
+        return self._http
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._http is not None:
+            asyncio.run_coroutine_threadsafe(self._http.aclose(), loop).result(timeout=5)
+            self._http = None
+        loop.call_soon_threadsafe(loop.stop)
+
+    # ------------------------------------------
+    # Execution
+    # ------------------------------------------
+
+    async def execute(self, name: str, params: Dict[str, Any], deadline: float = None) -> Any:
+        """Run one tool on the current loop within its timeout and the deadline."""
+        spec = self.tools.get(name)
+        if spec is None:
+            raise KeyError(name)
+        budget = spec.timeout
+        if deadline is not None:
+            budget = min(budget, deadline - time.time())
+        if budget <= 0:
+            self._stats["deadline_skips"] += 1
+            raise DeadlineExceeded(f"no time left for {name}")
+
+        token = current_deadline.set(time.time() + budget)
+        try:
+            if spec.is_async:
+                work = spec.handler(params)
+            else:
+                work = self.loop.run_in_executor(None, contextvars.copy_context().run, spec.handler, params)
+            self._stats["calls"] += 1
+            return await asyncio.wait_for(work, budget)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise DeadlineExceeded(f"{name} timed out after {budget:.1f}s")
+        finally:
+            current_deadline.reset(token)
+
+    def submit(self, name: str, params: Dict[str, Any], deadline: float = None) -> Future:
+        """Schedule a tool on the runtime loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(self.execute(name, params, deadline), self.loop)
+
+    def run(self, name: str, params: Dict[str, Any], deadline: float = None) -> Any:
+        """Blocking façade for sync callers."""
+        return self.submit(name, params, deadline).result()
+
+    async def call(
+        self,
+        upstream: str,
+        request: Callable[[], Awaitable[Any]],
+        retries: int = DEFAULT_RETRIES,
+        retry_if: Callable[[Exception], bool] = lambda e: True,
+        hedge: bool = False,
+    ) -> Any:
+        """
+        Make an upstream request with bounded retries (exponential backoff,
+        full jitter) that never sleep past the current deadline.
+        With hedge=True a second request is fired once the first has run longer
+        than the upstream's recent latency percentile; the first reply wins.
+        """
+        for attempt in range(retries + 1):
+            try:
+                return await self._attempt(upstream, request, hedge)
+            except Exception as e:
+                if attempt == retries or not retry_if(e):
+                    raise
+                delay = random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt)
+                deadline = current_deadline.get()
+                if deadline is not None and time.time() + delay >= deadline:
+                    raise
+                self._stats["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, upstream: str, request: Callable[[], Awaitable[Any]], hedge: bool) -> Any:
+        tracker = self.latency.setdefault(upstream, LatencyTracker())
+        threshold = tracker.percentile(self.hedge_percentile) if hedge else None
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(request())]
+        try:
+            if threshold is not None:
+                done, _ = await asyncio.wait(tasks, timeout=threshold)
+                if not done:
+                    self._stats["hedges"] += 1
+                    tasks.append(asyncio.ensure_future(request()))
+
+            # First successful reply wins; fail only when every request failed
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self._stats["hedge_wins"] += 1
+                        tracker.add(time.perf_counter() - start)
+                        return task.result()
+                if not pending:
+                    raise done.pop().exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        report = dict(self._stats)
+        for upstream, tracker in self.latency.items():
+            p95 = tracker.percentile(95)
+            if p95 is not None:
+                report[f"{upstream}_p95_ms"] = round(p95 * 1000, 1)
+        return report
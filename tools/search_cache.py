@@ -0,0 +1,267 @@
+"""
+Result cache for web searches.
+Keys are normalized queries (case, whitespace and synonym folding) plus the
+domain list. A bounded in-memory LRU with a TTL sits in front of an optional
+SQLite tier that survives restarts. Expired entries can still be served
+while a background thread refreshes them (stale-while-revalidate).
+"""
+import os
+import asyncio
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple
+
+DEFAULT_TTL = float(os.getenv("CARASTRA_SEARCH_CACHE_TTL", 6 * 3600))
+# How long past the TTL an entry may still be served while it is refreshed
+DEFAULT_STALE_TTL = float(os.getenv("CARASTRA_SEARCH_CACHE_STALE_TTL", 24 * 3600))
+DEFAULT_MAX_ENTRIES = 512
+# Set to a file path to persist entries, e.g. memory/search_cache.sqlite
+DEFAULT_DB_PATH = os.getenv("CARASTRA_SEARCH_CACHE")
+
+# Phrases folded to one spelling before hashing (longest first)
+SYNONYMS = {
+    "on road price": "price",
+    "ex showroom price": "price",
+    "compared to": "vs",
+    "compared with": "vs",
+    "versus": "vs",
+    "v s": "vs",
+    "electric vehicle": "ev",
+    "electric": "ev",
+    "specifications": "specs",
+    "specification": "specs",
+    "reviews": "review",
+    "cost": "price",
+    "prices": "price",
+    "fuel efficiency": "mileage",
+    "fuel economy": "mileage",
+    "kmpl": "mileage",
+}
+STOPWORDS = {"the", "a", "an", "of", "for", "in", "india", "please", "me", "tell", "about", "what", "is"}
+
+_SYNONYM_RE = re.compile(r"\b(" + "|".join(re.escape(k) for k in sorted(SYNONYMS, key=len, reverse=True)) + r")\b")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation, fold synonyms and filler words, collapse whitespace."""
+    text = " ".join(w.strip(".") for w in re.sub(r"[^\w.]+", " ", query.lower()).split())
+    folded = None
+    while folded != text:  # "on road cost" -> "on road price" -> "price"
+        folded, text = text, _SYNONYM_RE.sub(lambda m: SYNONYMS[m.group(1)], text)
+    return " ".join(w for w in text.split() if w not in STOPWORDS)
+
+
+def cache_key(query: str, domains: List[str] = None) -> str:
+    """Stable key for a query and the domains it is restricted to."""
+    scope = ",".join(sorted(d.lower() for d in domains or []))
+    return hashlib.sha1(f"{normalize_query(query)}\n{scope}".encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """
+    LRU + TTL cache of search results with an optional SQLite tier.
+    Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        db_path: Optional[str] = DEFAULT_DB_PATH,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        # Background refresh tasks (the event loop only keeps weak references to tasks)
+        self._tasks: set = set()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0,
+                       "disk_hits": 0, "refreshes": 0, "refresh_errors": 0}
+
+        self._db = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache "
+                "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    # ------------------------------------------
+    # Storage tiers
+    # ------------------------------------------
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT stored_at, value FROM search_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        entry = (row[0], json.loads(row[1]))
+        self._stats["disk_hits"] += 1
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[float, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _forget(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def put(self, key: str, value: Any):
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?)",
+                                 (key, entry[0], json.dumps(value)))
+                self._db.commit()
+
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        """(value, fresh). value is None on a miss or once past the stale window."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None, False
+            age = time.time() - entry[0]
+            if age <= self.ttl:
+                return entry[1], True
+            if age <= self.ttl + self.stale_ttl:
+                return entry[1], False
+            self._forget(key)
+            return None, False
+
+    async def _get_async(self, key: str) -> Tuple[Optional[Any], bool]:
+        """get() that keeps SQLite reads off the event loop."""
+        if self._db is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def _put_async(self, key: str, value: Any):
+        if self._db is None:
+            self.put(key, value)
+        else:
+            await asyncio.to_thread(self.put, key, value)
+
+    # ------------------------------------------
+    # Read-through
+    # ------------------------------------------
+
+    def get_fresh(self, query: str, domains: List[str] = None) -> Optional[Any]:
+        """Cached value if it is within the TTL (counted as a hit), else None."""
+        value, fresh = self.get(cache_key(query, domains))
+        if not fresh:
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return value
+
+    def get_or_fetch(self, query: str, fetch: Callable[[], Any], domains: List[str] = None) -> Any:
+        """
+        Cached value for `query` or the result of `fetch()`.
+        A stale value is returned immediately and refreshed in the background.
+        Exceptions from `fetch` propagate and are not cached.
+        """
+        key = cache_key(query, domains)
+        value, fresh = self.get(key)
+        if value is not None:
+            with self._lock:
+                self._stats["hits" if fresh else "stale_hits"] += 1
+            if not fresh:
+                self._refresh_in_background(key, fetch)
+            return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        value = fetch()
+        self.put(key, value)
+        return value
+
+    async def get_or_fetch_async(self, query: str, fetch: Callable[[], Awaitable[Any]], domains: List[str] = None) -> Any:
+        """get_or_fetch() for coroutine fetchers; stale entries are refreshed in a task."""
+        key = cache_key(query, domains)
+        value, fresh = await self._get_async(key)
+        if value is not None:
+            with self._lock:
+                self._stats["hits" if fresh else "stale_hits"] += 1
+            if not fresh and self._start_refresh(key):
+                task = asyncio.ensure_future(self._refresh_async(key, fetch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        value = await fetch()
+        await self._put_async(key, value)
+        return value
+
+    def _start_refresh(self, key: str) -> bool:
+        """Claim the refresh of `key`; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _finish_refresh(self, key: str, ok: bool):
+        with self._lock:
+            self._stats["refreshes" if ok else "refresh_errors"] += 1
+            self._refreshing.discard(key)
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any]):
+        if not self._start_refresh(key):
+            return
+
+        def refresh():
+            try:
+                self.put(key, fetch())
+            except Exception:
+                self._finish_refresh(key, False)
+            else:
+                self._finish_refresh(key, True)
+
+        threading.Thread(target=refresh, name="search-cache-refresh", daemon=True).start()
+
+    async def _refresh_async(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        try:
+            await self._put_async(key, await fetch())
+        except Exception:
+            self._finish_refresh(key, False)
+        else:
+            self._finish_refresh(key, True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+            served = self._stats["hits"] + self._stats["stale_hits"]
+            return {**self._stats, "size": len(self._entries),
+                    "hit_rate": served / lookups if lookups else 0.0}
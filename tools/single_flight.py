@@ -0,0 +1,91 @@
+"""
+In-flight request coalescing ("single-flight").
+Concurrent callers asking for the same key wait on one outstanding call and
+share its result (or exception). Works for threads and asyncio tasks alike:
+both wait on the same concurrent.futures.Future.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Set, Tuple
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Future] = {}
+        # The event loop only keeps weak references to tasks; hold the running ones here
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"calls": 0, "shared": 0}
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """(future for key, True if this caller must run the call)."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+                return future, False
+            future = Future()
+            # Running futures cannot be cancelled, so one waiter giving up
+            # (e.g. a discarded speculative call) never cancels the shared call
+            future.set_running_or_notify_cancel()
+            self._flights[key] = future
+            self._stats["calls"] += 1
+            return future, True
+
+    def _run(self, key: str, fn: Callable[[], Any], future: Future):
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._flights.pop(key, None)
+            future.set_exception(e)
+        else:
+            with self._lock:
+                self._flights.pop(key, None)
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() once for all threads currently asking for `key`."""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, fn, future)
+        return future.result()
+
+    async def _run_async(self, key: str, fn: Callable[[], Any], future: Future):
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                self._flights.pop(key, None)
+            future.set_exception(e)
+        else:
+            with self._lock:
+                self._flights.pop(key, None)
+            future.set_result(result)
+
+    async def do_async(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Awaitable do(). A coroutine function runs as its own task, so it
+        survives the leading caller being cancelled; a blocking fn() runs in
+        the default executor.
+        """
+        future, leader = self._join(key)
+        if leader:
+            if asyncio.iscoroutinefunction(fn):
+                task = asyncio.ensure_future(self._run_async(key, fn, future))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                asyncio.get_running_loop().run_in_executor(None, self._run, key, fn, future)
+        return await asyncio.wrap_future(future)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,111 @@
+"""
+Speculative tool calls.
+Tool calls that a turn will probably need are started before the router has
+decided, so their latency overlaps the router's LLM call. Once the decision
+is in, calls that match what the graph is about to run are kept and the
+rest are cancelled. Every outcome is counted: saved latency is the part of a
+kept call that ran while the router was still thinking, wasted work is the
+tool time spent on discarded calls.
+"""
+import json
+import time
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# (tool name, params) of a call the graph would make
+ToolCall = Tuple[str, Dict[str, Any]]
+
+
+def call_key(tool: str, params: Dict[str, Any]) -> str:
+    """Identity of a tool call: same tool and same params (order-insensitive)."""
+    return f"{tool}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class Speculation:
+    __slots__ = ("kind", "key", "future", "started", "finished")
+
+    def __init__(self, kind: str, key: str, future: Future):
+        self.kind = kind
+        self.key = key
+        self.future = future
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        future.add_done_callback(self._done)
+
+    def _done(self, _):
+        self.finished = time.perf_counter()
+
+
+class Speculator:
+    """
+    Starts speculative calls through `submit(tool, params, deadline) -> Future`
+    and settles them against the calls the router's decision needs.
+    """
+
+    def __init__(self, submit: Callable[[str, Dict[str, Any], Optional[float]], Future]):
+        self.submit = submit
+        self._lock = threading.Lock()
+        self._stats = {"turns": 0, "launched": 0, "used": 0, "wasted": 0, "failed": 0,
+                       "saved_s": 0.0, "wasted_s": 0.0}
+        self._by_kind: Dict[str, Dict[str, int]] = {}
+
+    def start(self, calls: Dict[str, ToolCall], deadline: float = None) -> List[Speculation]:
+        """Launch one call per kind ("local", "web", ...)."""
+        speculations = []
+        for kind, (tool, params) in calls.items():
+            speculations.append(Speculation(kind, call_key(tool, params), self.submit(tool, params, deadline)))
+        with self._lock:
+            self._stats["turns"] += 1
+            self._stats["launched"] += len(speculations)
+            for s in speculations:
+                self._count(s.kind, "launched")
+        return speculations
+
+    def settle(self, speculations: List[Speculation], needed: Iterable[ToolCall],
+               decided_at: float = None, deadline: float = None) -> Dict[str, Any]:
+        """
+        Results of speculations the graph needs, keyed by call_key(); the rest
+        are cancelled. A needed call still running is waited for (it would
+        have been waited for in the next node anyway), bounded by the deadline.
+        """
+        decided_at = decided_at or time.perf_counter()
+        wanted = {call_key(tool, params) for tool, params in needed}
+        results = {}
+        for s in speculations:
+            if s.key in wanted:
+                timeout = max(0.0, deadline - time.time()) if deadline is not None else None
+                try:
+                    results[s.key] = s.future.result(timeout=timeout)
+                except Exception:
+                    # The node will run the call itself
+                    s.future.cancel()
+                    self._record(s, "failed", wasted=time.perf_counter() - s.started)
+                    continue
+                self._record(s, "used", saved=min(s.finished or decided_at, decided_at) - s.started)
+            else:
+                s.future.cancel()
+                self._record(s, "wasted", wasted=(s.finished or time.perf_counter()) - s.started)
+        return results
+
+    def _count(self, kind: str, outcome: str):
+        counts = self._by_kind.setdefault(kind, {"launched": 0, "used": 0, "wasted": 0, "failed": 0})
+        counts[outcome] += 1
+
+    def _record(self, s: Speculation, outcome: str, saved: float = 0.0, wasted: float = 0.0):
+        with self._lock:
+            self._stats[outcome] += 1
+            self._stats["saved_s"] += max(0.0, saved)
+            self._stats["wasted_s"] += max(0.0, wasted)
+            self._count(s.kind, outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, latency saved and tool time wasted, overall and per kind."""
+        with self._lock:
+            report = dict(self._stats)
+            launched = report["launched"]
+            report["hit_rate"] = report["used"] / launched if launched else 0.0
+            report["saved_ms_per_turn"] = round(report["saved_s"] * 1000 / report["turns"], 1) if report["turns"] else 0.0
+            report["wasted_ms_per_turn"] = round(report["wasted_s"] * 1000 / report["turns"], 1) if report["turns"] else 0.0
+            report["by_kind"] = {kind: dict(counts) for kind, counts in self._by_kind.items()}
+            return report
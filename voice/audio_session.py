@@ -0,0 +1,209 @@
+# ==========================================
+# FILE: voice/audio_session.py
+# ==========================================
+"""
+Process-wide audio devices.
+One PyAudio instance, one microphone stream and cached output streams live
+for the whole session instead of being created and torn down per
+utterance. TTS audio is played straight from memory: raw PCM (OpenAI
+response_format="pcm") is written as-is, WAV is unpacked with `wave`, and
+MP3 is decoded through pygame from a BytesIO; nothing touches the disk.
+The microphone runs in callback mode: PyAudio's audio thread only copies
+each block into a ring buffer, and readers consume it at their own pace.
+"""
+import io
+import time
+import wave
+import atexit
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from voice.ring_buffer import RingBuffer
+
+# OpenAI "pcm" responses: 24 kHz, 16-bit signed little-endian, mono
+TTS_PCM_RATE = 24000
+MIC_RATE = 44100
+MIC_CHUNK = 1024
+# Seconds of microphone audio kept in the ring buffer (longer than one utterance)
+MIC_RING_S = 20
+# Playback is written in blocks this long, so a barge-in stops it within one block
+PLAY_BLOCK_S = 0.02
+
+# (sample rate, channels, bytes per sample)
+AudioFormat = Tuple[int, int, int]
+
+
+# OpenAI response_format values decoded through pygame
+COMPRESSED_FORMATS = {"mp3", "opus", "aac", "flac"}
+
+
+def _decode_compressed(audio: bytes) -> Tuple[bytes, AudioFormat]:
+    import pygame
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    rate, size, channels = pygame.mixer.get_init()
+    sound = pygame.mixer.Sound(file=io.BytesIO(audio))
+    return sound.get_raw(), (rate, channels, abs(size) // 8)
+
+
+def _is_mp3_frame(header: bytes) -> bool:
+    """A complete MPEG audio frame header (sync bits alone also match plain PCM)."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return False
+    version, layer = (header[1] >> 3) & 0x3, (header[1] >> 1) & 0x3
+    bitrate, sample_rate = header[2] >> 4, (header[2] >> 2) & 0x3
+    return version != 1 and layer != 0 and bitrate not in (0, 15) and sample_rate != 3
+
+
+def sniff_format(audio: bytes) -> str:
+    """Best guess for audio of unknown origin: "wav", "mp3", else raw "pcm"."""
+    if audio[:4] == b"RIFF":
+        return "wav"
+    if audio[:3] == b"ID3" or _is_mp3_frame(audio[:4]):
+        return "mp3"
+    return "pcm"
+
+
+def decode_audio(audio: bytes, audio_format: str = None, pcm_rate: int = TTS_PCM_RATE) -> Tuple[bytes, AudioFormat]:
+    """
+    Raw PCM frames and their format. `audio_format` is the synthesizer's
+    response_format; the bytes are only sniffed when it is not known.
+    """
+    audio_format = audio_format or sniff_format(audio)
+    if audio_format == "wav":
+        with wave.open(io.BytesIO(audio)) as clip:
+            return clip.readframes(clip.getnframes()), (clip.getframerate(), clip.getnchannels(), clip.getsampwidth())
+    if audio_format in COMPRESSED_FORMATS:
+        return _decode_compressed(audio)
+    if audio_format != "pcm":
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+    return audio, (pcm_rate, 1, 2)
+
+
+class AudioSession:
+    """
+    Owns the audio devices for the process lifetime.
+    play() matches the speech engine's Player signature; the microphone
+    ring (self.ring) feeds barge-in detection, and read() serves it as bytes.
+    """
+
+    def __init__(self, mic_rate: int = MIC_RATE, mic_chunk: int = MIC_CHUNK):
+        self.mic_rate = mic_rate
+        self.mic_chunk = mic_chunk
+        self.ring = RingBuffer(mic_rate * MIC_RING_S)
+        self._cursor = 0
+        self._pa = None
+        self._mic = None
+        self._outputs: Dict[AudioFormat, object] = {}
+        self._lock = threading.Lock()
+        self._stats = {"utterances": 0, "interrupted": 0, "open_s": 0.0, "start_s": 0.0}
+
+    def open(self):
+        """Creates PyAudio and the mic stream once; later calls are no-ops."""
+        with self._lock:
+            if self._pa is not None:
+                return self
+            import pyaudio
+            start = time.perf_counter()
+            self._pa = pyaudio.PyAudio()
+            self._continue = pyaudio.paContinue
+            self._mic = self._pa.open(format=pyaudio.paInt16, channels=1, rate=self.mic_rate, input=True,
+                                      frames_per_buffer=self.mic_chunk, stream_callback=self._on_audio)
+            self._stats["open_s"] += time.perf_counter() - start
+            atexit.register(self.close)
+            return self
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PyAudio callback (audio thread): copy into the ring and return at once."""
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return None, self._continue
+
+    def player(self, audio_format: str = None):
+        """play() bound to a known format, as a speech engine Player."""
+        return lambda audio, interrupt: self.play(audio, interrupt, audio_format)
+
+    def _output(self, fmt: AudioFormat):
+        """Output stream for a format, opened on first use and kept."""
+        self.open()
+        with self._lock:
+            stream = self._outputs.get(fmt)
+            if stream is None:
+                rate, channels, width = fmt
+                start = time.perf_counter()
+                stream = self._pa.open(format=self._pa.get_format_from_width(width), channels=channels,
+                                       rate=rate, output=True)
+                self._stats["open_s"] += time.perf_counter() - start
+                self._outputs[fmt] = stream
+            return stream
+
+    def play(self, audio: bytes, interrupt: threading.Event, audio_format: str = None) -> bool:
+        """Plays encoded or raw audio from memory; False if interrupted."""
+        start = time.perf_counter()
+        pcm, fmt = decode_audio(audio, audio_format)
+        stream = self._output(fmt)
+        rate, channels, width = fmt
+        block = max(1, int(rate * PLAY_BLOCK_S)) * channels * width
+        with self._lock:
+            self._stats["utterances"] += 1
+            self._stats["start_s"] += time.perf_counter() - start
+        for offset in range(0, len(pcm), block):
+            if interrupt.is_set():
+                with self._lock:
+                    self._stats["interrupted"] += 1
+                return False
+            stream.write(pcm[offset:offset + block])
+        return True
+
+    def read(self, frames: int = None) -> bytes:
+        """Next mic frames (16-bit mono) from the ring; blocks until they arrive."""
+        self.open()
+        frames = frames or self.mic_chunk
+        while not self.ring.wait(self._cursor + frames - 1, timeout=1.0):
+            pass
+        samples, self._cursor = self.ring.read(self._cursor, frames)
+        return samples.tobytes()
+
+    def drain_input(self):
+        """Skips mic audio recorded while nobody was reading."""
+        self.open()
+        self._cursor = self.ring.written
+
+    def stats(self) -> Dict[str, float]:
+        """Device open time (paid once) and average decode + start latency per utterance."""
+        with self._lock:
+            report = dict(self._stats)
+        report["open_ms"] = round(report.pop("open_s") * 1000, 1)
+        start = report.pop("start_s")
+        report["avg_start_ms"] = round(start * 1000 / report["utterances"], 2) if report["utterances"] else 0.0
+        return report
+
+    def close(self):
+        with self._lock:
+            streams = list(self._outputs.values()) + ([self._mic] if self._mic else [])
+            pa, self._pa, self._mic, self._outputs = self._pa, None, None, {}
+        for stream in streams:
+            try:
+                stream.stop_stream()
+                stream.close()
+            except Exception:
+                pass
+        if pa is not None:
+            pa.terminate()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_SESSION: Optional[AudioSession] = None
+
+
+def get_audio_session() -> AudioSession:
+    """The process-wide session (devices are opened on first use)."""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = AudioSession()
+    return _SESSION
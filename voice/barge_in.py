@@ -0,0 +1,236 @@
+# ==========================================
+# FILE: voice/barge_in.py
+# ==========================================
+"""
+Voice activity and barge-in detection.
+Frames (20 ms) are scored on energy (dBFS) and zero-crossing rate, computed
+with numpy over whole blocks. A frame counts as speech when it is well above
+an adaptive noise floor (falls fast, rises slowly) and its ZCR is not that
+of hiss. Onsets need k speech frames out of the last n, and speech ends only
+after a hangover of silent frames, so clicks and short gaps do not flip the
+state. BargeInDetector runs the VAD on the microphone ring buffer that the
+PyAudio callback fills, and sets an interrupt event on a speech onset.
+Everything works on plain sample arrays, so WAV recordings can be replayed
+offline (detect_wav).
+"""
+import time
+import wave
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from voice.ring_buffer import RingBuffer
+
+FRAME_MS = 20
+# dB above the noise floor for a speech frame
+MARGIN_DB = 10.0
+# Frames quieter than this are never speech (dBFS)
+MIN_SPEECH_DB = -50.0
+# Broadband noise (fans, hiss) crosses zero far more often than voiced speech
+MAX_ZCR = 0.35
+ONSET_FRAMES = 4
+ONSET_WINDOW = 6
+HANGOVER_FRAMES = 15
+# Noise floor smoothing per frame: follow drops quickly, rises slowly
+FLOOR_FALL = 0.3
+FLOOR_RISE = 0.02
+# Ignore the mic right after playback starts (prevents self-interruption)
+ARM_DELAY_S = 1.0
+# Speech shorter than this after a trigger counts as a false trigger
+MIN_SPEECH_S = 0.3
+
+# (kind, time of the event in the audio, time it was detected), seconds from the first sample
+VadEvent = Tuple[str, float, float]
+
+
+def frame_features(samples: np.ndarray, frame_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Energy (dBFS) and zero-crossing rate of each complete frame."""
+    n = samples.size // frame_len
+    frames = samples[:n * frame_len].astype(np.float32).reshape(n, frame_len) / 32768.0
+    energy = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_len - 1)
+    return energy, zcr
+
+
+class VoiceActivityDetector:
+    """Streaming VAD: process() sample blocks in order, get start/end events back."""
+
+    def __init__(self, rate: int, frame_ms: int = FRAME_MS, margin_db: float = MARGIN_DB,
+                 min_speech_db: float = MIN_SPEECH_DB, max_zcr: float = MAX_ZCR,
+                 onset_frames: int = ONSET_FRAMES, onset_window: int = ONSET_WINDOW,
+                 hangover_frames: int = HANGOVER_FRAMES):
+        self.rate = rate
+        self.frame_len = int(rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.max_zcr = max_zcr
+        self.onset_frames = onset_frames
+        self.onset_window = onset_window
+        self.hangover_frames = hangover_frames
+        self.reset()
+
+    def reset(self):
+        self.noise_floor: Optional[float] = None  # seeded from the first frame
+        self.speaking = False
+        self.frames = 0
+        self._pending = np.empty(0, dtype=np.int16)
+        self._recent = deque(maxlen=self.onset_window)
+        self._silent_run = 0
+
+    def frame_time(self, frame: int) -> float:
+        return frame * self.frame_len / self.rate
+
+    def process(self, samples: np.ndarray) -> List[VadEvent]:
+        samples = np.concatenate([self._pending, np.asarray(samples, dtype=np.int16)])
+        energy, zcr = frame_features(samples, self.frame_len)
+        self._pending = samples[energy.size * self.frame_len:]
+
+        events = []
+        for e, z in zip(energy.tolist(), zcr.tolist()):
+            if self.noise_floor is None:
+                self.noise_floor = e
+            is_speech = e > self.noise_floor + self.margin_db and e > self.min_speech_db and z <= self.max_zcr
+            if not is_speech:
+                rate = FLOOR_FALL if e < self.noise_floor else FLOOR_RISE
+                self.noise_floor += (e - self.noise_floor) * rate
+            self._recent.append(is_speech)
+            now = self.frame_time(self.frames + 1)
+
+            if not self.speaking:
+                if sum(self._recent) >= self.onset_frames:
+                    self.speaking = True
+                    self._silent_run = 0
+                    # Onset is the first speech frame in the window
+                    first = list(self._recent).index(True)
+                    onset = self.frame_time(self.frames + 1 - len(self._recent) + first)
+                    events.append(("start", onset, now))
+            else:
+                self._silent_run = 0 if is_speech else self._silent_run + 1
+                if self._silent_run >= self.hangover_frames:
+                    self.speaking = False
+                    self._recent.clear()
+                    events.append(("end", self.frame_time(self.frames + 1 - self._silent_run), now))
+            self.frames += 1
+        return events
+
+
+class BargeInDetector:
+    """
+    Watches the mic ring buffer on its own thread (woken by new audio, no
+    polling) and sets the interrupt event when the user starts talking.
+    """
+
+    def __init__(self, ring: RingBuffer, rate: int, arm_delay_s: float = ARM_DELAY_S,
+                 min_speech_s: float = MIN_SPEECH_S, **vad_options):
+        self.ring = ring
+        self.rate = rate
+        self.arm_delay_s = arm_delay_s
+        self.min_speech_s = min_speech_s
+        self.vad_options = vad_options
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"sessions": 0, "triggers": 0, "false_triggers": 0, "audio_s": 0.0,
+                       "latency_s": 0.0, "last_latency_ms": 0.0, "cpu_s": 0.0}
+
+    def start(self, interrupt: threading.Event, on_trigger: Callable[[float], None] = None):
+        """
+        Begin watching; call stop() when playback ends. on_trigger receives
+        the wall-clock time the interrupting speech started.
+        """
+        self.stop()
+        self._done = threading.Event()
+        threading.Thread(target=self._watch, args=(interrupt, self._done, on_trigger),
+                         name="barge-in", daemon=True).start()
+
+    def stop(self):
+        """
+        Stop watching. Does not wait: after a trigger the watcher keeps
+        listening just long enough to tell a real interruption from a false one.
+        """
+        self._done.set()
+
+    def _watch(self, interrupt: threading.Event, done: threading.Event,
+               on_trigger: Optional[Callable[[float], None]]):
+        vad = VoiceActivityDetector(self.rate, **self.vad_options)
+        with self._lock:
+            self._stats["sessions"] += 1
+        # Start from live audio, after the arm delay
+        if done.wait(self.arm_delay_s):
+            return
+        position = started_at = self.ring.written
+        triggered_at: Optional[float] = None
+        # An end of speech is only reported after the hangover
+        verdict_after = self.min_speech_s + vad.frame_time(vad.hangover_frames)
+        while True:
+            if triggered_at is not None and vad.frame_time(vad.frames) - triggered_at >= verdict_after:
+                return  # still talking: a real interruption
+            if done.is_set() and triggered_at is None:
+                return
+            if not self.ring.wait(position, timeout=0.1):
+                continue
+            samples, position = self.ring.read(position)
+            tick = time.perf_counter()
+            events = vad.process(samples)
+            with self._lock:
+                self._stats["cpu_s"] += time.perf_counter() - tick
+                self._stats["audio_s"] += samples.size / self.rate
+            for kind, at, detected in events:
+                if kind == "start" and triggered_at is None:
+                    triggered_at = at
+                    # Algorithmic delay plus audio still queued behind the detection point
+                    backlog = (self.ring.written - started_at) / self.rate - detected
+                    latency = detected - at + max(0.0, backlog)
+                    with self._lock:
+                        self._stats["triggers"] += 1
+                        self._stats["latency_s"] += latency
+                        self._stats["last_latency_ms"] = round(latency * 1000, 1)
+                    print(f"\n🛑 Interrupted! (speech onset, {latency * 1000:.0f} ms)")
+                    if on_trigger is not None:
+                        on_trigger(time.time() - latency)
+                    interrupt.set()
+                elif kind == "end" and triggered_at is not None:
+                    if at - triggered_at < self.min_speech_s:
+                        with self._lock:
+                            self._stats["false_triggers"] += 1
+                    return
+
+    def stats(self) -> Dict[str, float]:
+        """Triggers, probable false triggers (speech shorter than min_speech_s), detection latency."""
+        with self._lock:
+            report = dict(self._stats)
+        latency = report.pop("latency_s")
+        cpu = report.pop("cpu_s")
+        audio = report.pop("audio_s")
+        report["avg_latency_ms"] = round(latency * 1000 / report["triggers"], 1) if report["triggers"] else 0.0
+        report["false_trigger_rate"] = report["false_triggers"] / report["triggers"] if report["triggers"] else 0.0
+        report["cpu_share"] = round(cpu / audio, 4) if audio else 0.0
+        return report
+
+
+# ------------------------------------------
+# Offline replay
+# ------------------------------------------
+
+def load_wav(path: str) -> Tuple[np.ndarray, int]:
+    """Mono int16 samples and rate of a 16-bit WAV file (channels are averaged)."""
+    with wave.open(str(path)) as clip:
+        if clip.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        samples = np.frombuffer(clip.readframes(clip.getnframes()), dtype=np.int16)
+        channels = clip.getnchannels()
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        return samples, clip.getframerate()
+
+
+def detect_wav(path: str, block_ms: int = 64, **vad_options) -> List[VadEvent]:
+    """Replays a recording through the VAD in callback-sized blocks."""
+    samples, rate = load_wav(path)
+    vad = VoiceActivityDetector(rate, **vad_options)
+    block = int(rate * block_ms / 1000)
+    events = []
+    for start in range(0, samples.size, block):
+        events.extend(vad.process(samples[start:start + block]))
+    return events
@@ -0,0 +1,268 @@
+# ==========================================
+# FILE: voice/capture.py
+# ==========================================
+"""
+Continuous voice capture for voice mode.
+The microphone never stops: the PyAudio callback fills the session ring
+buffer, a capture thread endpoints utterances on it with the VAD (start /
+end events), and a recognition worker turns them into text. The stages are
+joined by bounded queues, so speech that arrives while the graph is
+thinking or Jarvis is talking is kept and handled next, and a slow stage
+holds back the one before it instead of piling up work:
+    mic callback -> ring -> capture -> utterances -> recognition -> texts -> graph / TTS
+The capture thread cannot block (the mic keeps running), so when the
+utterance queue is full the oldest waiting utterance is dropped.
+While Jarvis is talking the mic also hears him: utterances that overlap
+playback are discarded unless the barge-in detector fired during them.
+"""
+import time
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+from voice.ring_buffer import RingBuffer
+from voice.barge_in import VoiceActivityDetector
+
+# Audio kept before the detected onset and after the end (soft consonants)
+PRE_ROLL_S = 0.3
+TAIL_S = 0.2
+# Blips shorter than this are not sent to recognition
+MIN_UTTERANCE_S = 0.25
+# Long monologues are cut here (the old listen() used phrase_time_limit=10)
+MAX_UTTERANCE_S = 10.0
+MAX_PENDING = 2
+# Speaker output lags playback by this much, so echo outlives the playback window
+PLAYBACK_TAIL_S = 0.3
+# Playback windows and barge-ins older than this are forgotten
+GATE_HISTORY_S = 60.0
+
+
+class Utterance:
+    __slots__ = ("pcm", "rate", "onset", "ended", "queued")
+
+    def __init__(self, pcm: np.ndarray, rate: int, onset: float, ended: float):
+        self.pcm = pcm
+        self.rate = rate
+        self.onset = onset  # wall-clock time speech started
+        self.ended = ended  # wall-clock time speech ended
+        self.queued = time.time()
+
+    @property
+    def seconds(self) -> float:
+        return self.pcm.size / self.rate
+
+
+# transcribe(utterance) -> text, or None if nothing was understood
+Transcriber = Callable[[Utterance], Optional[str]]
+
+
+def recognize_google(utterance: Utterance) -> Optional[str]:
+    """Google Web Speech (speech_recognition) on the captured PCM."""
+    import speech_recognition as sr
+    audio = sr.AudioData(utterance.pcm.tobytes(), utterance.rate, 2)
+    try:
+        return sr.Recognizer().recognize_google(audio)
+    except sr.UnknownValueError:
+        return None
+
+
+class UtteranceCapture:
+    """Endpoints speech on the mic ring buffer and queues whole utterances."""
+
+    def __init__(self, ring: RingBuffer, rate: int, max_pending: int = MAX_PENDING,
+                 pre_roll_s: float = PRE_ROLL_S, tail_s: float = TAIL_S,
+                 min_utterance_s: float = MIN_UTTERANCE_S, max_utterance_s: float = MAX_UTTERANCE_S,
+                 **vad_options):
+        self.ring = ring
+        self.rate = rate
+        self.utterances: "queue.Queue[Utterance]" = queue.Queue(maxsize=max_pending)
+        self.pre_roll_s = pre_roll_s
+        self.tail_s = tail_s
+        self.min_utterance_s = min_utterance_s
+        self.max_utterance_s = max_utterance_s
+        self.vad_options = vad_options
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Wall-clock [start, end] of each playback (end None while playing) and barge-in onsets
+        self._playback: List[List[Optional[float]]] = []
+        self._barge_ins: List[float] = []
+        self._stats = {"utterances": 0, "dropped": 0, "too_short": 0, "cut": 0, "echo": 0, "audio_s": 0.0}
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._done = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._done,), name="capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def playback_started(self):
+        with self._lock:
+            now = time.time()
+            self._playback = [w for w in self._playback if w[1] is None or w[1] > now - GATE_HISTORY_S]
+            self._barge_ins = [t for t in self._barge_ins if t > now - GATE_HISTORY_S]
+            self._playback.append([now, None])
+
+    def playback_ended(self):
+        with self._lock:
+            for window in self._playback:
+                if window[1] is None:
+                    window[1] = time.time() + PLAYBACK_TAIL_S
+
+    def barge_in(self, onset: float):
+        """The barge-in detector heard the user start talking at `onset` (wall clock)."""
+        with self._lock:
+            self._barge_ins.append(onset)
+
+    def _is_echo(self, onset: float, end: float) -> bool:
+        """Overlaps playback and no barge-in was detected during it (pre-roll included)."""
+        with self._lock:
+            during_playback = any(start < end and (stop is None or stop > onset) for start, stop in self._playback)
+            interrupted = any(onset - self.pre_roll_s <= t <= end for t in self._barge_ins)
+        return during_playback and not interrupted
+
+    def _run(self, done: threading.Event):
+        vad = VoiceActivityDetector(self.rate, **self.vad_options)
+        base = position = self.ring.written
+        wall_base = time.time()
+        onset: Optional[float] = None  # VAD time of the current utterance's start
+        while not done.is_set():
+            if not self.ring.wait(position, timeout=0.1):
+                continue
+            samples, position = self.ring.read(position)
+            for kind, at, _ in vad.process(samples):
+                if kind == "start":
+                    onset = at
+                elif kind == "end" and onset is not None:
+                    self._emit(base, wall_base, onset, at)
+                    onset = None
+            # Cut a monologue that runs too long; the rest becomes the next utterance
+            heard = vad.frame_time(vad.frames)
+            if onset is not None and heard - onset >= self.max_utterance_s:
+                with self._lock:
+                    self._stats["cut"] += 1
+                self._emit(base, wall_base, onset, heard, tail_s=0.0)
+                onset = heard
+
+    def _emit(self, base: int, wall_base: float, onset: float, end: float, tail_s: float = None):
+        if end - onset < self.min_utterance_s:
+            with self._lock:
+                self._stats["too_short"] += 1
+            return
+        if self._is_echo(wall_base + onset, wall_base + end):
+            with self._lock:
+                self._stats["echo"] += 1
+            return
+        tail_s = self.tail_s if tail_s is None else tail_s
+        first = base + max(0, int((onset - self.pre_roll_s) * self.rate))
+        last = min(self.ring.written, base + int((end + tail_s) * self.rate))
+        pcm, _ = self.ring.read(first, last - first)
+        utterance = Utterance(pcm, self.rate, wall_base + onset, wall_base + end)
+        while True:
+            try:
+                self.utterances.put_nowait(utterance)
+                break
+            except queue.Full:
+                # Recognition is behind: the oldest waiting utterance is the least useful
+                try:
+                    self.utterances.get_nowait()
+                    with self._lock:
+                        self._stats["dropped"] += 1
+                except queue.Empty:
+                    pass
+        with self._lock:
+            self._stats["utterances"] += 1
+            self._stats["audio_s"] += utterance.seconds
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            report = dict(self._stats)
+        report["audio_s"] = round(report["audio_s"], 2)
+        report["pending"] = self.utterances.qsize()
+        return report
+
+
+class VoicePipeline:
+    """
+    Capture and recognition running behind the conversation loop.
+    next_text() hands recognized turns to the graph worker (the caller), in
+    order; recognition blocks while MAX_PENDING texts are waiting.
+    """
+
+    def __init__(self, capture: UtteranceCapture, transcribe: Transcriber = recognize_google,
+                 max_pending: int = MAX_PENDING):
+        self.capture = capture
+        self.transcribe = transcribe
+        self.texts: "queue.Queue[str]" = queue.Queue(maxsize=max_pending)
+        self._done = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"recognized": 0, "unrecognized": 0, "errors": 0, "recognize_s": 0.0, "endpoint_to_text_s": 0.0}
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._done = threading.Event()
+            self.capture.start()
+            self._worker = threading.Thread(target=self._recognize, args=(self._done,), name="recognition", daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        self._done.set()
+        self.capture.stop()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _recognize(self, done: threading.Event):
+        while not done.is_set():
+            try:
+                utterance = self.capture.utterances.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            try:
+                text = self.transcribe(utterance)
+            except Exception as e:
+                print(f"⚠️ Recognition failed: {e}")
+                with self._lock:
+                    self._stats["errors"] += 1
+                continue
+            with self._lock:
+                self._stats["recognize_s"] += time.perf_counter() - start
+                if not text:
+                    self._stats["unrecognized"] += 1
+                    continue
+                self._stats["recognized"] += 1
+                self._stats["endpoint_to_text_s"] += time.time() - utterance.ended
+            # Backpressure: wait while the graph has turns queued
+            while not done.is_set():
+                try:
+                    self.texts.put(text, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    def next_text(self, timeout: float = None) -> Optional[str]:
+        """The next recognized turn (None on timeout)."""
+        try:
+            return self.texts.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            report = dict(self._stats)
+        attempts = report["recognized"] + report["unrecognized"]
+        report["avg_recognize_ms"] = round(report.pop("recognize_s") * 1000 / attempts, 1) if attempts else 0.0
+        wait = report.pop("endpoint_to_text_s")
+        report["avg_endpoint_to_text_ms"] = round(wait * 1000 / report["recognized"], 1) if report["recognized"] else 0.0
+        report["capture"] = self.capture.stats()
+        return report
@@ -0,0 +1,61 @@
+# ==========================================
+# FILE: voice/ring_buffer.py
+# ==========================================
+"""
+Fixed-size ring of int16 samples shared by one writer (the audio callback)
+and any number of readers. Positions are absolute sample counts, so each
+reader keeps its own cursor and can tell when it fell too far behind.
+"""
+import threading
+from typing import Optional, Tuple
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._written = 0
+        self._cond = threading.Condition()
+        self.overruns = 0
+
+    @property
+    def written(self) -> int:
+        """Total samples ever written (the position one past the newest sample)."""
+        return self._written
+
+    def write(self, samples: np.ndarray):
+        """Append samples, overwriting the oldest; wakes waiting readers."""
+        samples = np.asarray(samples, dtype=np.int16)[-self.capacity:]
+        with self._cond:
+            start = self._written % self.capacity
+            first = min(samples.size, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:samples.size - first] = samples[first:]
+            self._written += samples.size
+            self._cond.notify_all()
+
+    def read(self, position: int, max_samples: int = None) -> Tuple[np.ndarray, int]:
+        """
+        Samples from `position` up to the newest (or max_samples of them) and
+        the position after them. A reader that was overrun skips to the oldest
+        sample still held.
+        """
+        with self._cond:
+            oldest = max(0, self._written - self.capacity)
+            if position < oldest:
+                self.overruns += 1
+                position = oldest
+            end = self._written if max_samples is None else min(self._written, position + max_samples)
+            indices = np.arange(position, end) % self.capacity
+            return self._data[indices].copy(), end
+
+    def wait(self, position: int, timeout: Optional[float] = None) -> bool:
+        """Block until there is data past `position` (False on timeout)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._written > position, timeout)
+
+    def latest(self, samples: int) -> np.ndarray:
+        """The newest `samples` samples (fewer if not written yet)."""
+        data, _ = self.read(max(0, self._written - samples))
+        return data
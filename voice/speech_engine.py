@@ -0,0 +1,297 @@
+# ==========================================
+# FILE: voice/speech_engine.py
+# ==========================================
+"""
+Pipelined sentence-level text-to-speech.
+Text (whole or as a token stream) is cut into sentences; a bounded worker
+pool synthesizes them while a playback thread plays each one as soon as it
+is ready, so sentence N+1 is being synthesized while sentence N plays.
+Barge-in (the interrupt event) stops playback and cancels every pending
+synthesis. Synthesizers and players are plain callables, so the engine runs
+offline with a local synthesizer (pyttsx3) or a stub.
+"""
+import io
+import os
+import re
+import time
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+# synthesize(text) -> encoded audio (mp3 / wav bytes)
+Synthesizer = Callable[[str], bytes]
+# play(audio, interrupt) -> True if it played to the end
+Player = Callable[[bytes, threading.Event], bool]
+
+# Fragments shorter than this are merged into the next sentence (tiny clips add gaps)
+MIN_SENTENCE_CHARS = 24
+# Longer sentences are cut at a comma or space so the first chunk arrives quickly
+MAX_SENTENCE_CHARS = 240
+SYNTH_WORKERS = 2
+# Sentences synthesized ahead of the one playing
+MAX_AHEAD = 3
+
+_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n+")
+
+
+class SentenceSplitter:
+    """Incremental sentence splitter: feed() text as it streams in, flush() at the end."""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS, max_chars: int = MAX_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def _cut_long(self, text: str) -> List[str]:
+        parts = []
+        while len(text) > self.max_chars:
+            window = text[:self.max_chars]
+            cut = max(window.rfind(", "), window.rfind("; "))
+            cut = cut + 1 if cut > self.min_chars else window.rfind(" ")
+            if cut <= 0:
+                cut = self.max_chars
+            parts.append(text[:cut].strip())
+            text = text[cut:].lstrip()
+        return parts + [text]
+
+    def feed(self, chunk: str) -> List[str]:
+        self._buffer += chunk
+        sentences, start = [], 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.extend(self._cut_long(candidate))
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        if len(self._buffer) > self.max_chars:
+            *done, self._buffer = self._cut_long(self._buffer)
+            sentences.extend(done)
+        return [s for s in sentences if s]
+
+    def flush(self) -> List[str]:
+        text, self._buffer = self._buffer.strip(), ""
+        return self._cut_long(text) if text else []
+
+
+def split_sentences(text: str) -> List[str]:
+    splitter = SentenceSplitter()
+    return splitter.feed(text) + splitter.flush()
+
+
+# ------------------------------------------
+# Synthesizers
+# ------------------------------------------
+
+class OpenAISynthesizer:
+    """OpenAI TTS; returns the encoded audio bytes."""
+
+    def __init__(self, client, model: str = "tts-1", voice: str = "onyx", response_format: str = "mp3"):
+        self.client = client
+        self.model = model
+        self.voice = voice
+        self.response_format = response_format
+
+    def __call__(self, text: str) -> bytes:
+        response = self.client.audio.speech.create(
+            model=self.model, voice=self.voice, input=text, response_format=self.response_format
+        )
+        return response.content
+
+
+class Pyttsx3Synthesizer:
+    """Offline synthesizer (WAV bytes) for testing without network access."""
+
+    def __init__(self, rate: int = None):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        if rate:
+            self.engine.setProperty("rate", rate)
+        # The pyttsx3 driver is not thread-safe
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> bytes:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with self._lock:
+                self.engine.save_to_file(text, path)
+                self.engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+
+# ------------------------------------------
+# Engine
+# ------------------------------------------
+
+class SpeechEngine:
+    """
+    speak() / speak_stream() block until the answer has been played or
+    interrupted. stop() (or setting the interrupt event) is the barge-in.
+    """
+
+    def __init__(self, synthesizer: Synthesizer, player: Player,
+                 workers: int = SYNTH_WORKERS, max_ahead: int = MAX_AHEAD):
+        self.synthesizer = synthesizer
+        self.player = player
+        self.max_ahead = max_ahead
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._interrupt: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+        self._stats = {"utterances": 0, "sentences": 0, "played": 0, "cancelled": 0, "failed": 0,
+                       "interrupted": 0, "first_audio_s": 0.0}
+
+    def speak(self, text: str, interrupt: threading.Event = None) -> bool:
+        return self.speak_stream([text], interrupt)
+
+    def speak_stream(self, chunks: Iterable[str], interrupt: threading.Event = None) -> bool:
+        """
+        Speak text arriving in chunks (e.g. LLM tokens). Returns True if
+        everything was played, False on barge-in or a playback error.
+        """
+        interrupt = interrupt or threading.Event()
+        self._interrupt = interrupt
+        started = time.perf_counter()
+        playlist: "queue.Queue[Optional[Future]]" = queue.Queue(maxsize=self.max_ahead)
+        player = threading.Thread(target=self._playback, args=(playlist, interrupt, started),
+                                  name="tts-playback", daemon=True)
+        player.start()
+
+        splitter = SentenceSplitter()
+        try:
+            for chunk in chunks:
+                if interrupt.is_set():
+                    break
+                for sentence in splitter.feed(chunk):
+                    self._enqueue(playlist, self._pool.submit(self.synthesizer, sentence), interrupt)
+            if not interrupt.is_set():
+                for sentence in splitter.flush():
+                    self._enqueue(playlist, self._pool.submit(self.synthesizer, sentence), interrupt)
+        finally:
+            self._enqueue(playlist, None, interrupt, final=True)
+            player.join()
+            self._cancel_pending(playlist)
+
+        with self._lock:
+            self._stats["utterances"] += 1
+            self._stats["interrupted"] += interrupt.is_set()
+        return not interrupt.is_set()
+
+    def stop(self):
+        """Barge-in: stop playback and drop every pending sentence."""
+        if self._interrupt is not None:
+            self._interrupt.set()
+
+    def _enqueue(self, playlist: queue.Queue, future: Optional[Future], interrupt: threading.Event,
+                 final: bool = False):
+        """Blocks while MAX_AHEAD sentences wait (backpressure), but never past a barge-in."""
+        if future is not None:
+            with self._lock:
+                self._stats["sentences"] += 1
+        while True:
+            if interrupt.is_set() and not final:
+                if future is not None and future.cancel():
+                    with self._lock:
+                        self._stats["cancelled"] += 1
+                return
+            try:
+                playlist.put(future, timeout=0.05)
+                return
+            except queue.Full:
+                if final and interrupt.is_set():
+                    self._cancel_pending(playlist)
+
+    def _cancel_pending(self, playlist: queue.Queue):
+        while True:
+            try:
+                future = playlist.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None and future.cancel():
+                with self._lock:
+                    self._stats["cancelled"] += 1
+
+    def _playback(self, playlist: queue.Queue, interrupt: threading.Event, started: float):
+        first = True
+        while True:
+            future = playlist.get()
+            if future is None:
+                return
+            if interrupt.is_set():
+                if future.cancel():
+                    with self._lock:
+                        self._stats["cancelled"] += 1
+                continue
+            # Wait for synthesis, but let a barge-in abandon a sentence still in flight
+            while not future.done() and not interrupt.wait(0.01):
+                pass
+            if interrupt.is_set():
+                future.cancel()
+                continue
+            try:
+                audio = future.result()
+            except Exception as e:
+                print(f"Error in TTS: {e}")
+                with self._lock:
+                    self._stats["failed"] += 1
+                continue
+            if first:
+                first = False
+                with self._lock:
+                    self._stats["first_audio_s"] += time.perf_counter() - started
+            try:
+                played = self.player(audio, interrupt)
+            except Exception as e:
+                # A broken output device fails every sentence: stop here, but keep
+                # draining the playlist so speak_stream() always returns
+                print(f"Error in audio playback: {e}")
+                with self._lock:
+                    self._stats["failed"] += 1
+                interrupt.set()
+                continue
+            if played:
+                with self._lock:
+                    self._stats["played"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Counts plus the average time from speak() to the first audio."""
+        with self._lock:
+            report = dict(self._stats)
+        first_audio = report.pop("first_audio_s")
+        report["avg_first_audio_ms"] = round(first_audio * 1000 / report["utterances"], 1) if report["utterances"] else 0.0
+        return report
+
+    def close(self):
+        self.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ------------------------------------------
+# Playback
+# ------------------------------------------
+
+class PygamePlayer:
+    """Plays encoded audio from memory through pygame.mixer.music."""
+
+    def __init__(self, poll_interval: float = 0.02):
+        import pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        self.mixer = pygame.mixer
+        self.poll_interval = poll_interval
+
+    def __call__(self, audio: bytes, interrupt: threading.Event) -> bool:
+        self.mixer.music.load(io.BytesIO(audio))
+        self.mixer.music.play()
+        try:
+            while self.mixer.music.get_busy():
+                if interrupt.wait(self.poll_interval):
+                    self.mixer.music.stop()
+                    return False
+            return True
+        finally:
+            self.mixer.music.unload()
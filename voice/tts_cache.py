@@ -0,0 +1,171 @@
+# ==========================================
+# FILE: voice/tts_cache.py
+# ==========================================
+"""
+Content-addressed cache of synthesized speech.
+Audio is stored on disk under sha1(text, voice, model, format), so a phrase
+is synthesized once and replayed instantly in later turns and sessions.
+The store is bounded in bytes and evicts least-recently-used clips; fixed
+phrases (greetings, mode changes) can be preloaded at startup.
+"""
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from voice.speech_engine import split_sentences
+
+DEFAULT_DIR = os.getenv("CARASTRA_TTS_CACHE_DIR", str(Path(__file__).parent.parent / "memory" / "tts_cache"))
+DEFAULT_MAX_BYTES = int(float(os.getenv("CARASTRA_TTS_CACHE_MB", 64)) * 1024 * 1024)
+# Longer sentences rarely repeat; caching them would only churn the store
+MAX_CACHED_CHARS = 160
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of the spoken text (case and punctuation change the audio)."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def audio_key(text: str, voice: str, model: str, audio_format: str) -> str:
+    return hashlib.sha1(f"{model}\n{voice}\n{audio_format}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    On-disk LRU of audio clips (one file per key). The in-memory index is
+    rebuilt from file modification times, so recency survives restarts.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, least recent first
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        files = sorted((p for p in self.directory.glob("*.audio")), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._index[path.stem] = size
+            self._bytes += size
+        self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.audio"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._index:
+                self._stats["misses"] += 1
+                return None
+            self._index.move_to_end(key)
+            self._stats["hits"] += 1
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path)  # recency for the next session
+            return audio
+        except OSError:
+            # Removed behind our back: forget it
+            with self._lock:
+                self._bytes -= self._index.pop(key, 0)
+                self._stats["hits"] -= 1
+                self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(audio)
+        os.replace(tmp, path)  # readers never see a partial clip
+        with self._lock:
+            self._bytes += len(audio) - self._index.pop(key, 0)
+            self._index[key] = len(audio)
+            self._stats["writes"] += 1
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self._stats["evictions"] += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            report = {**self._stats, "entries": len(self._index), "bytes": self._bytes}
+        lookups = report["hits"] + report["misses"]
+        report["hit_rate"] = report["hits"] / lookups if lookups else 0.0
+        return report
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._bytes = 0
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+
+class CachedSynthesizer:
+    """
+    Wraps a synthesizer (with model / voice / response_format attributes,
+    e.g. OpenAISynthesizer) so short sentences are served from the cache.
+    """
+
+    def __init__(self, synthesizer: Callable[[str], bytes], cache: TTSCache = None,
+                 max_chars: int = MAX_CACHED_CHARS):
+        self.synthesizer = synthesizer
+        self.cache = cache or TTSCache()
+        self.max_chars = max_chars
+
+    def key(self, text: str) -> str:
+        s = self.synthesizer
+        return audio_key(text, getattr(s, "voice", ""), getattr(s, "model", ""), getattr(s, "response_format", ""))
+
+    def __call__(self, text: str) -> bytes:
+        if len(text) > self.max_chars:
+            return self.synthesizer(text)
+        key = self.key(text)
+        audio = self.cache.get(key)
+        if audio is None:
+            audio = self.synthesizer(text)
+            self.cache.put(key, audio)
+        return audio
+
+    def preload(self, phrases: Iterable[str], background: bool = True) -> Optional[threading.Thread]:
+        """
+        Synthesizes the missing fixed phrases, split the way the speech
+        engine will split them so the keys match.
+        """
+        sentences: List[str] = list(dict.fromkeys(s for p in phrases for s in split_sentences(p)))
+        missing = [s for s in sentences if len(s) <= self.max_chars and self.key(s) not in self.cache]
+
+        def work():
+            for sentence in missing:
+                try:
+                    self.cache.put(self.key(sentence), self.synthesizer(sentence))
+                except Exception as e:
+                    print(f"⚠️ TTS preload failed for '{sentence}': {e}")
+
+        if not background:
+            work()
+            return None
+        thread = threading.Thread(target=work, name="tts-preload", daemon=True)
+        thread.start()
+        return thread